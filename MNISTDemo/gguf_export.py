@@ -0,0 +1,139 @@
+"""
+Content-addressed GGUF export for the MNIST trainers.
+
+The content hash covers the architecture name, the metadata key/values and
+every tensor (name, dtype, shape and raw bytes). The GGUF file is only
+rewritten when that hash differs from the one recorded in its sidecar
+manifest (`<model>.gguf.manifest.json`), and the new file is written to a
+temporary path first and moved into place with an atomic rename. Unchanged
+weights therefore leave the committed file, its mtime and every build cache
+keyed on it untouched.
+
+The manifest is deterministic (no timestamps) so it can be committed next to
+the model, and downstream tooling or browser caches can key on `content_hash`.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import gguf
+import numpy as np
+
+MANIFEST_SUFFIX = ".manifest.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def manifest_path_for(model_path) -> Path:
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name + MANIFEST_SUFFIX)
+
+
+def content_hash(arch: str, tensors: list, metadata: dict | None = None) -> str:
+    """sha256 over the architecture, metadata and tensor names/dtypes/shapes/bytes."""
+    h = hashlib.sha256()
+    h.update(f"arch={arch}\n".encode("utf-8"))
+    h.update(json.dumps(metadata or {}, sort_keys=True).encode("utf-8"))
+    for name, data in tensors:
+        data = np.ascontiguousarray(data)
+        h.update(f"\n{name}|{data.dtype.str}|{list(data.shape)}\n".encode("utf-8"))
+        h.update(data.tobytes())
+    return h.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_manifest(model_path) -> dict | None:
+    path = manifest_path_for(model_path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_up_to_date(model_path, digest: str) -> bool:
+    """True if the file on disk is the one the manifest describes and has this content hash."""
+    model_path = Path(model_path)
+    manifest = read_manifest(model_path)
+    if manifest is None or manifest.get("content_hash") != digest or not model_path.exists():
+        return False
+    return manifest.get("file_sha256") == file_sha256(model_path)
+
+
+def _write_gguf(path: Path, arch: str, tensors: list, metadata: dict):
+    writer = gguf.GGUFWriter(str(path), arch)
+    for key, value in sorted(metadata.items()):
+        if isinstance(value, str):
+            writer.add_string(key, value)
+        elif isinstance(value, bool):
+            writer.add_bool(key, value)
+        elif isinstance(value, int):
+            writer.add_uint32(key, value)
+        elif isinstance(value, float):
+            writer.add_float32(key, value)
+        else:
+            raise TypeError(f"Unsupported GGUF metadata type for {key}: {type(value).__name__}")
+    for name, data in tensors:
+        writer.add_tensor(name, data)
+
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_tensors_to_file()
+    writer.close()
+
+
+def export_gguf(model_path, arch: str, tensors: list, metadata: dict | None = None) -> bool:
+    """
+    Write `tensors` (list of (name, ndarray)) to `model_path` unless unchanged.
+
+    Returns True if the file was (re)written, False if it was already up to date.
+    """
+    model_path = Path(model_path)
+    metadata = metadata or {}
+    digest = content_hash(arch, tensors, metadata)
+
+    if is_up_to_date(model_path, digest):
+        print(f"{model_path} is up to date (content hash {digest[:16]}), not rewritten")
+        return False
+
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = model_path.with_name(f".{model_path.name}.{os.getpid()}.tmp")
+    try:
+        _write_gguf(tmp_path, arch, tensors, metadata)
+        file_digest = file_sha256(tmp_path)
+        os.replace(tmp_path, model_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    manifest = {
+        "file": model_path.name,
+        "format": "gguf",
+        "arch": arch,
+        "content_hash": digest,
+        "file_sha256": file_digest,
+        "size": model_path.stat().st_size,
+        "tensors": [
+            {"name": name, "dtype": str(np.asarray(data).dtype), "shape": list(np.asarray(data).shape)}
+            for name, data in tensors
+        ],
+    }
+    manifest_path = manifest_path_for(model_path)
+    tmp_manifest = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_manifest, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_manifest, manifest_path)
+
+    print(f"{model_path} written (content hash {digest[:16]}), manifest: {manifest_path}")
+    return True
@@ -0,0 +1,292 @@
+"""
+Throughput autotuner shared by the MNIST trainers.
+
+Runs a short series of timed training steps over a grid of batch sizes,
+intra-op/inter-op thread counts and DataLoader settings, keeps the
+configuration with the highest samples/sec and caches it per host so the
+next run can reuse it without tuning again.
+
+PyTorch only allows the inter-op thread count to be set once per process,
+so every inter-op candidate is measured in its own spawned worker process.
+Inside that worker the remaining axes are swept one after another
+(coordinate search), keeping the best value found for the previous axes.
+
+Usage from a trainer:
+
+    config = autotune.resolve(
+        tag="mnist-cnn",
+        model_fn=MnistCNN,
+        dataset=train_data,
+        base_batch_size=64,
+        base_lr=1e-3,
+    )
+    autotune.apply_threads(config)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+from pathlib import Path
+from time import perf_counter
+
+import torch
+import torch.nn as nn
+
+DEFAULT_CACHE_PATH = Path("./data/autotune-cache.json")
+DEFAULT_STEP_BUDGET = 300
+WARMUP_STEPS = 3
+SWEEP_POLL_SECONDS = 1.0
+
+
+def host_fingerprint() -> str:
+    """Stable identifier of the machine and the software stack used for timing."""
+    parts = [
+        platform.system(),
+        platform.machine(),
+        platform.processor(),
+        str(os.cpu_count()),
+        torch.__version__,
+    ]
+    if torch.cuda.is_available():
+        parts.append(torch.cuda.get_device_name(0))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def default_config(base_batch_size: int, base_lr: float) -> dict:
+    """Configuration used when autotuning is disabled."""
+    return {
+        "batch_size": base_batch_size,
+        "lr": base_lr,
+        "num_threads": torch.get_num_threads(),
+        "num_interop_threads": None,
+        "num_workers": 4,
+        "pin_memory": torch.cuda.is_available(),
+        "samples_per_sec": None,
+    }
+
+
+def scaled_lr(base_lr: float, base_batch_size: int, batch_size: int) -> float:
+    """Linear learning rate scaling rule (lr grows with the batch size)."""
+    return base_lr * batch_size / base_batch_size
+
+
+def load_cached(cache_path: Path, key: str) -> dict | None:
+    if not cache_path.exists():
+        return None
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached(cache_path: Path, key: str, config: dict):
+    entries = {}
+    if cache_path.exists():
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+    entries[key] = config
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def apply_threads(config: dict):
+    """Apply the thread settings of a configuration to the current process."""
+    if config.get("num_threads"):
+        torch.set_num_threads(config["num_threads"])
+    if config.get("num_interop_threads"):
+        try:
+            torch.set_num_interop_threads(config["num_interop_threads"])
+        except RuntimeError:
+            # Inter-op pool already started (e.g. set twice in one process)
+            print("WARNING: inter-op thread count can only be set once per process, keeping current value")
+
+
+def candidate_grid(base_batch_size: int, dataset_size: int) -> dict:
+    cpu_count = os.cpu_count() or 1
+    batch_sizes = [base_batch_size * m for m in (1, 2, 4, 8) if base_batch_size * m <= dataset_size]
+    threads = sorted({cpu_count, max(1, cpu_count // 2), max(1, cpu_count // 4)}, reverse=True)
+    interop = sorted({1, min(4, cpu_count)})
+    workers = sorted({0, min(2, cpu_count), min(4, cpu_count)})
+    pin_memory = [False, True] if torch.cuda.is_available() else [False]
+    return {
+        "batch_size": batch_sizes or [base_batch_size],
+        "num_threads": threads,
+        "num_interop_threads": interop,
+        "num_workers": workers,
+        "pin_memory": pin_memory,
+    }
+
+
+def _time_config(model_fn, dataset, input_fn, config: dict, steps: int, device) -> float:
+    """Run `steps` timed training steps with a fresh model and return samples/sec."""
+    torch.set_num_threads(config["num_threads"])
+
+    model = model_fn().to(device)
+    loss_fn = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(model.parameters(), lr=config["lr"])
+    loader = torch.utils.data.DataLoader(
+        dataset=dataset,
+        batch_size=config["batch_size"],
+        # Iterable (streaming) datasets shuffle internally
+        shuffle=not isinstance(dataset, torch.utils.data.IterableDataset),
+        num_workers=config["num_workers"],
+        pin_memory=config["pin_memory"],
+        drop_last=True,
+    )
+
+    model.train()
+    samples = 0
+    t_start = None
+    for i, (images, labels) in enumerate(loader):
+        if i == WARMUP_STEPS:
+            if device.type == "cuda":
+                torch.cuda.synchronize()
+            t_start = perf_counter()
+        if input_fn is not None:
+            images = input_fn(images)
+        images = images.to(device, non_blocking=config["pin_memory"])
+        labels = labels.to(device, non_blocking=config["pin_memory"])
+
+        optimizer.zero_grad()
+        loss = loss_fn(model(images), labels)
+        loss.backward()
+        optimizer.step()
+
+        if t_start is not None:
+            samples += labels.size(0)
+        if i + 1 >= WARMUP_STEPS + steps:
+            break
+
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+    if t_start is None or samples == 0:
+        return 0.0
+    return samples / (perf_counter() - t_start)
+
+
+def _sweep(model_fn, dataset, input_fn, grid: dict, base: dict, steps: int, queue):
+    """Worker process body: coordinate search for one inter-op thread count."""
+    torch.set_num_interop_threads(base["num_interop_threads"])
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    best = dict(base)
+    best["samples_per_sec"] = 0.0
+    trials = []
+    for axis in ("num_threads", "batch_size", "num_workers", "pin_memory"):
+        best_value = best[axis]
+        for value in grid[axis]:
+            config = dict(best)
+            config[axis] = value
+            if axis == "batch_size":
+                config["lr"] = scaled_lr(base["lr"], base["batch_size"], value)
+            rate = _time_config(model_fn, dataset, input_fn, config, steps, device)
+            trials.append((config, rate))
+            if rate > best["samples_per_sec"]:
+                best = dict(config)
+                best["samples_per_sec"] = rate
+                best_value = value
+        best[axis] = best_value
+    queue.put(trials)
+
+
+def _wait_for_trials(worker, queue, poll_seconds: float = SWEEP_POLL_SECONDS):
+    """Trials sent by a sweep worker, or None if it exited without sending them (crash, OOM, pickling)."""
+    while True:
+        try:
+            return queue.get(timeout=poll_seconds)
+        except queue_module.Empty:
+            if not worker.is_alive():
+                # It may have put its result right before exiting
+                try:
+                    return queue.get(timeout=poll_seconds)
+                except queue_module.Empty:
+                    return None
+
+
+def tune(model_fn, dataset, base_batch_size: int, base_lr: float,
+         input_fn=None, step_budget: int = DEFAULT_STEP_BUDGET) -> dict:
+    """
+    Measure the candidate grid and return the fastest configuration.
+
+    `model_fn`, `dataset` and `input_fn` are sent to spawned worker processes
+    and must therefore be picklable (module level classes and functions).
+    """
+    grid = candidate_grid(base_batch_size, len(dataset))
+    trials_per_interop = sum(len(grid[axis]) for axis in ("num_threads", "batch_size", "num_workers", "pin_memory"))
+    n_trials = trials_per_interop * len(grid["num_interop_threads"])
+    steps = max(5, step_budget // n_trials)
+    print(f"Autotuning: {n_trials} trials x {steps} timed steps")
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for interop in grid["num_interop_threads"]:
+        base = default_config(base_batch_size, base_lr)
+        base["num_threads"] = grid["num_threads"][0]
+        base["num_interop_threads"] = interop
+        base["num_workers"] = grid["num_workers"][0]
+        base["pin_memory"] = grid["pin_memory"][0]
+
+        queue = ctx.Queue()
+        worker = ctx.Process(target=_sweep, args=(model_fn, dataset, input_fn, grid, base, steps, queue))
+        worker.start()
+        trials = _wait_for_trials(worker, queue)
+        worker.join()
+        if trials is None:
+            print(f"  sweep with interop={interop} failed (worker exit code {worker.exitcode}), skipped")
+            continue
+        results.extend(trials)
+
+    if not results:
+        raise RuntimeError("Autotuning failed: every sweep worker died before reporting")
+
+    for config, rate in results:
+        print(
+            f"  batch={config['batch_size']:5d} threads={config['num_threads']:2d} "
+            f"interop={config['num_interop_threads']:2d} workers={config['num_workers']} "
+            f"pin={int(config['pin_memory'])}: {rate:10.1f} samples/s")
+
+    best_config, best_rate = max(results, key=lambda r: r[1])
+    best = dict(best_config)
+    best["samples_per_sec"] = best_rate
+    return best
+
+
+def resolve(tag: str, model_fn, dataset, base_batch_size: int, base_lr: float,
+            input_fn=None, cache_path: Path = DEFAULT_CACHE_PATH,
+            retune: bool = False, step_budget: int = DEFAULT_STEP_BUDGET) -> dict:
+    """Return the cached configuration for this host, tuning first if needed."""
+    key = f"{tag}:{host_fingerprint()}"
+    if not retune:
+        cached = load_cached(cache_path, key)
+        if cached is not None:
+            print(f"Using cached autotune result for {key} from {cache_path}")
+            return cached
+
+    try:
+        config = tune(model_fn, dataset, base_batch_size, base_lr, input_fn, step_budget)
+    except RuntimeError as e:
+        print(f"{e}; using the default configuration (not cached)")
+        return default_config(base_batch_size, base_lr)
+    store_cached(cache_path, key, config)
+    print(f"Autotune result stored in {cache_path} under {key}")
+    return config
+
+
+def describe(config: dict) -> str:
+    rate = config.get("samples_per_sec")
+    rate_info = f", {rate:.1f} samples/s" if rate else ""
+    return (
+        f"batch_size={config['batch_size']}, lr={config['lr']:.2e}, "
+        f"threads={config['num_threads']}, interop={config['num_interop_threads']}, "
+        f"num_workers={config['num_workers']}, pin_memory={config['pin_memory']}{rate_info}")
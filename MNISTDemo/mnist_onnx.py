@@ -0,0 +1,462 @@
+"""
+ONNX export for the MNIST models, next to the GGUF export of the trainers.
+
+The exported graph has a dynamic batch dimension and goes through a few
+graph-level optimizations before it is written:
+
+- constant folding: every node whose inputs are all constants is evaluated
+  once and replaced by an initializer (Identity nodes are dropped too)
+- MatMul+Add and Gemm+Add with a constant bias are fused into one Gemm
+  (torch exports nn.Linear as a Gemm that already has its bias, so this
+  only changes graphs with a separate bias Add)
+- Conv+Relu is fused into `com.microsoft.FusedConv` (ONNX Runtime contrib
+  op); pass `fuse_conv_relu_ops=False` (trainer flag --onnx-portable) for
+  a graph that only uses standard ONNX ops
+- optionally, float initializers are stored as FP16 and cast back on load
+
+Each pass reports how many nodes it changed and the node count before and
+after; the report is stored in the model metadata and printed by the
+benchmark. After writing, the graph is evaluated with the NumPy reference
+path below and compared with the PyTorch outputs.
+
+Benchmarking the NumPy reference path of an ONNX graph against the same
+model loaded from GGUF:
+
+    python mnist_onnx.py mnist_cnn.onnx mnist_cnn.gguf --arch cnn
+"""
+
+import argparse
+import io
+from time import perf_counter
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+MS_DOMAIN = "com.microsoft"
+OPSET_VERSION = 13
+FP16_SUFFIX = "_fp16"
+PASS_REPORT_KEY = "optimization_passes"  # model metadata written by export()
+
+
+# -- NumPy reference path ----------------------------------------------------
+
+def _conv2d(x, w, b, strides=(1, 1), pads=(0, 0, 0, 0)):
+    x = np.pad(x, ((0, 0), (0, 0), (pads[0], pads[2]), (pads[1], pads[3])))
+    n, c, h, wd = x.shape
+    m, _, kh, kw = w.shape
+    sh, sw = strides
+    oh = (h - kh) // sh + 1
+    ow = (wd - kw) // sw + 1
+    s = x.strides
+    cols = np.lib.stride_tricks.as_strided(
+        x, shape=(n, c, oh, ow, kh, kw), strides=(s[0], s[1], s[2] * sh, s[3] * sw, s[2], s[3]))
+    out = np.tensordot(cols, w, axes=([1, 4, 5], [1, 2, 3])).transpose(0, 3, 1, 2)
+    if b is not None:
+        out = out + b.reshape(1, -1, 1, 1)
+    return np.ascontiguousarray(out, dtype=x.dtype)
+
+
+def _max_pool2d(x, kernel=(2, 2), strides=(2, 2), pads=(0, 0, 0, 0)):
+    x = np.pad(x, ((0, 0), (0, 0), (pads[0], pads[2]), (pads[1], pads[3])), constant_values=-np.inf)
+    n, c, h, w = x.shape
+    kh, kw = kernel
+    sh, sw = strides
+    oh = (h - kh) // sh + 1
+    ow = (w - kw) // sw + 1
+    s = x.strides
+    windows = np.lib.stride_tricks.as_strided(
+        x, shape=(n, c, oh, ow, kh, kw), strides=(s[0], s[1], s[2] * sh, s[3] * sw, s[2], s[3]))
+    return windows.max(axis=(4, 5))
+
+
+def _relu(x):
+    return np.maximum(x, 0, dtype=x.dtype)
+
+
+def _op_conv(inputs, attrs, activation=None):
+    x, w = inputs[0], inputs[1]
+    b = inputs[2] if len(inputs) > 2 else None
+    if attrs.get("group", 1) != 1 or any(d != 1 for d in attrs.get("dilations", [1, 1])):
+        raise NotImplementedError("Conv with groups or dilations is not supported by the reference path")
+    y = _conv2d(x, w, b, attrs.get("strides", [1, 1]), attrs.get("pads", [0, 0, 0, 0]))
+    if activation in (None, ""):
+        return [y]
+    if activation == "Relu":
+        return [_relu(y)]
+    raise NotImplementedError(f"FusedConv activation {activation}")
+
+
+def _op_reshape(inputs, attrs):
+    data, shape = inputs
+    shape = [data.shape[i] if d == 0 else int(d) for i, d in enumerate(shape)]
+    return [data.reshape(shape)]
+
+
+def _op_gemm(inputs, attrs):
+    a, b = inputs[0], inputs[1]
+    if attrs.get("transA", 0):
+        a = a.T
+    if attrs.get("transB", 0):
+        b = b.T
+    y = attrs.get("alpha", 1.0) * (a @ b)
+    if len(inputs) > 2 and inputs[2] is not None:
+        y = y + attrs.get("beta", 1.0) * inputs[2]
+    return [y.astype(a.dtype, copy=False)]
+
+
+def _op_unsqueeze(inputs, attrs):
+    axes = inputs[1] if len(inputs) > 1 else attrs["axes"]
+    y = inputs[0]
+    for axis in sorted(int(a) for a in axes):
+        y = np.expand_dims(y, axis)
+    return [y]
+
+
+NUMPY_OPS = {
+    ("", "Conv"): lambda i, a: _op_conv(i, a),
+    (MS_DOMAIN, "FusedConv"): lambda i, a: _op_conv(i, a, a.get("activation")),
+    ("", "Relu"): lambda i, a: [_relu(i[0])],
+    ("", "MaxPool"): lambda i, a: [_max_pool2d(i[0], a["kernel_shape"], a.get("strides", [1, 1]),
+                                               a.get("pads", [0, 0, 0, 0]))],
+    ("", "Flatten"): lambda i, a: [i[0].reshape(int(np.prod(i[0].shape[:a.get("axis", 1)])), -1)],
+    ("", "Reshape"): _op_reshape,
+    ("", "Gemm"): _op_gemm,
+    ("", "MatMul"): lambda i, a: [i[0] @ i[1]],
+    ("", "Add"): lambda i, a: [i[0] + i[1]],
+    ("", "Cast"): lambda i, a: [i[0].astype(helper.tensor_dtype_to_np_dtype(a["to"]))],
+    ("", "Identity"): lambda i, a: [i[0]],
+    ("", "Constant"): lambda i, a: [np.asarray(a["value"])],
+    ("", "Shape"): lambda i, a: [np.array(i[0].shape, dtype=np.int64)],
+    ("", "Gather"): lambda i, a: [np.take(i[0], i[1], axis=a.get("axis", 0))],
+    ("", "Unsqueeze"): _op_unsqueeze,
+    ("", "Concat"): lambda i, a: [np.concatenate([np.atleast_1d(x) for x in i], axis=a["axis"])],
+}
+
+
+def _node_attrs(node) -> dict:
+    attrs = {}
+    for attr in node.attribute:
+        value = helper.get_attribute_value(attr)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        elif isinstance(value, TensorProto):
+            value = numpy_helper.to_array(value)
+        attrs[attr.name] = value
+    return attrs
+
+
+def _run_node(node, inputs: list) -> list:
+    op = NUMPY_OPS.get((node.domain if node.domain != "ai.onnx" else "", node.op_type))
+    if op is None:
+        raise NotImplementedError(f"Op {node.domain}:{node.op_type} is not supported by the reference path")
+    return op(inputs, _node_attrs(node))
+
+
+class NumpyGraph:
+    """Minimal NumPy evaluator for the op set used by the MNIST models."""
+
+    def __init__(self, model: onnx.ModelProto):
+        graph = model.graph
+        self.constants = {init.name: numpy_helper.to_array(init) for init in graph.initializer}
+        self.nodes = list(graph.node)
+        self.input_names = [i.name for i in graph.input if i.name not in self.constants]
+        self.output_names = [o.name for o in graph.output]
+
+    def run(self, x: np.ndarray) -> np.ndarray:
+        values = dict(self.constants)
+        values[self.input_names[0]] = x
+        for node in self.nodes:
+            outputs = _run_node(node, [values[name] if name else None for name in node.input])
+            values.update(zip(node.output, outputs))
+        return values[self.output_names[0]]
+
+
+# -- Graph optimizations -----------------------------------------------------
+
+def _consumers(nodes: list) -> dict:
+    """Map each value name to the indices of the nodes reading it."""
+    consumers = {}
+    for index, node in enumerate(nodes):
+        for name in node.input:
+            consumers.setdefault(name, []).append(index)
+    return consumers
+
+
+def _set_repeated(field, items: list):
+    # Copy first: items may be elements of `field` itself
+    copies = []
+    for item in items:
+        copy = type(item)()
+        copy.CopyFrom(item)
+        copies.append(copy)
+    del field[:]
+    field.extend(copies)
+
+
+def _replace_nodes(graph, nodes: list):
+    _set_repeated(graph.node, nodes)
+
+
+def _apply_replacements(graph, nodes: list, replaced: dict):
+    """Rebuild the node list; `replaced` maps node index -> new node, or None to drop it."""
+    kept = []
+    for index, node in enumerate(nodes):
+        node = replaced.get(index, node)
+        if node is not None:
+            kept.append(node)
+    _replace_nodes(graph, kept)
+
+
+def _drop_unused_initializers(graph):
+    used = {name for node in graph.node for name in node.input} | {o.name for o in graph.output}
+    _set_repeated(graph.initializer, [init for init in graph.initializer if init.name in used])
+
+
+def fold_constants(model: onnx.ModelProto) -> int:
+    """Evaluate nodes with only constant inputs and store their outputs as initializers."""
+    graph = model.graph
+    constants = {init.name: numpy_helper.to_array(init) for init in graph.initializer}
+    graph_outputs = {o.name for o in graph.output}
+    renames = {}
+    nodes = []
+    folded = 0
+
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name in renames:
+                node.input[i] = renames[name]
+
+        if node.op_type == "Identity" and node.output[0] not in graph_outputs:
+            renames[node.output[0]] = node.input[0]
+            folded += 1
+            continue
+
+        inputs = [name for name in node.input if name]
+        if all(name in constants for name in inputs) and (node.domain, node.op_type) in NUMPY_OPS:
+            outputs = _run_node(node, [constants[name] if name else None for name in node.input])
+            for name, value in zip(node.output, outputs):
+                constants[name] = np.asarray(value)
+                graph.initializer.append(numpy_helper.from_array(np.asarray(value), name))
+            folded += 1
+            continue
+        nodes.append(node)
+
+    _replace_nodes(graph, nodes)
+    _drop_unused_initializers(graph)
+    return folded
+
+
+def fuse_gemm_bias(model: onnx.ModelProto) -> int:
+    """Fuse MatMul+Add / Gemm(no C)+Add with a constant 1-D bias into a single Gemm."""
+    graph = model.graph
+    inferred = onnx.shape_inference.infer_shapes(model).graph
+    ranks = {v.name: len(v.type.tensor_type.shape.dim) for v in list(inferred.value_info) + list(inferred.input)}
+    constants = {init.name: numpy_helper.to_array(init) for init in graph.initializer}
+    nodes = list(graph.node)
+    consumers = _consumers(nodes)
+    graph_outputs = {o.name for o in graph.output}
+    replaced = {}
+
+    for index, node in enumerate(nodes):
+        if node.op_type == "MatMul":
+            a, b = node.input
+            if ranks.get(a) != 2 or b not in constants or constants[b].ndim != 2:
+                continue
+        elif node.op_type != "Gemm" or len(node.input) != 2:
+            continue
+
+        users = consumers.get(node.output[0], [])
+        if len(users) != 1 or nodes[users[0]].op_type != "Add" or node.output[0] in graph_outputs:
+            continue
+        add = nodes[users[0]]
+        bias = add.input[1] if add.input[0] == node.output[0] else add.input[0]
+        if bias not in constants or constants[bias].ndim != 1:
+            continue
+
+        gemm = helper.make_node("Gemm", [node.input[0], node.input[1], bias], [add.output[0]],
+                                name=(node.name or "gemm") + "_bias")
+        if node.op_type == "Gemm":
+            # beta only scales C, which the original Gemm did not have
+            gemm.attribute.extend(a for a in node.attribute if a.name != "beta")
+        replaced[index] = gemm
+        replaced[users[0]] = None
+
+    if replaced:
+        _apply_replacements(graph, nodes, replaced)
+    return sum(1 for node in replaced.values() if node is not None)
+
+
+def fuse_conv_relu(model: onnx.ModelProto) -> int:
+    """Fuse Conv followed by Relu into com.microsoft.FusedConv(activation="Relu")."""
+    graph = model.graph
+    nodes = list(graph.node)
+    consumers = _consumers(nodes)
+    graph_outputs = {o.name for o in graph.output}
+    replaced = {}
+
+    for index, node in enumerate(nodes):
+        if node.op_type != "Conv" or node.output[0] in graph_outputs:
+            continue
+        users = consumers.get(node.output[0], [])
+        if len(users) != 1 or nodes[users[0]].op_type != "Relu":
+            continue
+        relu = nodes[users[0]]
+        fused_conv = helper.make_node("FusedConv", list(node.input), [relu.output[0]],
+                                      name=(node.name or "conv") + "_relu", domain=MS_DOMAIN, activation="Relu")
+        fused_conv.attribute.extend(node.attribute)
+        replaced[index] = fused_conv
+        replaced[users[0]] = None
+
+    if replaced:
+        _apply_replacements(graph, nodes, replaced)
+        if not any(o.domain == MS_DOMAIN for o in model.opset_import):
+            model.opset_import.append(helper.make_opsetid(MS_DOMAIN, 1))
+    return sum(1 for node in replaced.values() if node is not None)
+
+
+def store_initializers_fp16(model: onnx.ModelProto) -> int:
+    """Store float initializers as FP16, with Cast nodes restoring FP32 at load time."""
+    graph = model.graph
+    casts = []
+    initializers = []
+    converted = 0
+    for init in graph.initializer:
+        if init.data_type != TensorProto.FLOAT:
+            initializers.append(init)
+            continue
+        half = numpy_helper.from_array(numpy_helper.to_array(init).astype(np.float16), init.name + FP16_SUFFIX)
+        initializers.append(half)
+        casts.append(helper.make_node("Cast", [half.name], [init.name], name=init.name + "_cast",
+                                      to=TensorProto.FLOAT))
+        converted += 1
+
+    _set_repeated(graph.initializer, initializers)
+    nodes = casts + list(graph.node)
+    _replace_nodes(graph, nodes)
+    return converted
+
+
+def optimize(model: onnx.ModelProto, fp16: bool = False, fuse_conv_relu_ops: bool = True) -> list:
+    """Run the graph passes in order; returns one report line per pass (also stored in the model metadata)."""
+    passes = [("constant folding", fold_constants, "nodes folded"), ("Gemm+bias fusion", fuse_gemm_bias, "fused")]
+    if fuse_conv_relu_ops:
+        passes.append(("Conv+ReLU fusion", fuse_conv_relu, "fused"))
+    if fp16:
+        passes.append(("FP16 initializers", store_initializers_fp16, "converted"))
+    report = []
+    for label, run_pass, unit in passes:
+        nodes_before = len(model.graph.node)
+        changed = run_pass(model)
+        report.append(f"{label}: {changed} {unit}, nodes {nodes_before} -> {len(model.graph.node)}"
+                      + ("" if changed else " (graph unchanged)"))
+    helper.set_model_props(model, {PASS_REPORT_KEY: "\n".join(report)})
+    return report
+
+
+# -- Export ------------------------------------------------------------------
+
+def export(model, model_path: str, sample_input, fp16: bool = False, fuse_conv_relu_ops: bool = True,
+           atol: float | None = None) -> onnx.ModelProto:
+    """Export a PyTorch model to an optimized ONNX file and verify it against PyTorch."""
+    import torch
+
+    model = model.cpu().eval()
+    buffer = io.BytesIO()
+    torch.onnx.export(
+        model,
+        sample_input,
+        buffer,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=OPSET_VERSION,
+        do_constant_folding=True,
+    )
+    onnx_model = onnx.load_model_from_string(buffer.getvalue())
+
+    for line in optimize(onnx_model, fp16=fp16, fuse_conv_relu_ops=fuse_conv_relu_ops):
+        print(f"  {line}")
+
+    onnx.checker.check_model(onnx_model)
+    onnx.save(onnx_model, model_path)
+
+    # Verify against PyTorch on a batch larger than the export sample
+    x = torch.rand((8,) + tuple(sample_input.shape[1:]))
+    with torch.no_grad():
+        expected = model(x).numpy()
+    actual = NumpyGraph(onnx_model).run(x.numpy())
+    max_diff = float(np.max(np.abs(expected - actual)))
+    tolerance = atol if atol is not None else (1e-2 if fp16 else 1e-4)
+    if max_diff > tolerance:
+        raise AssertionError(f"ONNX output differs from PyTorch: max abs diff {max_diff:.3e} > {tolerance:.0e}")
+    print(f"  verified against PyTorch: max abs diff {max_diff:.3e}")
+    return onnx_model
+
+
+# -- GGUF path and benchmark -------------------------------------------------
+
+def load_gguf_tensors(gguf_path: str) -> dict:
+    import gguf
+
+    reader = gguf.GGUFReader(gguf_path)
+    return {tensor.name: np.array(tensor.data) for tensor in reader.tensors}
+
+
+def gguf_forward(arch: str, tensors: dict, x: np.ndarray) -> np.ndarray:
+    """Forward pass of the trainer architectures using the GGUF weights."""
+    if arch == "cnn":
+        x = _max_pool2d(_relu(_conv2d(x, tensors["stage1.conv1.weight"], tensors["stage1.conv1.bias"],
+                                      pads=(2, 2, 2, 2))))
+        x = _max_pool2d(_relu(_conv2d(x, tensors["stage2.conv2.weight"], tensors["stage2.conv2.bias"],
+                                      pads=(2, 2, 2, 2))))
+        x = x.reshape(x.shape[0], -1)
+        return x @ tensors["out.weight"].T + tensors["out.bias"]
+    if arch == "fc":
+        x = x.reshape(x.shape[0], -1)
+        x = _relu(x @ tensors["fc1.weight"].T + tensors["fc1.bias"])
+        return x @ tensors["fc2.weight"].T + tensors["fc2.bias"]
+    raise ValueError(f"Unknown architecture: {arch}")
+
+
+def _time_per_batch(fn, x: np.ndarray, repeats: int) -> float:
+    fn(x)  # warmup
+    t_start = perf_counter()
+    for _ in range(repeats):
+        fn(x)
+    return (perf_counter() - t_start) / repeats
+
+
+def benchmark(onnx_path: str, gguf_path: str, arch: str, batch_sizes=(1, 32, 256), repeats: int = 20):
+    model = onnx.load(onnx_path)
+    report = {prop.key: prop.value for prop in model.metadata_props}.get(PASS_REPORT_KEY)
+    print("Graph passes at export:")
+    for line in (report.splitlines() if report else ["(no pass report in the model)"]):
+        print(f"  {line}")
+    graph = NumpyGraph(model)
+    tensors = load_gguf_tensors(gguf_path)
+    sample_shape = (1, 28, 28) if arch == "cnn" else (28 * 28,)
+
+    rng = np.random.default_rng(0)
+    x = rng.random((batch_sizes[0],) + sample_shape, dtype=np.float32)
+    max_diff = float(np.max(np.abs(graph.run(x) - gguf_forward(arch, tensors, x))))
+    print(f"ONNX vs GGUF max abs diff: {max_diff:.3e}")
+
+    print(f"{'batch':>6} {'onnx ms':>10} {'gguf ms':>10} {'onnx samples/s':>16} {'gguf samples/s':>16}")
+    for batch in batch_sizes:
+        x = rng.random((batch,) + sample_shape, dtype=np.float32)
+        t_onnx = _time_per_batch(graph.run, x, repeats)
+        t_gguf = _time_per_batch(lambda v: gguf_forward(arch, tensors, v), x, repeats)
+        print(f"{batch:6d} {t_onnx * 1e3:10.3f} {t_gguf * 1e3:10.3f} {batch / t_onnx:16.1f} {batch / t_gguf:16.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark an exported ONNX graph against the GGUF model")
+    parser.add_argument("onnx_path", help="ONNX model exported by a trainer (--onnx)")
+    parser.add_argument("gguf_path", help="GGUF model exported by the same trainer")
+    parser.add_argument("--arch", choices=["cnn", "fc"], required=True, help="Model architecture")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256], help="Batch sizes to time")
+    parser.add_argument("--repeats", type=int, default=20, help="Timed runs per batch size")
+    args = parser.parse_args()
+
+    benchmark(args.onnx_path, args.gguf_path, args.arch, tuple(args.batch_sizes), args.repeats)
@@ -0,0 +1,312 @@
+"""
+Streaming sharded dataset format for the MNIST trainers.
+
+A dataset directory contains fixed-size binary record shards plus an
+`index.json` describing them:
+
+    train/
+      index.json
+      shard-00000.bin
+      shard-00001.bin
+      ...
+
+Every record is `1 + height * width` bytes: the label byte followed by the
+raw uint8 pixels. Because records have a fixed size, shards can be read in
+blocks without any per-record framing, and the reader keeps only a bounded
+shuffle buffer and a few read-ahead blocks in memory, regardless of how many
+samples the dataset has.
+
+Converting the MNIST IDX files downloaded by torchvision:
+
+    python mnist_shards.py ./data/MNIST/raw ./data/shards
+
+Any corpus in IDX format (e.g. EMNIST) can be converted the same way with
+--images/--labels.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import struct
+import threading
+from pathlib import Path
+from queue import Empty, Full, Queue
+
+import torch
+from torch.utils.data import IterableDataset, get_worker_info
+
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+DEFAULT_RECORDS_PER_SHARD = 65536
+DEFAULT_SHUFFLE_BUFFER = 16384
+RECORDS_PER_BLOCK = 4096
+
+IDX_IMAGES_MAGIC = 2051
+IDX_LABELS_MAGIC = 2049
+
+MNIST_SPLITS = {
+    "train": ("train-images-idx3-ubyte", "train-labels-idx1-ubyte"),
+    "test": ("t10k-images-idx3-ubyte", "t10k-labels-idx1-ubyte"),
+}
+
+
+def _open_idx(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _read_idx_header(f, expected_magic: int) -> list:
+    magic, = struct.unpack(">I", f.read(4))
+    if magic != expected_magic:
+        raise ValueError(f"Unexpected IDX magic {magic}, expected {expected_magic}")
+    ndim = magic & 0xFF
+    return list(struct.unpack(f">{ndim}I", f.read(4 * ndim)))
+
+
+def convert_idx(images_path: Path, labels_path: Path, out_dir: Path,
+                records_per_shard: int = DEFAULT_RECORDS_PER_SHARD) -> dict:
+    """Convert an IDX image/label file pair into a sharded dataset directory."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with _open_idx(images_path) as images_f, _open_idx(labels_path) as labels_f:
+        num_images, height, width = _read_idx_header(images_f, IDX_IMAGES_MAGIC)
+        num_labels, = _read_idx_header(labels_f, IDX_LABELS_MAGIC)
+        if num_images != num_labels:
+            raise ValueError(f"{images_path} has {num_images} images but {labels_path} has {num_labels} labels")
+
+        image_size = height * width
+        shards = []
+        num_classes = 0
+        remaining = num_images
+
+        while remaining > 0:
+            shard_records = min(records_per_shard, remaining)
+            shard_name = f"shard-{len(shards):05d}.bin"
+            tmp_path = out_dir / (shard_name + ".tmp")
+
+            with open(tmp_path, "wb") as shard_f:
+                written = 0
+                while written < shard_records:
+                    n = min(RECORDS_PER_BLOCK, shard_records - written)
+                    labels = labels_f.read(n)
+                    pixels = images_f.read(n * image_size)
+                    if len(labels) != n or len(pixels) != n * image_size:
+                        raise ValueError(f"Truncated IDX data in {images_path} or {labels_path}")
+
+                    block = bytearray(n * (1 + image_size))
+                    block[0::1 + image_size] = labels
+                    for i in range(n):
+                        start = i * (1 + image_size) + 1
+                        block[start:start + image_size] = pixels[i * image_size:(i + 1) * image_size]
+                    shard_f.write(block)
+
+                    num_classes = max(num_classes, max(labels) + 1)
+                    written += n
+
+            os.replace(tmp_path, out_dir / shard_name)
+            shards.append({"file": shard_name, "records": shard_records})
+            remaining -= shard_records
+            print(f"  {out_dir / shard_name}: {shard_records} records")
+
+    index = {
+        "version": FORMAT_VERSION,
+        "image_shape": [height, width],
+        "record_size": 1 + image_size,
+        "num_records": num_images,
+        "num_classes": num_classes,
+        "shards": shards,
+    }
+    with open(out_dir / INDEX_FILE, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    return index
+
+
+def load_index(root: Path) -> dict:
+    with open(root / INDEX_FILE, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported shard format version in {root / INDEX_FILE}: {index.get('version')}")
+    return index
+
+
+class ShardedDataset(IterableDataset):
+    """
+    Streams (image, label) samples from a sharded dataset directory.
+
+    - Every shard is split into one contiguous record range per DataLoader
+      worker, so all workers share the load even when the dataset fits in a
+      single shard, and every sample is seen exactly once per epoch.
+    - Each worker reads its shards with `read_ahead` background threads that
+      push fixed-size blocks into a bounded queue.
+    - Samples pass through a shuffle buffer of `shuffle_buffer` records;
+      shard order is reshuffled every epoch.
+
+    Images are returned as float tensors of shape (1, H, W) scaled to [0, 1],
+    matching `transforms.ToTensor()` on the torchvision MNIST dataset.
+    """
+
+    def __init__(self, root, shuffle: bool = True, shuffle_buffer: int = DEFAULT_SHUFFLE_BUFFER,
+                 read_ahead: int = 2, transform=None):
+        super().__init__()
+        self.root = Path(root)
+        self.index = load_index(self.root)
+        self.shuffle = shuffle
+        self.shuffle_buffer = shuffle_buffer if shuffle else 0
+        self.read_ahead = max(1, read_ahead)
+        self.transform = transform
+
+        self.record_size = self.index["record_size"]
+        self.image_shape = tuple(self.index["image_shape"])
+
+    def __len__(self):
+        return self.index["num_records"]
+
+    def _epoch_seed(self) -> int:
+        worker_info = get_worker_info()
+        if worker_info is not None:
+            # Drawn from the main process RNG each epoch, different per worker
+            return worker_info.seed
+        return int(torch.empty((), dtype=torch.int64).random_().item())
+
+    def _assigned_shards(self, rng: random.Random) -> list:
+        """This worker's part of each shard: [{"file", "start", "records"}, ...]."""
+        worker_info = get_worker_info()
+        worker_id, num_workers = (worker_info.id, worker_info.num_workers) if worker_info is not None else (0, 1)
+        shards = []
+        for shard in self.index["shards"]:
+            start = shard["records"] * worker_id // num_workers
+            end = shard["records"] * (worker_id + 1) // num_workers
+            if end > start:
+                shards.append({"file": shard["file"], "start": start, "records": end - start})
+        if self.shuffle:
+            rng.shuffle(shards)
+        return shards
+
+    def _read_shards(self, shards: list, blocks: Queue, stop: threading.Event):
+        # Ends with None, or with the exception that stopped it (re-raised by the consumer)
+        end = None
+        try:
+            for shard in shards:
+                with open(self.root / shard["file"], "rb") as f:
+                    f.seek(shard["start"] * self.record_size)
+                    remaining = shard["records"]
+                    while remaining > 0 and not stop.is_set():
+                        data = f.read(min(RECORDS_PER_BLOCK, remaining) * self.record_size)
+                        if not data or len(data) % self.record_size:
+                            raise ValueError(f"Truncated shard {self.root / shard['file']}: "
+                                             f"{remaining} records missing")
+                        remaining -= len(data) // self.record_size
+                        while not stop.is_set():
+                            try:
+                                blocks.put(data, timeout=0.1)
+                                break
+                            except Full:
+                                pass
+        except Exception as e:
+            end = e
+        finally:
+            blocks.put(end)
+
+    def _iter_blocks(self, shards: list):
+        """Yield raw record blocks, read ahead by background threads."""
+        n_threads = min(self.read_ahead, len(shards))
+        if n_threads == 0:
+            return
+        blocks = Queue(maxsize=2 * n_threads)
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self._read_shards, args=(shards[t::n_threads], blocks, stop), daemon=True)
+            for t in range(n_threads)
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            finished = 0
+            while finished < n_threads:
+                data = blocks.get()
+                if data is None:
+                    finished += 1
+                    continue
+                if isinstance(data, Exception):
+                    raise data
+                yield data
+        finally:
+            # Consumer stopped early (e.g. break out of the loop): release the readers
+            stop.set()
+            while any(t.is_alive() for t in threads):
+                try:
+                    blocks.get(timeout=0.1)
+                except Empty:
+                    pass
+
+    def _to_sample(self, record: torch.Tensor):
+        label = int(record[0])
+        image = record[1:].to(torch.float32).div_(255.0).view(1, *self.image_shape)
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, label
+
+    def __iter__(self):
+        rng = random.Random(self._epoch_seed())
+        shards = self._assigned_shards(rng)
+
+        # Preallocated so memory stays constant; rows are copied out of the blocks
+        buffer = torch.empty((self.shuffle_buffer, self.record_size), dtype=torch.uint8)
+        filled = 0
+        for data in self._iter_blocks(shards):
+            records = torch.frombuffer(bytearray(data), dtype=torch.uint8).view(-1, self.record_size)
+            for record in records:
+                if filled < self.shuffle_buffer:
+                    buffer[filled] = record
+                    filled += 1
+                    continue
+                if self.shuffle_buffer:
+                    i = rng.randrange(self.shuffle_buffer)
+                    record, buffer[i] = buffer[i].clone(), record
+                yield self._to_sample(record)
+
+        order = list(range(filled))
+        rng.shuffle(order)
+        for i in order:
+            yield self._to_sample(buffer[i])
+
+
+def convert_mnist_raw(raw_dir: Path, out_dir: Path, records_per_shard: int = DEFAULT_RECORDS_PER_SHARD):
+    """Convert the train/test IDX files of a torchvision MNIST raw directory."""
+    for split, (images_name, labels_name) in MNIST_SPLITS.items():
+        images_path = raw_dir / images_name
+        labels_path = raw_dir / labels_name
+        if not images_path.exists():
+            images_path = images_path.with_name(images_name + ".gz")
+            labels_path = labels_path.with_name(labels_name + ".gz")
+        if not images_path.exists() or not labels_path.exists():
+            print(f"WARNING: {split} IDX files not found in {raw_dir}, skipping")
+            continue
+
+        print(f"Converting {split}: {images_path.name}, {labels_path.name}")
+        index = convert_idx(images_path, labels_path, out_dir / split, records_per_shard)
+        print(f"  {index['num_records']} records in {len(index['shards'])} shards")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convert IDX files into the streaming sharded dataset format")
+    parser.add_argument("raw_dir", nargs="?", type=Path, default=Path("./data/MNIST/raw"),
+                        help="torchvision MNIST raw directory (default: ./data/MNIST/raw)")
+    parser.add_argument("out_dir", nargs="?", type=Path, default=Path("./data/shards"),
+                        help="Output directory, gets train/ and test/ subdirectories (default: ./data/shards)")
+    parser.add_argument("--images", type=Path, help="Convert a single IDX image file instead of raw_dir")
+    parser.add_argument("--labels", type=Path, help="IDX label file matching --images")
+    parser.add_argument("--records-per-shard", type=int, default=DEFAULT_RECORDS_PER_SHARD,
+                        help=f"Records per shard file (default: {DEFAULT_RECORDS_PER_SHARD})")
+    args = parser.parse_args()
+
+    if args.images or args.labels:
+        if not (args.images and args.labels):
+            parser.error("--images and --labels must be given together")
+        convert_idx(args.images, args.labels, args.out_dir, args.records_per_shard)
+    else:
+        convert_mnist_raw(args.raw_dir, args.out_dir, args.records_per_shard)
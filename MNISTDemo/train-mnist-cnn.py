@@ -1,12 +1,16 @@
-import gguf
 import numpy as np
 import torch
 import torch.nn as nn
 import torchvision.datasets as dsets
 import torchvision.transforms as transforms
-import sys
+import argparse
+from pathlib import Path
 from time import time
 
+import gguf_export
+import mnist_autotune as autotune
+import mnist_shards
+
 # Hyperparameters
 num_epochs = 15
 batch_size = 64
@@ -70,36 +74,59 @@ class MnistCNN(nn.Module):
         return x
 
 
-def train(model_path):
-    # Load MNIST dataset
-    train_data = dsets.MNIST(
-        root='./data',
-        train=True,
-        transform=transforms.ToTensor(),
-        download=True
-    )
-    test_data = dsets.MNIST(
-        root='./data',
-        train=False,
-        transform=transforms.ToTensor()
-    )
+def train(model_path, tune=False, retune=False, autotune_cache=autotune.DEFAULT_CACHE_PATH, shards_dir=None,
+          onnx_path=None, onnx_fp16=False, onnx_portable=False):
+    if shards_dir:
+        # Streaming sharded dataset (see mnist_shards.py), constant memory
+        train_data = mnist_shards.ShardedDataset(shards_dir / "train", shuffle=True)
+        test_data = mnist_shards.ShardedDataset(shards_dir / "test", shuffle=False)
+    else:
+        # Load MNIST dataset
+        train_data = dsets.MNIST(
+            root='./data',
+            train=True,
+            transform=transforms.ToTensor(),
+            download=True
+        )
+        test_data = dsets.MNIST(
+            root='./data',
+            train=False,
+            transform=transforms.ToTensor()
+        )
+    streaming = isinstance(train_data, torch.utils.data.IterableDataset)
 
     print(f"Training samples: {len(train_data)}")
     print(f"Test samples: {len(test_data)}")
 
+    # Loader and thread settings (tuned per host with --autotune)
+    if tune or retune:
+        config = autotune.resolve(
+            tag="mnist-cnn",
+            model_fn=MnistCNN,
+            dataset=train_data,
+            base_batch_size=batch_size,
+            base_lr=lr,
+            cache_path=autotune_cache,
+            retune=retune
+        )
+    else:
+        config = autotune.default_config(batch_size, lr)
+    autotune.apply_threads(config)
+    print(f"Settings: {autotune.describe(config)}")
+
     train_loader = torch.utils.data.DataLoader(
         dataset=train_data,
-        batch_size=batch_size,
-        shuffle=True,
-        num_workers=4,
-        pin_memory=True
+        batch_size=config["batch_size"],
+        shuffle=not streaming,
+        num_workers=config["num_workers"],
+        pin_memory=config["pin_memory"]
     )
     test_loader = torch.utils.data.DataLoader(
         dataset=test_data,
         batch_size=batch_size,
         shuffle=False,
-        num_workers=4,
-        pin_memory=True
+        num_workers=config["num_workers"],
+        pin_memory=config["pin_memory"]
     )
 
     # Create model
@@ -117,7 +144,7 @@ def train(model_path):
     model = model.to(device)
 
     loss_fn = nn.CrossEntropyLoss()
-    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    optimizer = torch.optim.Adam(model.parameters(), lr=config["lr"])
 
     # Training loop
     print("\nTraining...")
@@ -139,12 +166,13 @@ def train(model_path):
             loss.backward()
             optimizer.step()
 
-            running_loss += loss.item()
+            # Weighted by batch size: batch count and sizes vary with several loader workers
+            running_loss += loss.item() * labels.size(0)
             _, predicted = torch.max(outputs.data, 1)
             total += labels.size(0)
             correct += (predicted == labels).sum().item()
 
-        epoch_loss = running_loss / len(train_loader)
+        epoch_loss = running_loss / total
         epoch_acc = 100 * correct / total
         print(f"Epoch [{epoch+1:2d}/{num_epochs}] Loss: {epoch_loss:.4f}, Train Acc: {epoch_acc:.2f}%")
 
@@ -171,8 +199,6 @@ def train(model_path):
     print(f"\nExporting to GGUF: {model_path}")
     model = model.cpu()
 
-    gguf_writer = gguf.GGUFWriter(model_path, "mnist-cnn")
-
     # Map PyTorch state dict names to SKaiNET expected names
     name_mapping = {
         "stage1.conv1.weight": "stage1.conv1.weight",
@@ -186,26 +212,46 @@ def train(model_path):
     state_dict = model.state_dict()
     print("\nTensors saved to GGUF:")
 
+    tensors = []
     for pytorch_name, gguf_name in name_mapping.items():
         if pytorch_name in state_dict:
             data = state_dict[pytorch_name].numpy()
             print(f"  {gguf_name}: {list(data.shape)}")
-            gguf_writer.add_tensor(gguf_name, data)
+            tensors.append((gguf_name, data))
         else:
             print(f"  WARNING: {pytorch_name} not found in state dict!")
 
-    gguf_writer.write_header_to_file()
-    gguf_writer.write_kv_data_to_file()
-    gguf_writer.write_tensors_to_file()
-    gguf_writer.close()
+    # Only rewritten when the content hash changed (see gguf_export.py)
+    if gguf_export.export_gguf(model_path, "mnist-cnn", tensors):
+        print(f"\nModel saved to {model_path}")
 
-    print(f"\nModel saved to {model_path}")
+    if onnx_path:
+        import mnist_onnx
 
+        print(f"\nExporting to ONNX: {onnx_path}")
+        mnist_onnx.export(model, onnx_path, torch.zeros(1, 1, 28, 28), fp16=onnx_fp16,
+                          fuse_conv_relu_ops=not onnx_portable)
+        print(f"Model saved to {onnx_path}")
 
-if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <output_model_path.gguf>")
-        print(f"Example: {sys.argv[0]} mnist_cnn.gguf")
-        sys.exit(1)
 
-    train(sys.argv[1])
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Train the MNIST CNN and export it to GGUF",
+        epilog="Example: %(prog)s mnist_cnn.gguf"
+    )
+    parser.add_argument("model_path", help="Output model path (.gguf)")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Tune batch size, threads and loader settings for this host (cached)")
+    parser.add_argument("--retune", action="store_true", help="Ignore the cached autotune result and tune again")
+    parser.add_argument("--autotune-cache", type=Path, default=autotune.DEFAULT_CACHE_PATH,
+                        help=f"Autotune cache file (default: {autotune.DEFAULT_CACHE_PATH})")
+    parser.add_argument("--shards", type=Path, default=None,
+                        help="Train from a sharded dataset directory with train/ and test/ (see mnist_shards.py)")
+    parser.add_argument("--onnx", type=str, default=None, help="Also export an optimized ONNX model to this path")
+    parser.add_argument("--onnx-fp16", action="store_true", help="Store ONNX initializers as FP16")
+    parser.add_argument("--onnx-portable", action="store_true",
+                        help="Skip the Conv+ReLU fusion that needs the ONNX Runtime contrib op domain")
+    args = parser.parse_args()
+
+    train(args.model_path, tune=args.autotune, retune=args.retune, autotune_cache=args.autotune_cache,
+          shards_dir=args.shards, onnx_path=args.onnx, onnx_fp16=args.onnx_fp16, onnx_portable=args.onnx_portable)
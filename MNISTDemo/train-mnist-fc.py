@@ -1,4 +1,3 @@
-import gguf
 import numpy as np
 import torch
 import torch.nn as nn
@@ -6,15 +5,22 @@ import torchvision.datasets as dsets
 import torchvision.transforms as transforms
 from torch.autograd import Variable
 
-import sys
+import argparse
+import functools
+from pathlib import Path
 from time import time
 
+import gguf_export
+import mnist_autotune as autotune
+import mnist_shards
+
 input_size  = 784  # img_size = (28,28) ---> 28*28=784 in total
 hidden_size = 500  # number of nodes at hidden layer
 num_classes = 10   # number of output classes discrete range [0,9]
 num_epochs  = 30   # number of times which the entire dataset is passed throughout the model
 batch_size  = 1000 # the size of input data used for one iteration
 lr          = 1e-3 # size of step
+log_samples = 10000 # print training progress about every this many samples
 
 
 class Net(nn.Module):
@@ -31,16 +37,37 @@ class Net(nn.Module):
         return out
 
 
-def train(model_path):
-    train_data = dsets.MNIST(root='./data', train=True, transform=transforms.ToTensor(), download=True)
-    test_data  = dsets.MNIST(root='./data', train=False, transform=transforms.ToTensor())
+def flatten_images(images):
+    return images.view(-1, 28*28)
+
+
+def train(model_path, tune=False, retune=False, autotune_cache=autotune.DEFAULT_CACHE_PATH, shards_dir=None,
+          onnx_path=None, onnx_fp16=False, onnx_portable=False):
+    if shards_dir:
+        # Streaming sharded dataset (see mnist_shards.py), constant memory
+        train_data = mnist_shards.ShardedDataset(shards_dir / "train", shuffle=True)
+        test_data  = mnist_shards.ShardedDataset(shards_dir / "test", shuffle=False)
+    else:
+        train_data = dsets.MNIST(root='./data', train=True, transform=transforms.ToTensor(), download=True)
+        test_data  = dsets.MNIST(root='./data', train=False, transform=transforms.ToTensor())
+
+        assert len(train_data) == 60000
+        assert len(test_data)  == 10000
+    shuffle_train = not isinstance(train_data, torch.utils.data.IterableDataset)
 
-    assert len(train_data) == 60000
-    assert len(test_data)  == 10000
+    if tune or retune:
+        config = autotune.resolve(tag="mnist-fc", model_fn=functools.partial(Net, input_size, hidden_size, num_classes),
+                                  dataset=train_data, base_batch_size=batch_size, base_lr=lr,
+                                  input_fn=flatten_images, cache_path=autotune_cache, retune=retune)
+    else:
+        config = autotune.default_config(batch_size, lr)
+    autotune.apply_threads(config)
+    print(f"Settings: {autotune.describe(config)}")
+    train_batch_size = config["batch_size"]
 
-    kwargs_train_test = dict(batch_size=batch_size, num_workers=4, pin_memory=True)
-    train_gen = torch.utils.data.DataLoader(dataset=train_data, shuffle=True,  **kwargs_train_test)
-    test_gen  = torch.utils.data.DataLoader(dataset=test_data,  shuffle=False, **kwargs_train_test)
+    kwargs_loader = dict(num_workers=config["num_workers"], pin_memory=config["pin_memory"])
+    train_gen = torch.utils.data.DataLoader(dataset=train_data, shuffle=shuffle_train, batch_size=train_batch_size, **kwargs_loader)
+    test_gen  = torch.utils.data.DataLoader(dataset=test_data,  shuffle=False,         batch_size=batch_size,       **kwargs_loader)
 
     net = Net(input_size, hidden_size, num_classes)
 
@@ -48,15 +75,18 @@ def train(model_path):
         net.cuda()
 
     loss_function = nn.CrossEntropyLoss()
-    optimizer = torch.optim.Adam(net.parameters(), lr=lr)
+    optimizer = torch.optim.Adam(net.parameters(), lr=config["lr"])
 
+    # Batch count and sizes vary (autotuned batch size, a partial last batch per loader worker): count what is seen
+    log_interval = max(1, log_samples // train_batch_size)
     t_start = time()
     for epoch in range(num_epochs):
         loss_history = []
         ncorrect = 0
+        nseen = 0
 
         for i, (images, labels) in enumerate(train_gen):
-            images = Variable(images.view(-1, 28*28))
+            images = Variable(flatten_images(images))
             labels = Variable(labels)
 
             if torch.cuda.is_available():
@@ -69,26 +99,28 @@ def train(model_path):
 
             loss_history.append(loss.cpu().data)
             _, predictions = torch.max(outputs, 1)
-            ncorrect += (predictions == labels).sum()
+            ncorrect += (predictions == labels).sum().item()
+            nseen += labels.size(0)
 
             loss.backward()
             optimizer.step()
 
-            if (i + 1)*batch_size % 10000 == 0:
+            if (i + 1) % log_interval == 0:
                 loss_mean = np.mean(loss_history)
-                accuracy = ncorrect / ((i + 1) * batch_size)
+                accuracy = ncorrect / nseen
                 print(
                     f"Epoch [{epoch+1:02d}/{num_epochs}], "
-                    f"Step [{(i+1)*batch_size:05d}/{len(train_data)}], "
+                    f"Step [{nseen:05d}/{len(train_data)}], "
                     f"Loss: {loss_mean:.4f}, Accuracy: {100*accuracy:.2f}%")
     print()
     print(f"Training took {time()-t_start:.2f}s")
 
     loss_history = []
     ncorrect = 0
+    ntotal = 0
 
     for i, (images, labels) in enumerate(test_gen):
-        images = Variable(images.view(-1, 28*28))
+        images = Variable(flatten_images(images))
         labels = Variable(labels)
 
         if torch.cuda.is_available():
@@ -101,31 +133,49 @@ def train(model_path):
         loss_history.append(loss.cpu().data)
         _, predictions = torch.max(outputs, 1)
         ncorrect += (predictions == labels).sum().cpu().numpy()
+        ntotal += labels.size(0)
 
     loss_mean            = np.mean(loss_history)
     loss_uncertainty     = np.std(loss_history) / np.sqrt(len(loss_history) - 1)
-    accuracy_mean        = ncorrect / (len(test_gen) * batch_size)
-    accuracy_uncertainty = np.sqrt(accuracy_mean * (1.0 - accuracy_mean) / (len(test_gen) * batch_size))
+    accuracy_mean        = ncorrect / ntotal
+    accuracy_uncertainty = np.sqrt(accuracy_mean * (1.0 - accuracy_mean) / ntotal)
     print()
     print(f"Test loss: {loss_mean:.6f}+-{loss_uncertainty:.6f}, Test accuracy: {100*accuracy_mean:.2f}+-{100*accuracy_uncertainty:.2f}%")
 
-    gguf_writer = gguf.GGUFWriter(model_path, "mnist-fc")
-
     print()
     print(f"Model tensors saved to {model_path}:")
+    tensors = []
     for tensor_name in net.state_dict().keys():
         data = net.state_dict()[tensor_name].squeeze().cpu().numpy()
         print(tensor_name, "\t", data.shape)
-        gguf_writer.add_tensor(tensor_name, data)
+        tensors.append((tensor_name, data))
+
+    # Only rewritten when the content hash changed (see gguf_export.py)
+    gguf_export.export_gguf(model_path, "mnist-fc", tensors)
+
+    if onnx_path:
+        import mnist_onnx
 
-    gguf_writer.write_header_to_file()
-    gguf_writer.write_kv_data_to_file()
-    gguf_writer.write_tensors_to_file()
-    gguf_writer.close()
+        print()
+        print(f"Exporting to ONNX: {onnx_path}")
+        mnist_onnx.export(net, onnx_path, torch.zeros(1, input_size), fp16=onnx_fp16,
+                          fuse_conv_relu_ops=not onnx_portable)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <model_path>")
-        sys.exit(1)
-    train(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Train the MNIST MLP and export it to GGUF")
+    parser.add_argument("model_path", help="Output model path (.gguf)")
+    parser.add_argument("--autotune", action="store_true",
+                        help="Tune batch size, threads and loader settings for this host (cached)")
+    parser.add_argument("--retune", action="store_true", help="Ignore the cached autotune result and tune again")
+    parser.add_argument("--autotune-cache", type=Path, default=autotune.DEFAULT_CACHE_PATH,
+                        help=f"Autotune cache file (default: {autotune.DEFAULT_CACHE_PATH})")
+    parser.add_argument("--shards", type=Path, default=None,
+                        help="Train from a sharded dataset directory with train/ and test/ (see mnist_shards.py)")
+    parser.add_argument("--onnx", type=str, default=None, help="Also export an optimized ONNX model to this path")
+    parser.add_argument("--onnx-fp16", action="store_true", help="Store ONNX initializers as FP16")
+    parser.add_argument("--onnx-portable", action="store_true",
+                        help="Skip the Conv+ReLU fusion that needs the ONNX Runtime contrib op domain")
+    args = parser.parse_args()
+    train(args.model_path, tune=args.autotune, retune=args.retune, autotune_cache=args.autotune_cache,
+          shards_dir=args.shards, onnx_path=args.onnx, onnx_fp16=args.onnx_fp16, onnx_portable=args.onnx_portable)
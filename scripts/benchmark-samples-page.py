@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the SKaiNET samples page generator.
+
+Runs stages of scripts/generate-samples-page.py against synthetic trees in a
+temporary directory, so the numbers do not depend on a Gradle build.
+
+Usage:
+    # Parallel dist copy: wall time for 1/4/16 copy workers
+    python scripts/benchmark-samples-page.py copy
+
+    # Bigger synthetic dist tree
+    python scripts/benchmark-samples-page.py copy --apps 6 --files 800 --file-size 65536
+
+    # webapp.json discovery: rglob + filter vs pruned scandir walk vs git ls-files
+    python scripts/benchmark-samples-page.py walk --projects 20 --build-files 5000
+
+    # Wrapper page -> wasm ready, with and without --preload-hints (needs built
+    # dist dirs and playwright: pip install playwright && playwright install chromium).
+    # Open: the time-to-interactive reduction of --preload-hints has not been
+    # measured yet and no baseline numbers exist. Record the medians of both
+    # variants here once this has been run against a real Gradle build.
+    python scripts/benchmark-samples-page.py tti --runs 5 --latency 150
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+
+def load_generator():
+    """Import generate-samples-page.py (not importable by name because of the dashes)."""
+    spec = importlib.util.spec_from_file_location("generate_samples_page", SCRIPT_DIR / "generate-samples-page.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def quiet():
+    """Silence the generator's progress output while timing."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def make_dist_tree(root: Path, n_apps: int, n_files: int, file_size: int) -> list:
+    """Create n_apps fake projects with n_files dist files each; returns app dicts."""
+    apps = []
+    for a in range(n_apps):
+        project_root = root / f"app{a}"
+        dist = project_root / "dist"
+        for i in range(n_files):
+            path = dist / f"dir{i % 16}" / f"file{i}.bin"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(os.urandom(file_size))
+        apps.append({
+            "id": f"app{a}",
+            "name": f"App {a}",
+            "description": "",
+            "screenshot": None,
+            "distDirs": ["dist"],
+            "sourceUrl": None,
+            "project_root": project_root,
+        })
+    return apps
+
+
+def bench_copy(args):
+    generator = load_generator()
+    with tempfile.TemporaryDirectory(prefix="samples-bench-") as tmp:
+        tmp = Path(tmp)
+        apps = make_dist_tree(tmp / "src", args.apps, args.files, args.file_size)
+        total_bytes = args.apps * args.files * args.file_size
+        print(f"[INFO] Synthetic dist tree: {args.apps} apps x {args.files} files x {args.file_size} bytes "
+              f"= {generator.format_bytes(total_bytes)}")
+
+        results = []
+        for workers in args.workers:
+            times = []
+            for _ in range(args.repeat):
+                out = tmp / "site"
+                if out.exists():
+                    shutil.rmtree(out)
+                t_start = time.perf_counter()
+                with quiet():
+                    generator.copy_dist_files(apps, out, workers=workers)
+                times.append(time.perf_counter() - t_start)
+            results.append((workers, min(times)))
+
+        print()
+        print(f"{'workers':>8} {'wall time':>10} {'throughput':>12} {'speedup':>8}")
+        baseline = results[0][1]
+        for workers, elapsed in results:
+            print(f"{workers:8d} {elapsed:9.3f}s {generator.format_bytes(total_bytes / elapsed):>10}/s "
+                  f"{baseline / elapsed:7.2f}x")
+
+
+def make_project_tree(root: Path, n_projects: int, n_build_files: int):
+    """Create n_projects Gradle-like projects whose build/ and .gradle/ trees hold many files."""
+    (root / ".gitignore").write_text("build/\n.gradle/\nkotlin-js-store/\n", encoding="utf-8")
+    for p in range(n_projects):
+        project = root / f"Demo{p}"
+        project.mkdir(parents=True)
+        (project / "webapp.json").write_text(json.dumps({"id": f"demo{p}", "name": f"Demo {p}"}), encoding="utf-8")
+        (project / "src" / "main").mkdir(parents=True)
+        (project / "src" / "main" / "Main.kt").write_text("fun main() {}\n", encoding="utf-8")
+        for i in range(n_build_files):
+            for tree in ("build/tmp", ".gradle/caches", "kotlin-js-store/node_modules/pkg"):
+                path = project / tree / f"d{i % 32}" / f"f{i}.txt"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.touch()
+
+
+def rglob_baseline(root: Path) -> list:
+    """The original discovery: rglob everything, filter afterwards."""
+    return sorted(p for p in root.rglob("webapp.json")
+                  if not any(part in p.parts for part in ["node_modules", ".git", "build"]))
+
+
+def bench_walk(args):
+    generator = load_generator()
+    with tempfile.TemporaryDirectory(prefix="samples-bench-") as tmp:
+        root = Path(tmp) / "repo"
+        root.mkdir()
+        make_project_tree(root, args.projects, args.build_files)
+        print(f"[INFO] Synthetic tree: {args.projects} projects, {3 * args.build_files} build files each")
+
+        candidates = [
+            ("rglob + filter", lambda: rglob_baseline(root)),
+            ("scandir walk", lambda: generator.scan_webapp_configs(root)),
+        ]
+        if shutil.which("git"):
+            subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+            subprocess.run(["git", "add", "-A"], cwd=root, check=True)
+            candidates.append(("git ls-files", lambda: generator.git_webapp_configs(root)))
+
+        expected = None
+        print()
+        print(f"{'method':>16} {'found':>6} {'best time':>10}")
+        for label, fn in candidates:
+            times = []
+            for _ in range(args.repeat):
+                t_start = time.perf_counter()
+                found = fn()
+                times.append(time.perf_counter() - t_start)
+            expected = expected if expected is not None else found
+            mismatch = "" if found == expected else "  (different result!)"
+            print(f"{label:>16} {len(found):6d} {min(times) * 1000:8.1f}ms{mismatch}")
+
+
+WASM_READY_JS = """(expected) => {
+  const frame = document.querySelector('iframe');
+  const win = frame && frame.contentWindow;
+  if (!win || !win.performance) return null;
+  const done = win.performance.getEntriesByType('resource').filter(e => e.name.split('?')[0].endsWith('.wasm'));
+  if (done.length < expected) return null;
+  // Absolute time of the last wasm response in the iframe, relative to the wrapper navigation start
+  return win.performance.timeOrigin + Math.max(...done.map(e => e.responseEnd)) - performance.timeOrigin;
+}"""
+
+
+def serve_directory(directory: Path, generator) -> ThreadingHTTPServer:
+    """Serve a built site like the static host would: wasm MIME type, immutable hashed files."""
+    immutable_pattern = generator.FINGERPRINTED_NAME
+
+    class Handler(SimpleHTTPRequestHandler):
+        extensions_map = {**SimpleHTTPRequestHandler.extensions_map, **generator.ASSET_MIME_TYPES}
+
+        def end_headers(self):
+            if immutable_pattern.search(self.path.split("?")[0]):
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            super().end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_tti(args):
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        print("[ERROR] playwright is required: pip install playwright && playwright install chromium")
+        sys.exit(1)
+
+    generator = load_generator()
+    with tempfile.TemporaryDirectory(prefix="samples-bench-") as tmp:
+        sites = {}
+        for label, extra in (("baseline", []), ("preload", ["--preload-hints"])):
+            out = Path(tmp) / label
+            subprocess.run(
+                [sys.executable, str(SCRIPT_DIR / "generate-samples-page.py"), "--build", "--no-cache",
+                 "--fingerprint", "--root", args.root, "--output", str(out), *extra],
+                check=True, stdout=subprocess.DEVNULL)
+            sites[label] = out
+
+        apps = args.apps or sorted(
+            d.name for d in sites["baseline"].iterdir()
+            if (d / "index.html").is_file() and any(d.rglob("*.wasm"))
+        )
+        if not apps:
+            print("[ERROR] No built app with .wasm files found, run the Gradle builds first")
+            sys.exit(1)
+
+        servers = {label: serve_directory(path, generator) for label, path in sites.items()}
+        results = {}
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch()
+            for app_id in apps:
+                expected = sum(1 for _ in (sites["baseline"] / app_id).rglob("*.wasm"))
+                for label, server in servers.items():
+                    url = f"http://127.0.0.1:{server.server_address[1]}/{app_id}/"
+                    times = []
+                    for _ in range(args.runs):
+                        # Fresh context: cold HTTP cache, no service worker
+                        context = browser.new_context(service_workers="block")
+                        page = context.new_page()
+                        cdp = context.new_cdp_session(page)
+                        cdp.send("Network.enable")
+                        cdp.send("Network.emulateNetworkConditions", {
+                            "offline": False,
+                            "latency": args.latency,
+                            "downloadThroughput": args.bandwidth * 1024 * 1024 / 8,
+                            "uploadThroughput": args.bandwidth * 1024 * 1024 / 8,
+                        })
+                        page.goto(url)
+                        handle = page.wait_for_function(WASM_READY_JS, arg=expected, timeout=args.timeout * 1000)
+                        times.append(handle.json_value())
+                        context.close()
+                    results[(app_id, label)] = statistics.median(times)
+            browser.close()
+        for server in servers.values():
+            server.shutdown()
+
+    print()
+    print(f"[INFO] latency {args.latency} ms, {args.bandwidth} Mbit/s, median of {args.runs} cold loads")
+    print(f"{'app':>20} {'baseline':>10} {'preload':>10} {'change':>8}")
+    for app_id in apps:
+        baseline, preload = results[(app_id, "baseline")], results[(app_id, "preload")]
+        print(f"{app_id:>20} {baseline:8.0f}ms {preload:8.0f}ms {(preload - baseline) / baseline * 100:7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stages of the samples page generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    copy_parser = sub.add_parser("copy", help="Parallel dist copy on a synthetic dist tree")
+    copy_parser.add_argument("--apps", type=int, default=3, help="Number of synthetic apps (default: 3)")
+    copy_parser.add_argument("--files", type=int, default=400, help="Files per app (default: 400)")
+    copy_parser.add_argument("--file-size", type=int, default=32768, help="Bytes per file (default: 32768)")
+    copy_parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Worker counts to time")
+    copy_parser.add_argument("--repeat", type=int, default=3, help="Runs per worker count, best is reported")
+    copy_parser.set_defaults(func=bench_copy)
+
+    walk_parser = sub.add_parser("walk", help="webapp.json discovery on a synthetic Gradle project tree")
+    walk_parser.add_argument("--projects", type=int, default=10, help="Number of projects (default: 10)")
+    walk_parser.add_argument("--build-files", type=int, default=2000,
+                             help="Files in each of build/, .gradle/, kotlin-js-store/ per project (default: 2000)")
+    walk_parser.add_argument("--repeat", type=int, default=3, help="Runs per method, best is reported")
+    walk_parser.set_defaults(func=bench_walk)
+
+    tti_parser = sub.add_parser("tti", help="Time to wasm-ready of the app pages, with and without preload hints")
+    tti_parser.add_argument("--root", type=str, default=str(SCRIPT_DIR.parent),
+                            help="Repository with built dist dirs (default: this repository)")
+    tti_parser.add_argument("--apps", nargs="+", default=None, help="App ids to measure (default: all built apps)")
+    tti_parser.add_argument("--runs", type=int, default=5, help="Cold page loads per variant, median is reported")
+    tti_parser.add_argument("--latency", type=float, default=100, help="Emulated round trip latency in ms")
+    tti_parser.add_argument("--bandwidth", type=float, default=50, help="Emulated bandwidth in Mbit/s")
+    tti_parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for the wasm per load")
+    tti_parser.set_defaults(func=bench_tti)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
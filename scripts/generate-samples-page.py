@@ -4,6 +4,9 @@ SKaiNET Samples Page Generator
 
 Generates a beautifully styled HTML landing page for SKaiNET sample applications.
 Scans webapp.json files and creates a static HTML page with embedded CSS and JS.
+The markup comes from templates/samples-page.html, templates/app-wrapper.html
+and the fragments in templates/partials/ ({{ name }} is replaced by an escaped
+value, {{ name|raw }} by markup).
 
 Usage:
     # Local generation (preview only - no file copying)
@@ -15,19 +18,179 @@ Usage:
     # Custom output directory
     python scripts/generate-samples-page.py --build --output ./dist
 
+    # Incremental build (only copies changed dist files, removes deleted ones)
+    python scripts/generate-samples-page.py --build --incremental
+
+    # Local preview / CI staging without real copies of the bundles
+    python scripts/generate-samples-page.py --build --link-mode reflink
+
+    # Store bundle files shared by several demos (skiko.wasm, ...) only once
+    python scripts/generate-samples-page.py --build --dedup link
+
+    # Local dev server with live reload; rebuilds the app whose dist changed
+    python scripts/generate-samples-page.py --watch --port 8000
+
+    # Run the webapp.json build commands (4 at a time), then sync the output incrementally
+    python scripts/generate-samples-page.py --run-builds --build-jobs 4
+
+    # Size report per app and file, webapp.json "budget" checks, history in site-size-history.jsonl
+    python scripts/generate-samples-page.py --build --compress --size-report
+
+    # One site per release tag (site/v1.0/, site/v1.1/, ...) from git worktrees, identical files shared
+    python scripts/generate-samples-page.py --refs v1.0 v1.1 v1.2 --incremental
+
+    # Every later --build with unchanged inputs and output finishes immediately ("up to date");
+    # force a full rebuild with --no-cache
+    python scripts/generate-samples-page.py --build --no-cache
+
+    # Responsive AVIF/WebP card screenshots (requires Pillow)
+    python scripts/generate-samples-page.py --build --responsive-images
+
+    # Project cards rendered into the HTML (no client-side rendering)
+    python scripts/generate-samples-page.py --build --prerender
+
+    # No third-party requests: vendored, subsetted fonts from templates/fonts + critical CSS inline
+    python scripts/generate-samples-page.py --build --self-host-fonts --critical-css
+
+    # Content-hashed asset names + immutable cache headers (_headers)
+    python scripts/generate-samples-page.py --build --fingerprint
+
+    # Wrapper pages start fetching wasm/modules/models right away (+ MIME types in _headers)
+    python scripts/generate-samples-page.py --build --fingerprint --preload-hints
+
+    # Offline-capable demos: sw.js + precache manifest per app, versioned by GITHUB_REF_NAME
+    python scripts/generate-samples-page.py --build --fingerprint --service-worker
+
+    # Minified landing and wrapper pages (inline CSS/JS and project data included)
+    python scripts/generate-samples-page.py --build --minify
+
+    # Byte-identical output for the same commit (dates from SOURCE_DATE_EPOCH or the commit time,
+    # normalized mtimes) plus _manifest.json (path -> sha256) for uploading only changed files
+    python scripts/generate-samples-page.py --build --reproducible
+
+    # Precompressed .gz/.br sidecars for hosts that serve them
+    python scripts/generate-samples-page.py --build --compress
+
 Environment variables:
     GITHUB_REF_NAME - Release tag name (optional, for display)
+    SOURCE_DATE_EPOCH - Build date (optional, for the copyright year; set from git by --reproducible)
 """
 
+import hashlib
 import json
 import os
 import re
 import shutil
 import html
 import argparse
+import fnmatch
+import gzip
+import importlib.util
+import io
+import string
 import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip sidecars without it
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional: screenshots are copied as-is without it
+    Image = None
+
+DEFAULT_COPY_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+DEFAULT_BUILD_JOBS = min(4, os.cpu_count() or 1)
+WEBAPP_CONFIG_NAME = "webapp.json"
+# Never descended into when scanning for webapp.json (Gradle/Kotlin/Node output and tooling)
+IGNORED_DIR_NAMES = {"node_modules", ".git", "build", ".gradle", ".kotlin", "kotlin-js-store", ".idea"}
+# Left out of build input fingerprints; kotlin-js-store holds the yarn.lock, which is a build input
+BUILD_OUTPUT_DIR_NAMES = IGNORED_DIR_NAMES - {"kotlin-js-store"}
+LINK_MODES = ["copy", "hardlink", "reflink", "symlink"]
+FICLONE = 0x40049409  # Linux ioctl: share file extents (btrfs, XFS, bcachefs, ...)
+SHARED_DIR_NAME = "_shared"
+CAS_DIR_NAME = "cas"  # below the --refs work directory
+# Options a --refs run handles itself instead of passing them to the per-ref builds (None: one or more values)
+BATCH_OPTIONS = {"--refs": None, "--refs-dir": 1, "--refs-jobs": 1, "--root": 1, "-r": 1, "--output": 1, "-o": 1,
+                 "--size-history": 1, "--build-cache": 1}
+TEXT_ASSET_SUFFIXES = {".html", ".htm", ".js", ".mjs", ".css", ".json"}
+COMPRESSIBLE_SUFFIXES = {".wasm", ".js", ".mjs", ".html", ".htm", ".css", ".json", ".svg", ".txt", ".map"}
+SIDECAR_SUFFIXES = (".gz", ".br")
+MIN_COMPRESS_SIZE = 256
+HEADERS_FILE_NAME = "_headers"
+SITE_MANIFEST_NAME = "_manifest.json"
+SITE_MANIFEST_VERSION = 1
+BUILD_CACHE_SUFFIX = "-build-cache.json"  # <output>-build-cache.json, next to (not inside) the deployed output
+LEGACY_BUILD_CACHE_NAME = ".samples-build-cache.json"  # older location inside the output
+STAGING_SUFFIX = "-staging"  # --incremental sync target when the output is renamed/rewritten, next to the cache
+BUILD_CACHE_VERSION = 1
+FONTS_DIR_NAME = "fonts"  # below assets/ in the output, templates/ in the repo
+CSS_DIR_NAME = "css"  # below assets/ in the output
+GOOGLE_FONTS_LINK = re.compile(
+    r'\s*<link[^>]+href="https://fonts\.(?:googleapis|gstatic)\.com[^"]*"[^>]*>', re.IGNORECASE)
+FONT_WEIGHT_NAMES = {
+    "thin": 100, "extralight": 200, "light": 300, "regular": 400, "medium": 500,
+    "semibold": 600, "bold": 700, "extrabold": 800, "black": 900,
+}
+FONT_FORMATS = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}
+FONT_MIME_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf", ".otf": "font/otf"}
+ASSET_MIME_TYPES = {".wasm": "application/wasm", ".mjs": "text/javascript", ".gguf": "application/octet-stream"}
+PRELOAD_FETCH_SUFFIXES = (".wasm", ".gguf")
+MINIFY_TOKEN = re.compile(
+    r"(?P<comment><!--.*?-->)"
+    r"|(?P<raw>(?P<raw_open><(?P<raw_name>pre|textarea|template|script|style)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)"
+    r"(?P<raw_body>.*?)(?P<raw_close></(?P=raw_name)\s*>))"
+    r"|(?P<tag><(?P<tag_name>[a-zA-Z!/][^\s>/]*)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>)"
+    r"|(?P<text>[^<]+|<)",
+    re.DOTALL | re.IGNORECASE,
+)
+# Whitespace next to these tags does not render (block boxes, metadata, SVG shapes)
+MINIFY_BLOCK_TAGS = {
+    "!doctype", "!comment", "html", "head", "body", "meta", "link", "title", "style", "script", "noscript", "base",
+    "div", "header", "footer", "main", "section", "nav", "article", "aside", "ul", "ol", "li", "p", "br", "hr",
+    "h1", "h2", "h3", "h4", "h5", "h6", "table", "thead", "tbody", "tr", "td", "th", "template", "iframe", "source",
+    "path", "circle", "rect", "line", "polyline", "polygon", "g",
+}
+JS_SCRIPT_TYPES = {"text/javascript", "application/javascript", "module"}
+JSON_SCRIPT_TYPES = {"application/json", "application/ld+json", "importmap"}
+JS_PUNCTUATION = set("{}()[];,:=<>&|?!")
+JS_REGEX_PRECEDING = "(,=:[!&|?{};+-*%<>~^"  # a "/" after these starts a regex literal, else it divides
+JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield"}
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+TEMPLATE_PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_]\w*)(\|raw)?\s*\}\}")
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+BUDGET_METRICS = ("raw", "gzip", "brotli", "files")
+SERVICE_WORKER_NAME = "sw.js"
+PRECACHE_EXCLUDE_SUFFIXES = (".gz", ".br", ".map")
+SERVICE_WORKER_REGISTRATION = (
+    "<script>if ('serviceWorker' in navigator) { window.addEventListener('load', "
+    "() => navigator.serviceWorker.register('" + SERVICE_WORKER_NAME + "')); }</script>"
+)
+IMAGES_DIR_NAME = "_img"
+SCREENSHOT_WIDTHS = [320, 640, 960]
+# Rendered card width per breakpoint of .cards-grid
+SCREENSHOT_SIZES = "(min-width: 1200px) 384px, (min-width: 640px) 360px, min(100vw, 500px)"
+EAGER_SCREENSHOTS = 3  # first row of cards: likely the LCP element, never lazy-loaded
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    b'<script>new EventSource("' + LIVE_RELOAD_PATH.encode("ascii") + b'")'
+    b'.onmessage = () => location.reload();</script>'
+)
+FINGERPRINT_LENGTH = 8
+FINGERPRINTED_NAME = re.compile(r"\.[0-9a-f]{8,}\.[^.]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HTML_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+_compiled_templates = {}  # template path -> ((mtime_ns, size), render function)
 
 
 def get_git_repo_url(root_dir: Path) -> str | None:
@@ -97,18 +260,621 @@ def get_git_default_branch(root_dir: Path) -> str:
     return "main"  # Default fallback
 
 
-def find_webapp_configs(root_dir: Path, repo_url: str | None = None, branch: str = "main") -> list:
-    """Find all webapp.json files and parse them."""
-    apps = []
+def git_commit_epoch(root_dir: Path) -> int | None:
+    """Commit time (seconds since the epoch) of HEAD, the usual SOURCE_DATE_EPOCH of a checkout."""
+    try:
+        result = subprocess.run(["git", "log", "-1", "--format=%ct"], cwd=root_dir, capture_output=True,
+                                text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    value = result.stdout.strip()
+    return int(value) if result.returncode == 0 and value.isdigit() else None
+
+
+def build_date() -> datetime:
+    """Date shown in the pages: SOURCE_DATE_EPOCH if set (reproducible builds), else now."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH", "")
+    if epoch.isdigit():
+        return datetime.fromtimestamp(int(epoch), tz=timezone.utc)
+    return datetime.now()
+
+
+def find_git_dir(root_dir: Path) -> Path | None:
+    """The .git directory of the work tree containing root_dir (None for worktrees/submodules)."""
+    for directory in [root_dir, *root_dir.parents]:
+        git_dir = directory / ".git"
+        if git_dir.is_dir():
+            return git_dir
+        if git_dir.exists():
+            return None
+    return None
+
+
+def git_state_key(root_dir: Path) -> str | None:
+    """Changes whenever HEAD, the config (remotes) or the remote refs change."""
+    git_dir = find_git_dir(root_dir)
+    if git_dir is None:
+        return None
+    parts = [str(git_dir)]
+    for name in ("HEAD", "config", "packed-refs", "refs/remotes/origin/HEAD"):
+        try:
+            st = (git_dir / name).stat()
+            parts.append(f"{name}:{st.st_size}:{st.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:-")
+    return "|".join(parts)
+
+
+def cached_git_info(root_dir: Path, cache: dict, branch: str | None = None) -> tuple:
+    """(repo_url, branch), from the build cache while the git state key is unchanged."""
+    key = git_state_key(root_dir)
+    entry = cache.get("git")
+    if key is not None and entry and entry.get("key") == key and (branch is None or entry.get("branch") == branch):
+        return entry.get("repo_url"), entry.get("branch")
+    repo_url = get_git_repo_url(root_dir)
+    branch = branch or get_git_default_branch(root_dir)
+    if key is not None:
+        cache["git"] = {"key": key, "repo_url": repo_url, "branch": branch}
+    return repo_url, branch
+
+
+def default_build_cache_path(output_dir: Path) -> Path:
+    return output_dir.with_name(output_dir.name + BUILD_CACHE_SUFFIX)
+
+
+def generated_dirs(args) -> list:
+    """The output directory and the --refs work directory: never scanned for webapp.json."""
+    output_dir = Path(args.output).resolve()
+    refs_dir = Path(args.refs_dir).resolve() if args.refs_dir else output_dir.with_name(f"{output_dir.name}-refs")
+    return [output_dir, refs_dir]
+
+
+def load_build_cache(cache_path: Path) -> dict:
+    """Read the build state of the previous run (empty if missing or from another version)."""
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get("version") == BUILD_CACHE_VERSION else {}
+
+
+def save_build_cache(cache_path: Path, cache: dict):
+    cache["version"] = BUILD_CACHE_VERSION
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    replace_file_text(cache_path, json.dumps(cache, indent=2, sort_keys=True) + "\n")
+
+
+def stat_fingerprint(files: dict) -> str:
+    """Hash of (relative path, size, mtime) for a {rel: path} mapping; no file contents are read."""
+    h = hashlib.sha256()
+    for rel in sorted(files):
+        try:
+            st = os.stat(files[rel])
+            h.update(f"{rel}|{st.st_size}|{st.st_mtime_ns}\n".encode("utf-8"))
+        except OSError:
+            h.update(f"{rel}|missing\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+def tree_fingerprint(directory: Path) -> str:
+    """stat_fingerprint of every file below directory."""
+    files = {}
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, directory).replace(os.sep, "/")] = path
+    return stat_fingerprint(files)
+
+
+def dist_fingerprint(app: dict) -> str:
+    """stat_fingerprint of an app's dist files and screenshot."""
+    files = plan_app_files(app, verbose=False)
+    if app["screenshot"]:
+        files["<screenshot>"] = app["project_root"] / app["screenshot"]
+    return stat_fingerprint(files)
+
+
+def templates_fingerprint(root_dir: Path) -> str:
+    templates_dir = root_dir / "templates"
+    if not templates_dir.is_dir():
+        return stat_fingerprint({})
+    return stat_fingerprint({p.relative_to(templates_dir).as_posix(): p
+                             for p in templates_dir.rglob("*") if p.is_file()})
+
+
+def build_inputs_hash(apps: list, root_dir: Path, repo_url: str | None, branch: str, release_tag: str,
+                      options: dict) -> str:
+    """Hash of everything the build output depends on.
+
+    App metadata, git info, release tag, build options, the stat fingerprint
+    of each app's dist files and screenshot, templates/, the page templates and this script.
+    """
+    dist = {app["id"]: dist_fingerprint(app) for app in apps}
+    state = {
+        "apps": [{k: str(v) if isinstance(v, Path) else v for k, v in app.items()} for app in apps],
+        "repo_url": repo_url,
+        "branch": branch,
+        "release_tag": release_tag,
+        "options": options,
+        "dist": dist,
+        "templates": templates_fingerprint(root_dir),
+        "page_templates": templates_fingerprint(TEMPLATES_DIR.parent),
+        "generator": file_digest(Path(__file__)),
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_input_fingerprint(app: dict) -> str:
+    """stat fingerprint of a project's sources (build outputs and tooling dirs excluded) and its build command."""
+    project_root = app["project_root"]
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        dirnames[:] = sorted(d for d in dirnames if d not in BUILD_OUTPUT_DIR_NAMES)
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            files[os.path.relpath(path, project_root).replace(os.sep, "/")] = path
+    command = (app.get("build") or {}).get("command", "")
+    return hashlib.sha256((stat_fingerprint(files) + command).encode("utf-8")).hexdigest()
+
+
+def run_prefixed(command, cwd: Path, prefix: str, print_lock: threading.Lock, env: dict | None = None) -> int:
+    """Run a command (a shell string or an argv list), streaming its output prefixed; returns the exit code."""
+    with print_lock:
+        print(f"{prefix} $ {command if isinstance(command, str) else subprocess.list2cmdline(command)}")
+    process = subprocess.Popen(command, shell=isinstance(command, str), cwd=cwd, env=env, stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT, text=True, errors="replace", bufsize=1)
+    for line in process.stdout:
+        with print_lock:
+            print(f"{prefix} {line.rstrip()}", flush=True)
+    return process.wait()
+
+
+def run_app_build(app: dict, print_lock: threading.Lock) -> tuple:
+    """Run the app's build.command in its project root, streaming output prefixed with the app id.
+
+    Returns (exit code, seconds).
+    """
+    t_start = time.perf_counter()
+    returncode = run_prefixed(app["build"]["command"], app["project_root"], f"[{app['id']}]", print_lock)
+    return returncode, time.perf_counter() - t_start
+
+
+def run_app_builds(apps: list, state: dict, jobs: int = DEFAULT_BUILD_JOBS, force: bool = False) -> list:
+    """Run the webapp.json build commands of all apps concurrently (at most `jobs` at a time).
+
+    Apps whose source fingerprint (see build_input_fingerprint) matches the
+    one recorded in state after their last successful build, and whose
+    distDirs exist, are skipped. Returns the ids of failed builds.
+    """
+    pending = []
+    for app in apps:
+        if not (app.get("build") or {}).get("command"):
+            print(f"[INFO] {app['id']}: no build.command in webapp.json, skipped")
+            continue
+        fingerprint = build_input_fingerprint(app)
+        dist_exists = all((app["project_root"] / d).exists() for d in app["distDirs"])
+        if not force and dist_exists and state.get(app["id"]) == fingerprint:
+            print(f"[OK] {app['id']}: build is up to date")
+            continue
+        pending.append((app, fingerprint))
+
+    if not pending:
+        return []
+    print(f"[INFO] Building {len(pending)} apps with {jobs} parallel jobs")
+    print_lock = threading.Lock()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(run_app_build, app, print_lock): (app, fingerprint) for app, fingerprint in pending}
+        for future in as_completed(futures):
+            app, fingerprint = futures[future]
+            try:
+                returncode, elapsed = future.result()
+            except OSError as e:
+                returncode, elapsed = None, 0.0
+                print(f"[ERROR] {app['id']}: cannot start build: {e}")
+            results[app["id"]] = (returncode, elapsed)
+            if returncode == 0:
+                state[app["id"]] = fingerprint
+            else:
+                state.pop(app["id"], None)
+
+    failed = []
+    for app_id, (returncode, elapsed) in sorted(results.items()):
+        if returncode == 0:
+            print(f"[OK] Build {app_id}: {elapsed:.1f}s")
+        else:
+            failed.append(app_id)
+            print(f"[ERROR] Build {app_id} failed (exit code {returncode}) after {elapsed:.1f}s")
+    return failed
+
+
+def strip_cli_options(argv: list, options: dict) -> list:
+    """argv without the given options and their values ({option: value count, None = one or more})."""
+    out = []
+    i = 0
+    while i < len(argv):
+        option = argv[i].split("=", 1)[0]
+        if option not in options:
+            out.append(argv[i])
+            i += 1
+            continue
+        count = options[option]
+        i += 1
+        if "=" in argv[i - 1]:
+            continue
+        if count is None:
+            while i < len(argv) and not argv[i].startswith("-"):
+                i += 1
+        else:
+            i += count
+    return out
+
+
+def resolve_ref(root_dir: Path, ref: str) -> str | None:
+    """Commit hash of a git ref (tag, branch, sha) in the repository at root_dir."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"],
+                                cwd=root_dir, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def ref_webapp_configs(root_dir: Path, commit: str, exclude: list | None = None) -> list:
+    """webapp.json paths (relative to root_dir) in the tree of a commit, read from git without a checkout."""
+    result = subprocess.run(["git", "ls-tree", "-r", "--name-only", "--full-tree", commit],
+                            cwd=root_dir, capture_output=True, text=True, timeout=30)
+    toplevel = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=root_dir,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    prefix = root_dir.resolve().relative_to(Path(toplevel).resolve()).as_posix()
+    prefix = "" if prefix == "." else prefix + "/"
+    configs = []
+    for line in result.stdout.splitlines():
+        if not line.startswith(prefix) or Path(line).name != WEBAPP_CONFIG_NAME:
+            continue
+        rel = line[len(prefix):]
+        if not is_excluded(rel, exclude or []) and not any(part in IGNORED_DIR_NAMES for part in rel.split("/")):
+            configs.append(rel)
+    return sorted(configs)
+
+
+def unbuilt_apps(ref_root: Path, configs: list) -> list:
+    """Project dirs (of the webapp.json paths in configs) where none of the distDirs exists."""
+    unbuilt = []
+    for rel in configs:
+        webapp_json = ref_root / rel
+        try:
+            dist_dirs = load_webapp_meta(webapp_json).get("distDirs", [])
+        except (OSError, ValueError):
+            continue
+        if not any((webapp_json.parent / dist_dir).is_dir() for dist_dir in dist_dirs):
+            unbuilt.append(Path(rel).parent.as_posix())
+    return unbuilt
+
+
+def prepare_ref_worktree(root_dir: Path, commit: str, worktree: Path) -> Path:
+    """Check out commit in a detached git worktree (reused between runs); returns root_dir inside it.
+
+    An existing worktree is moved to the commit with a checkout, which only
+    touches files that differ, so build caches keyed on mtimes stay valid.
+    """
+    toplevel = Path(subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=root_dir,
+                                   capture_output=True, text=True, timeout=10).stdout.strip())
+    subprocess.run(["git", "worktree", "prune"], cwd=root_dir, capture_output=True, timeout=30)
+    if (worktree / ".git").exists():
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=worktree, capture_output=True, text=True,
+                              timeout=10).stdout.strip()
+        if head != commit:
+            subprocess.run(["git", "checkout", "--quiet", "--detach", "--force", commit], cwd=worktree,
+                           check=True, capture_output=True, timeout=300)
+    else:
+        worktree.parent.mkdir(parents=True, exist_ok=True)
+        subprocess.run(["git", "worktree", "add", "--quiet", "--detach", "--force", str(worktree), commit],
+                       cwd=root_dir, check=True, capture_output=True, timeout=300)
+    return worktree / root_dir.resolve().relative_to(toplevel.resolve())
+
+
+def share_site_files(sites: list, store_dir: Path, workers: int = DEFAULT_COPY_WORKERS) -> dict:
+    """Hardlink identical files of several site directories to one copy in a content-addressed store.
+
+    The store holds each content once as <store>/<sha256[:2]>/<sha256>; an
+    index of (inode, size, mtime) -> sha256 lets files that are already
+    linked skip hashing on the next run. Store entries no site links to any
+    more are removed. Returns {"files", "linked", "bytes_saved"}.
+    """
+    index_path = store_dir / "index.json"
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    files = []
+    for site in sites:
+        for dirpath, _, filenames in os.walk(site):
+            files.extend(Path(dirpath) / name for name in filenames)
+    stats = {path: path.stat() for path in files}
+    keys = {path: f"{st.st_ino}|{st.st_size}|{st.st_mtime_ns}" for path, st in stats.items()}
+    digests = {path: index[keys[path]] for path in files if keys[path] in index}
+    digests.update(hash_files([path for path in files if path not in digests], workers))
+
+    result = {"files": len(files), "linked": 0, "bytes_saved": 0}
+    new_index = {}
+    for path in files:
+        digest = digests[path]
+        stored = store_dir / digest[:2] / digest
+        if not stored.exists():
+            stored.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, stored)
+            except OSError as e:
+                print(f"[WARN] Cannot link into {store_dir} ({e}); versions are not shared")
+                return result
+        elif not os.path.samestat(stats[path], stored.stat()):
+            tmp_path = path.with_name(f".{path.name}.cas.tmp")
+            os.link(stored, tmp_path)
+            os.replace(tmp_path, path)
+            result["linked"] += 1
+            result["bytes_saved"] += stats[path].st_size
+        st = stored.stat()
+        new_index[f"{st.st_ino}|{st.st_size}|{st.st_mtime_ns}"] = digest
+
+    for stored in store_dir.glob("??/*"):
+        if stored.is_file() and stored.stat().st_nlink == 1:
+            stored.unlink()
+    replace_file_text(index_path, json.dumps(new_index, sort_keys=True) + "\n")
+    return result
+
+
+def build_refs(root_dir: Path, output_dir: Path, refs: list, refs_dir: Path, argv: list,
+               jobs: int = DEFAULT_BUILD_JOBS, exclude: list | None = None) -> list:
+    """Generate <output>/<ref>/ for every git ref, `jobs` refs at a time; returns the refs that failed.
+
+    Each ref is checked out in a worktree below refs_dir/worktrees and built
+    by a separate run of this script with the remaining command line options,
+    --run-builds (dist dirs are build outputs, a fresh worktree has none) and
+    GITHUB_REF_NAME=<ref>. A ref fails if an app still has no dist dir after
+    its build. Each site keeps its own build cache, so refs whose tree did
+    not change finish as "up to date". Identical files of all versions are
+    then shared through the store in refs_dir/cas.
+    """
+    planned = []
+    failed = []
+    for ref in refs:
+        commit = resolve_ref(root_dir, ref)
+        if commit is None:
+            print(f"[ERROR] {ref}: not a git ref")
+            failed.append(ref)
+            continue
+        configs = ref_webapp_configs(root_dir, commit, exclude)
+        if not configs:
+            print(f"[WARN] {ref} ({commit[:10]}): no {WEBAPP_CONFIG_NAME} in the tree, skipped")
+            continue
+        print(f"[OK] {ref} ({commit[:10]}): {len(configs)} apps ({', '.join(str(Path(c).parent) for c in configs)})")
+        name = re.sub(r"[^\w.-]", "-", ref)
+        try:
+            ref_root = prepare_ref_worktree(root_dir, commit, refs_dir / "worktrees" / name)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"[ERROR] {ref}: cannot check out a worktree: {e}")
+            failed.append(ref)
+            continue
+        planned.append((ref, name, ref_root, configs))
+
+    child_argv = strip_cli_options(argv, BATCH_OPTIONS)
+    print_lock = threading.Lock()
+
+    def build(ref: str, name: str, ref_root: Path, configs: list) -> tuple:
+        command = [sys.executable, str(Path(__file__).resolve()), *child_argv, "--build",
+                   "--root", str(ref_root), "--output", str(output_dir / name)]
+        if "--run-builds" not in child_argv:
+            command.append("--run-builds")
+        if "--branch" not in child_argv and "-b" not in child_argv:
+            command += ["--branch", ref]  # source links point at the version's tree
+        # Keep the per-version state out of the deployed tree
+        command += ["--build-cache", str(refs_dir / f"{name}{BUILD_CACHE_SUFFIX}")]
+        if "--size-report" in child_argv:
+            command += ["--size-history", str(refs_dir / f"{name}-size-history.jsonl")]
+        env = dict(os.environ, GITHUB_REF_NAME=ref)
+        t_start = time.perf_counter()
+        returncode = run_prefixed(command, ref_root, f"[{ref}]", print_lock, env=env)
+        return returncode, time.perf_counter() - t_start, unbuilt_apps(ref_root, configs)
+
+    built = []
+    print(f"[INFO] Generating {len(planned)} sites with {jobs} parallel jobs")
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(build, *item): item for item in planned}
+        for future in as_completed(futures):
+            ref, name, _, _ = futures[future]
+            try:
+                returncode, elapsed, unbuilt = future.result()
+            except OSError as e:
+                returncode, elapsed, unbuilt = None, 0.0, []
+                print(f"[ERROR] {ref}: cannot start the build: {e}")
+            with print_lock:
+                if returncode == 0 and unbuilt:
+                    print(f"[ERROR] {ref}: no built dist dir for {', '.join(unbuilt)} "
+                          f"(missing or failing build.command in {WEBAPP_CONFIG_NAME})")
+                    failed.append(ref)
+                elif returncode == 0:
+                    print(f"[OK] {ref} -> {output_dir / name} ({elapsed:.1f}s)")
+                    built.append(output_dir / name)
+                else:
+                    print(f"[ERROR] {ref} failed (exit code {returncode}) after {elapsed:.1f}s")
+                    failed.append(ref)
+
+    if built:
+        shared = share_site_files(sorted(built), refs_dir / CAS_DIR_NAME)
+        # Linking changed inodes and mtimes, not content: keep each site's "up to date" check valid
+        for site in built:
+            cache_path = refs_dir / f"{site.name}{BUILD_CACHE_SUFFIX}"
+            cache = load_build_cache(cache_path)
+            if "output_fingerprint" in cache:
+                cache["output_fingerprint"] = tree_fingerprint(site)
+                save_build_cache(cache_path, cache)
+        print(f"[OK] Shared {shared['linked']} of {shared['files']} files across {len(built)} versions "
+              f"({format_bytes(shared['bytes_saved'])} saved) via {refs_dir / CAS_DIR_NAME}")
+    return failed
+
+
+def load_gitignore(directory: Path, base: str) -> list:
+    """Parse directory/.gitignore into rules (base, pattern, negate, dir_only, anchored).
+
+    base is the posix path of directory relative to the scan root ("" for the root).
+    """
+    rules = []
+    try:
+        with open(directory / ".gitignore", "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return rules
+    for line in lines:
+        line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith("/")
+        line = line.strip("/") if dir_only else line
+        anchored = "/" in line
+        rules.append((base, line.lstrip("/"), negate, dir_only, anchored))
+    return rules
+
+
+def is_ignored(rel: str, is_dir: bool, rules: list) -> bool:
+    """Apply .gitignore rules to a root-relative posix path; the last matching rule wins."""
+    ignored = False
+    name = rel.rsplit("/", 1)[-1]
+    for base, pattern, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        if base:
+            if not rel.startswith(base + "/"):
+                continue
+            local = rel[len(base) + 1:]
+        else:
+            local = rel
+        if fnmatch.fnmatchcase(local if anchored else name, pattern.replace("**/", "*")):
+            ignored = not negate
+    return ignored
+
+
+def is_excluded(rel: str, exclude: list) -> bool:
+    """True if a root-relative posix path (or its file name) matches one of the exclude globs."""
+    name = rel.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatchcase(rel, glob) or fnmatch.fnmatchcase(name, glob) for glob in exclude)
+
+
+def scan_webapp_configs(root_dir: Path, exclude: list | None = None, max_depth: int | None = None,
+                        skip_dirs: list | None = None) -> list:
+    """Walk root_dir with os.scandir, pruning ignored directories before descending.
+
+    Skips IGNORED_DIR_NAMES, anything matched by a .gitignore on the way down,
+    the exclude globs, skip_dirs and nested checkouts (directories with a .git
+    file or directory, such as the --refs worktrees). max_depth limits how
+    many directory levels below root_dir are searched (0: only root_dir itself).
+    """
+    exclude = exclude or []
+    skip = {Path(d).resolve() for d in skip_dirs or []}
+    found = []
+    stack = [(root_dir, "", 0, load_gitignore(root_dir, ""))]
+    while stack:
+        directory, base, depth, rules = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{base}/{entry.name}" if base else entry.name
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if entry.name in IGNORED_DIR_NAMES or (max_depth is not None and depth >= max_depth):
+                    continue
+                if is_ignored(rel, True, rules) or is_excluded(rel, exclude):
+                    continue
+                sub_dir = Path(entry.path)
+                if sub_dir.resolve() in skip or (sub_dir / ".git").exists():
+                    continue
+                stack.append((sub_dir, rel, depth + 1, rules + load_gitignore(sub_dir, rel)))
+            elif entry.name == WEBAPP_CONFIG_NAME and not is_ignored(rel, False, rules) \
+                    and not is_excluded(rel, exclude):
+                found.append(Path(entry.path))
+    return sorted(found)
+
+
+def git_webapp_configs(root_dir: Path, exclude: list | None = None, max_depth: int | None = None,
+                       skip_dirs: list | None = None) -> list | None:
+    """List webapp.json files known to git (tracked or untracked, not ignored), outside skip_dirs.
+
+    Returns None if root_dir is not inside a git work tree.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", f"*{WEBAPP_CONFIG_NAME}"],
+            cwd=root_dir,
+            capture_output=True,
+            check=True
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
 
-    for webapp_json in root_dir.rglob("webapp.json"):
-        # Skip node_modules and other common directories
-        if any(part in webapp_json.parts for part in ["node_modules", ".git", "build"]):
+    exclude = exclude or []
+    skip = [Path(d).resolve() for d in skip_dirs or []]
+    found = set()
+    for rel in result.stdout.decode("utf-8").split("\0"):
+        parts = rel.split("/")
+        if parts[-1] != WEBAPP_CONFIG_NAME or any(part in IGNORED_DIR_NAMES for part in parts[:-1]):
             continue
+        if max_depth is not None and len(parts) - 1 > max_depth:
+            continue
+        if is_excluded(rel, exclude) or any(is_excluded("/".join(parts[:i]), exclude) for i in range(1, len(parts))):
+            continue
+        path = root_dir / rel
+        if any(path.resolve().is_relative_to(d) for d in skip):
+            continue
+        # Deleted from the work tree but still in the index
+        if path.is_file():
+            found.add(path)
+    return sorted(found)
+
+
+def load_webapp_meta(webapp_json: Path, meta_cache: dict | None = None) -> dict:
+    """Parse a webapp.json, reusing meta_cache[path] while its size and mtime are unchanged."""
+    st = webapp_json.stat()
+    stamp = [st.st_size, st.st_mtime_ns]
+    key = str(webapp_json)
+    if meta_cache is not None and key in meta_cache and meta_cache[key]["stamp"] == stamp:
+        return meta_cache[key]["meta"]
+    with open(webapp_json, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta_cache is not None:
+        meta_cache[key] = {"stamp": stamp, "meta": meta}
+    return meta
+
+
+def find_webapp_configs(root_dir: Path, repo_url: str | None = None, branch: str = "main",
+                        exclude: list | None = None, max_depth: int | None = None, use_git: bool = True,
+                        meta_cache: dict | None = None, skip_dirs: list | None = None) -> list:
+    """Find all webapp.json files and parse them.
+
+    Inside a git work tree the file list comes from `git ls-files`; otherwise
+    (or with use_git=False) from a pruned os.scandir walk. Directories in
+    skip_dirs (the generated output) are never searched. Parsed files are
+    reused from meta_cache (see load_webapp_meta) when given.
+    """
+    apps = []
+
+    webapp_files = git_webapp_configs(root_dir, exclude, max_depth, skip_dirs) if use_git else None
+    if webapp_files is None:
+        webapp_files = scan_webapp_configs(root_dir, exclude, max_depth, skip_dirs)
 
+    for webapp_json in webapp_files:
         try:
-            with open(webapp_json, "r", encoding="utf-8") as f:
-                meta = json.load(f)
+            meta = load_webapp_meta(webapp_json, meta_cache)
 
             app_id = meta.get("id")
             if not app_id:
@@ -133,6 +899,8 @@ def find_webapp_configs(root_dir: Path, repo_url: str | None = None, branch: str
                 "description": meta.get("description", ""),
                 "screenshot": meta.get("screenshot"),
                 "distDirs": meta.get("distDirs", []),
+                "build": meta.get("build"),
+                "budget": meta.get("budget"),
                 "sourceUrl": source_url,
                 "project_root": project_root
             })
@@ -144,45 +912,277 @@ def find_webapp_configs(root_dir: Path, repo_url: str | None = None, branch: str
     return sorted(apps, key=lambda a: a["id"])
 
 
-def copy_dist_files(apps: list, output_dir: Path):
-    """Copy distribution files for each app."""
+def file_digest(path: Path) -> str:
+    """sha256 of a file, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def plan_app_files(app: dict, verbose: bool = True) -> dict:
+    """Map each output path (relative to the app dir) to its source file.
+
+    Later distDirs win over earlier ones, like copying them one after another.
+    """
+    project_root = app["project_root"]
+    files = {}
+    for rel_path in app["distDirs"]:
+        src_dir = project_root / rel_path
+        if not src_dir.exists():
+            if verbose:
+                print(f"[INFO] distDir does not exist (skipped): {src_dir}")
+            continue
+        for item in src_dir.rglob("*"):
+            if item.is_file():
+                files[item.relative_to(src_dir).as_posix()] = item
+    return files
+
+
+def needs_copy(src: Path, dest: Path, checksum: bool = False, link_mode: str = "copy") -> bool:
+    """Compare size and mtime (whole seconds, like rsync), optionally the content hash.
+
+    A destination materialized with a different link mode than requested is
+    always replaced.
+    """
+    if link_mode == "symlink":
+        return not (dest.is_symlink() and os.readlink(dest) == str(src.resolve()))
+    if dest.is_symlink():
+        return True
+    try:
+        dest_stat = dest.stat()
+    except FileNotFoundError:
+        return True
+    src_stat = src.stat()
+    if link_mode == "hardlink" and src_stat.st_dev == dest_stat.st_dev:
+        # Same filesystem: only an actual link to the source is up to date
+        return src_stat.st_ino != dest_stat.st_ino
+    if src_stat.st_size != dest_stat.st_size:
+        return True
+    if checksum:
+        return file_digest(src) != file_digest(dest)
+    return int(src_stat.st_mtime) != int(dest_stat.st_mtime)
+
+
+def reflink_file(src: Path, dest: Path) -> str:
+    """Clone src into dest sharing extents (FICLONE), else in-kernel copy_file_range, else a plain copy.
+
+    Returns the method that was used.
+    """
+    method = "copy"
+    with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+        try:
+            import fcntl
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            method = "reflink"
+        except (ImportError, OSError):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                method = "copy_file_range"
+            except (AttributeError, OSError):
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+                shutil.copyfileobj(fsrc, fdst)
+    shutil.copystat(src, dest)
+    return method
+
+
+def materialize_file(src: Path, dest: Path, link_mode: str = "copy") -> str:
+    """Create dest from src as a copy, hardlink, reflink or symlink; returns the method used.
+
+    hardlink and reflink fall back to a copy when the filesystem does not
+    support them (e.g. across devices). Stages that later rewrite files in the
+    output directory must replace them (write + rename), never write through,
+    or they would modify the linked source.
+    """
+    if dest.is_symlink() or dest.exists():
+        dest.unlink()
+    if link_mode == "symlink":
+        os.symlink(src.resolve(), dest)
+        return "symlink"
+    if link_mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+    elif link_mode == "reflink":
+        return reflink_file(src, dest)
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def remove_stale_files(target_dir: Path, keep: set, stats: dict):
+    """Delete files under target_dir whose relative path is not in keep, then empty dirs."""
+    for item in sorted(target_dir.rglob("*"), reverse=True):
+        rel = item.relative_to(target_dir).as_posix()
+        if item.is_file() or item.is_symlink():
+            # Precompressed sidecars live as long as the file they belong to
+            if rel.endswith(SIDECAR_SUFFIXES) and rel[:-3] in keep:
+                continue
+            if rel not in keep:
+                stats["removed"] += 1
+                stats["removed_bytes"] += item.lstat().st_size
+                item.unlink()
+        elif item.is_dir() and not any(item.iterdir()):
+            item.rmdir()
+
+
+def new_sync_stats() -> dict:
+    return {"copied": 0, "copied_bytes": 0, "skipped": 0, "skipped_bytes": 0, "removed": 0, "removed_bytes": 0}
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def print_sync_summary(label: str, stats: dict):
+    print(f"[OK] {label}: copied {stats['copied']} ({format_bytes(stats['copied_bytes'])}), "
+          f"skipped {stats['skipped']} ({format_bytes(stats['skipped_bytes'])}), "
+          f"removed {stats['removed']} ({format_bytes(stats['removed_bytes'])})")
+
+
+def copy_file_job(src: Path, dest: Path, incremental: bool, checksum: bool, link_mode: str = "copy") -> str | None:
+    """Materialize one file unless an incremental sync finds it unchanged.
+
+    Returns the method used, or None if the file was skipped.
+    """
+    if incremental and not needs_copy(src, dest, checksum, link_mode):
+        return None
+    return materialize_file(src, dest, link_mode)
+
+
+def copy_dist_files(apps: list, output_dir: Path, incremental: bool = False, checksum: bool = False,
+                    workers: int = DEFAULT_COPY_WORKERS, link_mode: str = "copy") -> list:
+    """Copy distribution files for each app.
+
+    With incremental=True the target directory is synced instead of rebuilt:
+    only new or changed files are copied and only files that no longer exist
+    at the source are removed.
+
+    Files of all apps are copied concurrently by a pool of `workers` threads,
+    after all target directories have been created in a first pass. Returns
+    the list of copy errors as (destination, message), sorted by destination.
+
+    link_mode selects how files are materialized (see materialize_file):
+    hardlink/reflink/symlink make staging the site nearly free in disk and time.
+    """
+    plans = {}
+    jobs = []
     for app in apps:
         app_id = app["id"]
         project_root = app["project_root"]
         target_dir = output_dir / app_id
 
         # Clean and create target directory
-        if target_dir.exists():
+        if target_dir.exists() and not incremental:
             shutil.rmtree(target_dir)
-        target_dir.mkdir(parents=True)
-
-        # Copy dist directories
-        for rel_path in app["distDirs"]:
-            src_dir = project_root / rel_path
-            if not src_dir.exists():
-                print(f"[INFO] distDir does not exist (skipped): {src_dir}")
-                continue
+        target_dir.mkdir(parents=True, exist_ok=True)
 
-            print(f"[OK] Copying {src_dir} -> {target_dir}")
-            for item in src_dir.rglob("*"):
-                if item.is_file():
-                    rel = item.relative_to(src_dir)
-                    dest = target_dir / rel
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(item, dest)
+        files = plan_app_files(app)
 
         # Copy screenshot
+        app["screenshot_url"] = None
         if app["screenshot"]:
             screenshot_src = project_root / app["screenshot"]
             if screenshot_src.exists():
                 screenshot_name = screenshot_src.name
-                shutil.copy2(screenshot_src, target_dir / screenshot_name)
+                files[screenshot_name] = screenshot_src
                 app["screenshot_url"] = f"{app_id}/{screenshot_name}"
             else:
                 print(f"[WARN] Screenshot not found: {screenshot_src}")
-                app["screenshot_url"] = None
-        else:
-            app["screenshot_url"] = None
+
+        print(f"[OK] {'Syncing' if incremental else 'Copying'} {len(files)} files -> {target_dir}")
+        plans[app_id] = files
+        for rel, src in sorted(files.items()):
+            jobs.append((app_id, src, target_dir / rel))
+
+    # First pass: create every target directory so the copy workers never race on mkdir
+    for directory in sorted({dest.parent for _, _, dest in jobs}):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    stats = {app["id"]: new_sync_stats() for app in apps}
+    methods = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {
+            pool.submit(copy_file_job, src, dest, incremental, checksum, link_mode): (app_id, src, dest)
+            for app_id, src, dest in jobs
+        }
+        for future in as_completed(futures):
+            app_id, src, dest = futures[future]
+            try:
+                method = future.result()
+                size = src.stat().st_size
+            except OSError as e:
+                errors.append((str(dest), str(e)))
+                continue
+            key = "copied" if method else "skipped"
+            stats[app_id][key] += 1
+            stats[app_id][f"{key}_bytes"] += size
+            if method:
+                methods[method] = methods.get(method, 0) + 1
+
+    errors.sort()
+    for dest, message in errors:
+        print(f"[ERROR] Copy failed: {dest}: {message}")
+
+    total = new_sync_stats()
+    for app in apps:
+        app_id = app["id"]
+        if incremental:
+            remove_stale_files(output_dir / app_id, set(plans[app_id]), stats[app_id])
+            print_sync_summary(app_id, stats[app_id])
+        for key in total:
+            total[key] += stats[app_id][key]
+
+    print_sync_summary("Dist sync total" if incremental else "Dist copy total", total)
+    if methods:
+        print("[OK] Materialized via: " + ", ".join(f"{m} {n}" for m, n in sorted(methods.items())))
+        if link_mode != "copy" and link_mode not in methods:
+            print(f"[INFO] {link_mode} not supported here, fell back to copying")
+    return errors
+
+
+def link_staged_apps(apps: list, stage_dir: Path, output_dir: Path) -> int:
+    """Recreate each app's output dir from its synced copy in stage_dir; returns the number of files.
+
+    Used when --fingerprint or --dedup rewrite rename files in the output,
+    which an incremental sync could never match again. Files are hardlinked
+    (symlinks recreated), so this costs no data copies; the later stages
+    replace files instead of writing into them.
+    """
+    count = 0
+    for app in apps:
+        src_root = stage_dir / app["id"]
+        dest_root = output_dir / app["id"]
+        if dest_root.exists():
+            shutil.rmtree(dest_root)
+        dest_root.mkdir(parents=True)
+        for src in sorted(src_root.rglob("*")):
+            if src.is_dir() and not src.is_symlink():
+                continue
+            dest = dest_root / src.relative_to(src_root)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if src.is_symlink():
+                os.symlink(os.readlink(src), dest)
+            else:
+                try:
+                    os.link(src, dest)
+                except OSError:
+                    shutil.copy2(src, dest)
+            count += 1
+    return count
 
 
 def copy_assets(output_dir: Path, root_dir: Path):
@@ -199,923 +1199,1698 @@ def copy_assets(output_dir: Path, root_dir: Path):
         print(f"[WARN] Logo not found: {logo_src}")
 
 
-def generate_app_wrapper(app: dict) -> str:
-    """Generate a wrapper HTML page for an individual app with header/footer."""
-    app_name = html.escape(app["name"])
-    app_id = html.escape(app["id"])
-    source_url = app.get("sourceUrl", "")
-
-    source_btn = ""
-    if source_url:
-        source_btn = f'''<a href="{html.escape(source_url)}" class="btn btn-outline" target="_blank" rel="noopener noreferrer">
-          <svg class="icon" xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <path d="M15 22v-4a4.8 4.8 0 0 0-1-3.5c3 0 6-2 6-5.5.08-1.25-.27-2.48-1-3.5.28-1.15.28-2.35 0-3.5 0 0-1 0-3 1.5-2.64-.5-5.36-.5-8 0C6 2 5 2 5 2c-.3 1.15-.3 2.35 0 3.5A5.403 5.403 0 0 0 4 9c0 3.5 3 5.5 6 5.5-.39.49-.68 1.05-.85 1.65-.17.6-.22 1.23-.15 1.85v4"></path>
-            <path d="M9 18c-4.51 2-5-2-7-2"></path>
-          </svg>
-          Source
-        </a>'''
-
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>{app_name} - SKaiNET Examples</title>
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;600;700&family=Inter:wght@300;400;500&display=swap" rel="stylesheet">
-  <style>
-    :root {{
-      --background: 220 20% 4%;
-      --foreground: 0 0% 95%;
-      --primary: 0 72% 51%;
-      --primary-foreground: 0 0% 100%;
-      --muted: 220 15% 12%;
-      --muted-foreground: 220 10% 50%;
-      --border: 220 15% 18%;
-      --radius: 0.5rem;
-    }}
-    .light {{
-      --background: 0 0% 98%;
-      --foreground: 220 20% 10%;
-      --muted: 220 15% 95%;
-      --muted-foreground: 220 10% 45%;
-      --border: 220 15% 88%;
-    }}
-    *, *::before, *::after {{ box-sizing: border-box; margin: 0; padding: 0; }}
-    html, body {{ height: 100%; }}
-    body {{
-      font-family: 'Inter', sans-serif;
-      background-color: hsl(var(--background));
-      color: hsl(var(--foreground));
-      display: flex;
-      flex-direction: column;
-    }}
-    .font-orbitron {{ font-family: 'Orbitron', sans-serif; }}
-    .header {{
-      border-bottom: 1px solid hsl(var(--border) / 0.5);
-      background-color: hsl(var(--background));
-      flex-shrink: 0;
-    }}
-    .header-content {{
-      max-width: 1400px;
-      margin: 0 auto;
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      padding: 0.75rem 1rem;
-      gap: 1rem;
-      flex-wrap: wrap;
-    }}
-    .header-left {{
-      display: flex;
-      align-items: center;
-      gap: 1rem;
-    }}
-    .header-right {{
-      display: flex;
-      align-items: center;
-      gap: 0.5rem;
-      flex-wrap: wrap;
-    }}
-    .logo-link {{
-      display: flex;
-      align-items: center;
-      gap: 0.5rem;
-      text-decoration: none;
-    }}
-    .logo-link:hover {{ opacity: 0.8; }}
-    .logo-img {{ height: 2rem; width: auto; }}
-    .logo-text {{ font-size: 1.1rem; font-weight: 700; color: hsl(var(--foreground)); }}
-    .logo-text .highlight {{ color: hsl(var(--primary)); }}
-    .divider {{
-      width: 1px;
-      height: 1.5rem;
-      background-color: hsl(var(--border));
-      margin: 0 0.25rem;
-    }}
-    .app-title {{
-      font-size: 1rem;
-      font-weight: 500;
-      color: hsl(var(--muted-foreground));
-    }}
-    .btn {{
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-      gap: 0.375rem;
-      padding: 0.5rem 0.875rem;
-      min-height: 36px;
-      font-size: 0.8125rem;
-      font-weight: 500;
-      border-radius: var(--radius);
-      cursor: pointer;
-      transition: all 0.2s;
-      text-decoration: none;
-      border: none;
-      white-space: nowrap;
-    }}
-    .btn-ghost {{
-      background: transparent;
-      color: hsl(var(--foreground));
-    }}
-    .btn-ghost:hover {{ background-color: hsl(var(--muted)); }}
-    .btn-outline {{
-      background: transparent;
-      border: 1px solid hsl(var(--border));
-      color: hsl(var(--foreground));
-    }}
-    .btn-outline:hover {{ background-color: hsl(var(--muted)); }}
-    .icon {{ width: 0.875rem; height: 0.875rem; }}
-    .app-frame {{
-      flex: 1;
-      border: none;
-      width: 100%;
-      background: white;
-    }}
-    .footer {{
-      border-top: 1px solid hsl(var(--border) / 0.5);
-      padding: 0.75rem 1rem;
-      text-align: center;
-      font-size: 0.75rem;
-      color: hsl(var(--muted-foreground));
-      flex-shrink: 0;
-    }}
-    .theme-toggle {{
-      position: fixed;
-      bottom: 1rem;
-      right: 1rem;
-      z-index: 50;
-    }}
-    .theme-toggle-btn {{
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      width: 2.25rem;
-      height: 2.25rem;
-      border-radius: 50%;
-      border: 1px solid hsl(var(--border));
-      background-color: hsl(var(--background));
-      color: hsl(var(--foreground));
-      cursor: pointer;
-      transition: all 0.2s;
-    }}
-    .theme-toggle-btn:hover {{ background-color: hsl(var(--muted)); }}
-    @media (max-width: 600px) {{
-      .header-content {{ padding: 0.5rem 0.75rem; }}
-      .divider {{ display: none; }}
-      .app-title {{ display: none; }}
-      .btn {{ padding: 0.4rem 0.6rem; font-size: 0.75rem; min-height: 32px; }}
-    }}
-  </style>
-</head>
-<body>
-  <div class="theme-toggle">
-    <button class="theme-toggle-btn" onclick="toggleTheme()" aria-label="Toggle theme">
-      <svg xmlns="http://www.w3.org/2000/svg" width="18" height="18" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-        <circle cx="12" cy="12" r="4"></circle>
-        <path d="M12 2v2"></path><path d="M12 20v2"></path>
-        <path d="m4.93 4.93 1.41 1.41"></path><path d="m17.66 17.66 1.41 1.41"></path>
-        <path d="M2 12h2"></path><path d="M20 12h2"></path>
-        <path d="m6.34 17.66-1.41 1.41"></path><path d="m19.07 4.93-1.41 1.41"></path>
-      </svg>
-    </button>
-  </div>
-
-  <header class="header">
-    <div class="header-content">
-      <div class="header-left">
-        <a href="https://skainet.sk" class="logo-link">
-          <img src="../assets/logo.png" alt="SKaiNET" class="logo-img">
-          <span class="font-orbitron logo-text">SK<span class="highlight">ai</span>NET</span>
-        </a>
-        <div class="divider"></div>
-        <span class="app-title">{app_name}</span>
-      </div>
-      <div class="header-right">
-        {source_btn}
-        <a href="../" class="btn btn-ghost">
-          <svg class="icon" xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-            <path d="m12 19-7-7 7-7"></path>
-            <path d="M19 12H5"></path>
-          </svg>
-          All Examples
-        </a>
-      </div>
-    </div>
-  </header>
-
-  <iframe src="app.html" class="app-frame" title="{app_name}"></iframe>
-
-  <footer class="footer">
-    &copy; {datetime.now().year} SKaiNET. All rights reserved.
-  </footer>
-
-  <script>
-    function toggleTheme() {{
-      document.documentElement.classList.toggle('light');
-      localStorage.setItem('theme', document.documentElement.classList.contains('light') ? 'light' : 'dark');
-    }}
-    (function() {{
-      if (localStorage.getItem('theme') === 'light') {{
-        document.documentElement.classList.add('light');
+def replace_file_text(path: Path, text: str):
+    """Write text to path via a temp file and rename.
+
+    Never writes through an existing hardlink/symlink into a dist source.
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def list_output_files(app_dir: Path) -> dict:
+    """Map relative posix path -> path for every file (or file symlink) in an app output dir."""
+    return {
+        item.relative_to(app_dir).as_posix(): item
+        for item in sorted(app_dir.rglob("*"))
+        if item.is_file() and not item.name.startswith(".") and not item.name.endswith(SIDECAR_SUFFIXES)
+    }
+
+
+def hash_files(paths: list, workers: int = DEFAULT_COPY_WORKERS) -> dict:
+    """sha256 of many files in parallel; returns {path: digest}."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(paths, pool.map(file_digest, paths)))
+
+
+def reference_pattern(rel: str):
+    """Quoted reference to a relative asset path, e.g. "skiko.wasm", './skiko.wasm' or `skiko.wasm`."""
+    return re.compile(r"""(["'`])(?:\./)?""" + re.escape(rel) + r"\1")
+
+
+def dedup_site(apps: list, output_dir: Path, mode: str = "link", workers: int = DEFAULT_COPY_WORKERS) -> dict:
+    """Store files that are byte-identical across apps once in output_dir/_shared.
+
+    mode="link": every copy becomes a hardlink to a content-addressed blob
+    (_shared/<sha[:2]>/<sha>). URLs do not change; disk usage and the
+    uploaded artifact shrink.
+
+    mode="rewrite": shared files (never HTML entry points) move to
+    _shared/<name>.<sha12><ext> and quoted references to them in each app's
+    HTML/JS/CSS are rewritten, so the browser caches e.g. skiko.wasm once for
+    all demos. Only files that every holding app references by a quoted path
+    (or uses as its card screenshot) move; anything else may be requested by
+    a URL built at runtime and stays in place. A shared text file that
+    references an app-specific file is left in place too, since one URL
+    cannot serve every app.
+    """
+    store = output_dir / SHARED_DIR_NAME
+    files = {app["id"]: list_output_files(output_dir / app["id"]) for app in apps}
+    digests = hash_files([path for app_files in files.values() for path in app_files.values()], workers)
+
+    groups = {}
+    for app_id, app_files in files.items():
+        for rel, path in app_files.items():
+            groups.setdefault(digests[path], []).append((app_id, rel, path))
+    duplicates = {digest: entries for digest, entries in groups.items() if len(entries) > 1}
+    sizes = {digest: entries[0][2].stat().st_size for digest, entries in duplicates.items()}
+
+    if mode == "rewrite":
+        screenshots = {
+            app["id"]: (app.get("screenshot_url") or "")[len(app["id"]) + 1:]
+            for app in apps if (app.get("screenshot_url") or "").startswith(app["id"] + "/")
+        }
+        shared = _dedup_rewrite(files, digests, duplicates, store, screenshots)
+        for app in apps:
+            screenshot_url = app.get("screenshot_url") or ""
+            app_files = files[app["id"]]
+            rel = screenshot_url[len(app["id"]) + 1:]
+            if screenshot_url.startswith(app["id"] + "/") and rel in app_files and not app_files[rel].exists():
+                blob = shared[digests[app_files[rel]]]
+                app["screenshot_url"] = blob.relative_to(output_dir).as_posix()
+    else:
+        shared = _dedup_link(duplicates, store)
+
+    # Drop blobs from previous builds that are no longer shared
+    keep = {blob for blob in shared.values()}
+    if store.exists():
+        for item in sorted(store.rglob("*"), reverse=True):
+            if item.is_file() and item not in keep:
+                item.unlink()
+            elif item.is_dir() and not any(item.iterdir()):
+                item.rmdir()
+
+    saved = sum((len(duplicates[digest]) - 1) * sizes[digest] for digest in shared)
+    stats = {"groups": len(shared), "files": sum(len(duplicates[d]) for d in shared), "saved_bytes": saved}
+    print(f"[OK] Dedup ({mode}): {stats['files']} files in {stats['groups']} shared blobs, "
+          f"saved {format_bytes(saved)}")
+    return stats
+
+
+def _dedup_link(duplicates: dict, store: Path) -> dict:
+    shared = {}
+    for digest, entries in duplicates.items():
+        blob = store / digest[:2] / digest
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        if not blob.exists():
+            shutil.copy2(entries[0][2], blob)
+        for _, _, path in entries:
+            if not path.is_symlink() and os.path.samefile(path, blob):
+                continue
+            tmp_path = path.with_name(f".{path.name}.dedup")
+            try:
+                os.link(blob, tmp_path)
+            except OSError:
+                # No hardlinks on this filesystem: nothing to gain
+                break
+            os.replace(tmp_path, path)
+        else:
+            shared[digest] = blob
+    return shared
+
+
+def _dedup_rewrite(files: dict, digests: dict, duplicates: dict, store: Path, screenshots: dict) -> dict:
+    def references(app_id: str, path: Path) -> list:
+        if path.suffix not in TEXT_ASSET_SUFFIXES:
+            return []
+        text = path.read_text(encoding="utf-8", errors="replace")
+        return [rel for rel in files[app_id] if rel != path.name and reference_pattern(rel).search(text)]
+
+    # Paths each app references from its own text files: only these can be rewritten to _shared/
+    referenced = {
+        app_id: {ref for path in app_files.values() for ref in references(app_id, path)}
+        | ({screenshots[app_id]} if app_id in screenshots else set())
+        for app_id, app_files in files.items()
+    }
+
+    # Candidates: identical non-HTML files present in at least two apps, referenced everywhere they are
+    candidates = {
+        digest: entries for digest, entries in duplicates.items()
+        if len({app_id for app_id, _, _ in entries}) > 1 and Path(entries[0][1]).suffix not in (".html", ".htm")
+        and all(rel in referenced[app_id] for app_id, rel, _ in entries)
+    }
+
+    # A shared text file may only reference other shared files with the same content everywhere
+    changed = True
+    while changed:
+        changed = False
+        for digest, entries in list(candidates.items()):
+            targets = set()
+            for app_id, rel, path in entries:
+                for ref in references(app_id, path):
+                    targets.add((ref, digests[files[app_id][ref]]))
+            if any(ref_digest not in candidates for _, ref_digest in targets) or \
+                    len({ref for ref, _ in targets}) != len(targets):
+                del candidates[digest]
+                changed = True
+
+    shared_names = {}
+    for digest, entries in candidates.items():
+        rel = Path(entries[0][1])
+        shared_names[digest] = f"{rel.stem}.{digest[:12]}{rel.suffix}"
+
+    store.mkdir(parents=True, exist_ok=True)
+    shared = {}
+    for digest, entries in candidates.items():
+        app_id, rel, path = entries[0]
+        blob = store / shared_names[digest]
+        if path.suffix in TEXT_ASSET_SUFFIXES:
+            text = path.read_text(encoding="utf-8")
+            for ref in references(app_id, path):
+                text = reference_pattern(ref).sub(
+                    lambda m: m.group(1) + shared_names[digests[files[app_id][ref]]] + m.group(1), text)
+            replace_file_text(blob, text)
+        elif not blob.exists():
+            shutil.copy2(path, blob)
+        shared[digest] = blob
+
+    # Point each app's remaining files at the shared copies, then drop the app copies
+    for app_id, app_files in files.items():
+        moved = {rel: digests[path] for rel, path in app_files.items() if digests[path] in candidates}
+        if not moved:
+            continue
+        for rel, path in app_files.items():
+            if rel in moved or path.suffix not in TEXT_ASSET_SUFFIXES:
+                continue
+            text = path.read_text(encoding="utf-8", errors="replace")
+            new_text = text
+            for ref, digest in moved.items():
+                target = os.path.relpath(store / shared_names[digest], path.parent).replace(os.sep, "/")
+                new_text = reference_pattern(ref).sub(lambda m: m.group(1) + target + m.group(1), new_text)
+            if new_text != text:
+                replace_file_text(path, new_text)
+        for rel in moved:
+            app_files[rel].unlink()
+    return shared
+
+
+def fingerprint_site(output_dir: Path) -> list:
+    """Rename referenced static assets to <name>.<hash><ext> and rewrite their references.
+
+    Covers every file under output_dir except HTML pages (entry points keep
+    their URLs) and files nobody references by a quoted relative path:
+    those may be loaded through computed URLs (e.g. Compose resources), so
+    renaming them would break the app. Files are processed in dependency
+    order, so the hash of a JS/CSS file covers the hashed names it
+    references. Files in a reference cycle are rewritten but keep their name.
+
+    Returns the output-relative paths of all fingerprinted files.
+    """
+    files = {
+        item.relative_to(output_dir).as_posix(): item
+        for item in sorted(output_dir.rglob("*"))
+        if item.is_file() and not any(part.startswith(".") for part in item.relative_to(output_dir).parts)
+        and not item.name.endswith(SIDECAR_SUFFIXES) and item.name != HEADERS_FILE_NAME
+    }
+
+    # Which files does each text file reference?
+    refs = {}
+    for rel, path in files.items():
+        if path.suffix not in TEXT_ASSET_SUFFIXES:
+            continue
+        text = path.read_text(encoding="utf-8", errors="replace")
+        found = {}
+        for target in files:
+            if target == rel or Path(target).name not in text:
+                continue
+            ref = os.path.relpath(target, Path(rel).parent.as_posix() or ".").replace(os.sep, "/")
+            if reference_pattern(ref).search(text):
+                found[target] = ref
+        refs[rel] = found
+
+    referenced = {target for found in refs.values() for target in found}
+    rename = {
+        rel for rel in referenced
+        if files[rel].suffix not in (".html", ".htm") and not FINGERPRINTED_NAME.search(files[rel].name)
+        and files[rel].name != SERVICE_WORKER_NAME
+    }
+
+    new_names = {}
+    pending = sorted(set(refs) | rename)
+    while pending:
+        ready = [rel for rel in pending if not any(t in rename and t not in new_names for t in refs.get(rel, {}))]
+        if not ready:
+            # Reference cycle: keep these names, then their dependents can proceed
+            rename.difference_update(pending)
+            continue
+        for rel in ready:
+            path = files[rel]
+            if rel in refs:
+                text = path.read_text(encoding="utf-8")
+                new_text = text
+                for target, ref in refs[rel].items():
+                    if target in new_names:
+                        new_ref = os.path.relpath(new_names[target], Path(rel).parent.as_posix() or ".")
+                        new_ref = new_ref.replace(os.sep, "/")
+                        new_text = reference_pattern(ref).sub(lambda m: m.group(1) + new_ref + m.group(1), new_text)
+                if new_text != text:
+                    replace_file_text(path, new_text)
+            if rel in rename:
+                digest = file_digest(path)[:FINGERPRINT_LENGTH]
+                new_path = path.with_name(f"{path.stem}.{digest}{path.suffix}")
+                os.replace(path, new_path)
+                new_names[rel] = new_path.relative_to(output_dir).as_posix()
+        pending = [rel for rel in pending if rel not in ready]
+
+    hashed = sorted(set(new_names.values()) | {
+        rel for rel in files if rel in referenced and FINGERPRINTED_NAME.search(files[rel].name)
+    })
+    print(f"[OK] Fingerprinted {len(new_names)} assets ({len(hashed)} immutable URLs)")
+    return hashed
+
+
+def write_headers_file(output_dir: Path, immutable: list, revalidate: list | None = None):
+    """Write a _headers file (Netlify / Cloudflare Pages format) with cache rules.
+
+    Content-hashed files are cached forever; HTML and the revalidate paths
+    (e.g. service workers) are always revalidated. wasm/module/model files
+    get explicit Content-Type headers.
+    """
+    lines = [
+        "/*.html",
+        f"  Cache-Control: {HTML_CACHE_CONTROL}",
+        "/",
+        f"  Cache-Control: {HTML_CACHE_CONTROL}",
+    ]
+    # WebAssembly.instantiateStreaming rejects anything but application/wasm
+    for suffix, mime in sorted(ASSET_MIME_TYPES.items()):
+        lines.append(f"/*{suffix}")
+        lines.append(f"  Content-Type: {mime}")
+    for rel in revalidate or []:
+        lines.append(f"/{rel}")
+        lines.append(f"  Cache-Control: {HTML_CACHE_CONTROL}")
+    for rel in immutable:
+        lines.append(f"/{rel}")
+        lines.append(f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+    headers_path = output_dir / HEADERS_FILE_NAME
+    replace_file_text(headers_path, "\n".join(lines) + "\n")
+    print(f"[OK] Wrote {headers_path} ({len(immutable)} immutable paths)")
+
+
+def render_screenshot(src: str, out_dir: str, name: str, widths: list) -> dict:
+    """Resize one screenshot to each width (no upscaling) as AVIF, WebP and the source format.
+
+    Existing outputs are reused: their names contain the source hash. Returns
+    {"width", "height", "variants": [(mime type, width, file name), ...]}.
+    """
+    Image.init()
+    with Image.open(src) as image:
+        width, height = image.size
+        fallback = "JPEG" if image.format == "JPEG" else "PNG"
+        formats = [fmt for fmt in ("AVIF", "WEBP") if fmt in Image.SAVE] + [fallback]
+        targets = sorted({w for w in widths if w < width} | {min(width, max(widths))})
+        variants = []
+        for fmt in formats:
+            ext = {"AVIF": "avif", "WEBP": "webp", "JPEG": "jpg", "PNG": "png"}[fmt]
+            for target in targets:
+                file_name = f"{name.format(width=target)}.{ext}"
+                out_path = Path(out_dir) / file_name
+                if not out_path.exists():
+                    resized = image if target == width else image.resize(
+                        (target, round(height * target / width)), Image.LANCZOS)
+                    if fmt in ("JPEG", "AVIF") and resized.mode not in ("RGB", "L"):
+                        resized = resized.convert("RGB")
+                    tmp_path = out_path.with_name(f".{file_name}.tmp")
+                    options = {"optimize": True} if fmt in ("PNG", "JPEG") else {"quality": 70 if fmt == "AVIF" else 80}
+                    resized.save(tmp_path, format=fmt, **options)
+                    os.replace(tmp_path, out_path)
+                variants.append((Image.MIME[fmt], target, file_name))
+    return {"width": width, "height": height, "variants": variants}
+
+
+def build_responsive_screenshots(apps: list, output_dir: Path, widths: list = SCREENSHOT_WIDTHS,
+                                 workers: int | None = None):
+    """Generate resized AVIF/WebP/PNG screenshots into output_dir/_img and set app["screenshot_images"].
+
+    Outputs are named <app>-<width>w.<source hash>.<ext>, so unchanged
+    screenshots are never re-encoded. Requires Pillow; without it the
+    original screenshots are used unchanged.
+    """
+    if Image is None:
+        print("[WARN] Pillow not installed, keeping full-size screenshots (pip install Pillow)")
+        return
+    images_dir = output_dir / IMAGES_DIR_NAME
+    images_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = {}
+    for app in apps:
+        src = app["project_root"] / app["screenshot"] if app["screenshot"] else None
+        if src is not None and src.exists():
+            jobs[app["id"]] = (str(src), f"{app['id']}-{{width}}w.{file_digest(src)[:12]}")
+
+    produced = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(render_screenshot, src, str(images_dir), name, widths): app_id
+            for app_id, (src, name) in jobs.items()
+        }
+        results = {}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Cannot resize screenshot of {futures[future]}: {e}")
+
+    for app in apps:
+        result = results.get(app["id"])
+        app["screenshot_images"] = None
+        if not result:
+            continue
+        sources = {}
+        for mime, width, file_name in result["variants"]:
+            produced.add(file_name)
+            sources.setdefault(mime, []).append(f"{IMAGES_DIR_NAME}/{file_name} {width}w")
+        fallback_mime = list(sources)[-1]
+        app["screenshot_images"] = {
+            "width": result["width"],
+            "height": result["height"],
+            "sources": [{"type": mime, "srcset": ", ".join(srcset)} for mime, srcset in sources.items()
+                        if mime != fallback_mime],
+            "srcset": ", ".join(sources[fallback_mime]),
+            "sizes": SCREENSHOT_SIZES,
+        }
+        raw_size = Path(jobs[app["id"]][0]).stat().st_size
+        smallest = min((images_dir / file_name).stat().st_size for _, _, file_name in result["variants"])
+        print(f"[OK] Screenshot {app['id']}: {len(result['variants'])} variants "
+              f"({', '.join(m.split('/')[-1] for m in sources)}), {format_bytes(raw_size)} -> "
+              f"{format_bytes(smallest)} smallest")
+
+    # Drop variants of screenshots that changed or were removed
+    for item in images_dir.iterdir():
+        if item.is_file() and item.name not in produced:
+            item.unlink()
+
+
+def site_pages(output_dir: Path, apps: list) -> list:
+    """The landing page and each app's wrapper page."""
+    pages = [output_dir / "index.html"] + [output_dir / app["id"] / "index.html" for app in apps]
+    return [page for page in pages if page.is_file()]
+
+
+def requested_fonts(pages: list) -> dict:
+    """{family: set of weights} requested by the Google Fonts stylesheet links of the pages."""
+    families = {}
+    for page in pages:
+        text = page.read_text(encoding="utf-8")
+        for href in re.findall(r'href="(https://fonts\.googleapis\.com/css2\?[^"]+)"', text):
+            for spec in re.findall(r"family=([^&]+)", html.unescape(href)):
+                name, _, axes = spec.partition(":")
+                weights = {int(w) for w in re.findall(r"\d{3}", axes.partition("@")[2])} or {400}
+                families.setdefault(name.replace("+", " "), set()).update(weights)
+    return families
+
+
+def vendored_font_files(fonts_dir: Path) -> dict:
+    """{family key: {weight or "variable": path}} from files like Inter-Medium.ttf or Orbitron-VariableFont_wght.ttf.
+
+    Family keys are lower case without spaces (OpenSans-Bold.ttf -> "opensans").
+    """
+    fonts = {}
+    if not fonts_dir.is_dir():
+        return fonts
+    for path in sorted(fonts_dir.rglob("*")):
+        if path.suffix.lower() not in FONT_FORMATS or "italic" in path.stem.lower():
+            continue
+        family = re.split(r"[-_\[]", path.stem, maxsplit=1)[0]
+        style = path.stem[len(family):].lower().replace("-", "").replace("_", "")
+        if "variable" in style or "[" in path.stem:
+            weight = "variable"
+        else:
+            weight = next((w for name, w in sorted(FONT_WEIGHT_NAMES.items(), key=lambda kv: -len(kv[0]))
+                           if name in style), None)
+            digits = re.search(r"\d{3}", style)
+            weight = int(digits.group()) if digits else weight or 400
+        fonts.setdefault(family.lower(), {})[weight] = path
+    return fonts
+
+
+def page_characters(pages: list, apps: list) -> str:
+    """Every character that can appear in the pages (including JSON-escaped project data)."""
+    chars = set(string.printable)
+    for page in pages:
+        text = page.read_text(encoding="utf-8")
+        chars.update(html.unescape(text))
+        chars.update(chr(int(code, 16)) for code in re.findall(r"\\u([0-9a-fA-F]{4})", text))
+    for app in apps:
+        chars.update(app["name"] + (app["description"] or ""))
+    return "".join(sorted(c for c in chars if c.isprintable() or c == " "))
+
+
+def subset_font(src: Path, dest_dir: Path, name: str, text: str) -> Path:
+    """Subset a font to the glyphs of text as woff2 (woff without brotli) via fontTools, else copy it."""
+    try:
+        from fontTools import subset
+    except ImportError:
+        data = src.read_bytes()
+        suffix = src.suffix.lower()
+    else:
+        options = subset.Options()
+        options.flavor = "woff2" if brotli is not None else "woff"
+        options.layout_features = ["*"]
+        options.name_IDs = []
+        font = subset.load_font(str(src), options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+        buffer = io.BytesIO()
+        subset.save_font(font, buffer, options)
+        data = buffer.getvalue()
+        suffix = f".{options.flavor}"
+    dest = dest_dir / f"{name}.{hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]}{suffix}"
+    if not dest.exists():
+        dest.write_bytes(data)
+    return dest
+
+
+def self_host_fonts(output_dir: Path, apps: list, fonts_dir: Path) -> dict:
+    """Replace the Google Fonts links of all pages with subsetted, self-hosted fonts.
+
+    Fonts come from locally vendored files in fonts_dir (nothing is
+    downloaded). Each page gets inline @font-face rules with
+    font-display: swap and preload hints for the regular weight of each
+    family. Weights without a vendored file fall back to the CSS stack;
+    if a whole family has no vendored file the pages keep their Google
+    Fonts links. Returns {page: number of fonts}.
+    """
+    pages = site_pages(output_dir, apps)
+    wanted = requested_fonts(pages)
+    if not wanted:
+        return {}
+    vendored = vendored_font_files(fonts_dir)
+    out_dir = output_dir / "assets" / FONTS_DIR_NAME
+    unvendored = sorted(family for family in wanted if family.replace(" ", "").lower() not in vendored)
+    if unvendored:
+        print(f"[WARN] No vendored font files for {', '.join(unvendored)} in {fonts_dir}, "
+              f"keeping the Google Fonts links")
+        shutil.rmtree(out_dir, ignore_errors=True)
+        return {}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    text = page_characters(pages, apps)
+    if importlib.util.find_spec("fontTools") is None:
+        print("[WARN] fontTools not installed, fonts are copied without subsetting (pip install fonttools)")
+
+    faces = []  # (family, css weight, path, preload)
+    produced = set()
+    for family, weights in sorted(wanted.items()):
+        files = vendored.get(family.replace(" ", "").lower(), {})
+        if "variable" in files:
+            path = subset_font(files["variable"], out_dir, f"{family.replace(' ', '')}-var", text)
+            faces.append((family, f"{min(weights)} {max(weights)}", path, True))
+            produced.add(path.name)
+            continue
+        missing = sorted(w for w in weights if w not in files)
+        if missing:
+            print(f"[WARN] No vendored {family} font for weight(s) {missing} in {fonts_dir}, "
+                  f"falling back to the CSS font stack")
+        preload = 400 if 400 in weights else min(weights)
+        for weight in sorted(w for w in weights if w in files):
+            path = subset_font(files[weight], out_dir, f"{family.replace(' ', '')}-{weight}", text)
+            faces.append((family, str(weight), path, weight == preload))
+            produced.add(path.name)
+
+    for item in out_dir.iterdir():
+        if item.is_file() and item.name not in produced:
+            item.unlink()
+
+    results = {}
+    for page in pages:
+        page_text = page.read_text(encoding="utf-8")
+        new_text = GOOGLE_FONTS_LINK.sub("", page_text)
+        rules, hints = [], []
+        for family, weight, path, preload in faces:
+            url = os.path.relpath(path, page.parent).replace(os.sep, "/")
+            font_format = FONT_FORMATS[path.suffix]
+            rules.append(f"@font-face {{ font-family: '{family}'; font-style: normal; font-weight: {weight}; "
+                         f"font-display: swap; src: url(\"{url}\") format(\"{font_format}\"); }}")
+            if preload:
+                hints.append(f'<link rel="preload" href="{url}" as="font" type="{FONT_MIME_TYPES[path.suffix]}" crossorigin>')
+        block = "".join(f"\n  {hint}" for hint in hints)
+        if rules:
+            block += "\n  <style>\n    " + "\n    ".join(rules) + "\n  </style>"
+        marker = re.search(r"<title>.*?</title>", new_text, re.DOTALL)
+        position = marker.end() if marker else new_text.find("<head>") + len("<head>")
+        new_text = new_text[:position] + block + new_text[position:]
+        if new_text != page_text:
+            replace_file_text(page, new_text)
+        results[page.relative_to(output_dir).as_posix()] = len(rules)
+    print(f"[OK] Self-hosted fonts: {len(faces)} files for {len(wanted)} families on {len(pages)} pages")
+    return results
+
+
+def split_css(css: str) -> list:
+    """Split a stylesheet into top-level (prelude, body) blocks; body is None for statements like @import."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+    blocks = []
+    i = 0
+    while i < len(css):
+        brace = css.find("{", i)
+        semicolon = css.find(";", i)
+        if brace < 0:
+            break
+        if 0 <= semicolon < brace and css[i:semicolon].strip().startswith("@"):
+            blocks.append((css[i:semicolon].strip(), None))
+            i = semicolon + 1
+            continue
+        depth = 0
+        for j in range(brace, len(css)):
+            if css[j] == "{":
+                depth += 1
+            elif css[j] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+        blocks.append((css[i:brace].strip(), css[brace + 1:j].strip()))
+        i = j + 1
+    return blocks
+
+
+def selector_matches(selector: str, used: dict) -> bool:
+    """Could any comma-separated part of selector match the page's static markup?"""
+    for part in selector.split(","):
+        part = re.sub(r"::?[\w-]+(\([^)]*\))?", "", part)
+        classes = set(re.findall(r"\.([\w-]+)", part))
+        ids = set(re.findall(r"#([\w-]+)", part))
+        tags = {t.lower() for t in re.findall(r"(?:^|[\s>+~])([a-zA-Z][\w-]*)", part)}
+        if classes <= used["classes"] and ids <= used["ids"] and tags <= used["tags"]:
+            return True
+    return False
+
+
+def partition_css(css: str, used: dict) -> tuple:
+    """(critical, deferred) CSS: rules that can match the static markup vs. the rest."""
+    critical, deferred = [], []
+    for prelude, body in split_css(css):
+        if body is None:
+            critical.append(prelude + ";")
+        elif prelude.startswith("@media") or prelude.startswith("@supports"):
+            inner_critical, inner_deferred = partition_css(body, used)
+            if inner_critical:
+                critical.append(f"{prelude} {{\n{inner_critical}\n}}")
+            if inner_deferred:
+                deferred.append(f"{prelude} {{\n{inner_deferred}\n}}")
+        elif prelude.startswith("@") or selector_matches(prelude, used):
+            critical.append(f"{prelude} {{ {body} }}")
+        else:
+            deferred.append(f"{prelude} {{ {body} }}")
+    return "\n".join(critical), "\n".join(deferred)
+
+
+def static_markup_tokens(page_text: str) -> dict:
+    """Classes, ids and tags the page renders on load.
+
+    Besides the static markup this includes <template> content and markup
+    that inline scripts build (class="..." attributes and tags in their
+    strings, e.g. the client-rendered project cards), plus classes scripts
+    toggle, so those elements are styled before the deferred CSS arrives.
+    """
+    scripts = " ".join(re.findall(r"<script[^>]*>(.*?)</script>", page_text, re.DOTALL | re.IGNORECASE))
+    markup = re.sub(r"<script[^>]*>.*?</script>", "", page_text, flags=re.DOTALL | re.IGNORECASE) + scripts
+    classes = {c for attr in re.findall(r'class="([^"]*)"', markup) for c in attr.split()}
+    classes.update(re.findall(r"classList\.(?:add|toggle)\(\s*['\"]([\w-]+)['\"]", scripts))
+    return {
+        "classes": classes,
+        "ids": set(re.findall(r'id="([^"]+)"', markup)),
+        "tags": {t.lower() for t in re.findall(r"<([a-zA-Z][\w-]*)", markup)} | {"html", "body"},
+    }
+
+
+def split_critical_css(output_dir: Path, apps: list) -> dict:
+    """Move the CSS that the static markup of each page does not need into a shared stylesheet.
+
+    The inline <style> of every page keeps only rules that can match its
+    static markup (outside scripts and templates). The rest goes to
+    assets/css/<page kind>.<hash>.css, loaded without blocking rendering;
+    pages with the same deferred CSS (all app wrappers) share one file.
+    Returns {page: (inline bytes before, after)}.
+    """
+    css_dir = output_dir / "assets" / CSS_DIR_NAME
+    css_dir.mkdir(parents=True, exist_ok=True)
+    produced = set()
+    results = {}
+    for page in site_pages(output_dir, apps):
+        page_text = page.read_text(encoding="utf-8")
+        styles = list(re.finditer(r"<style>(.*?)</style>", page_text, re.DOTALL))
+        if not styles:
+            continue
+        # The last inline stylesheet is the page's own (earlier ones may be @font-face blocks)
+        style = styles[-1]
+        critical, deferred = partition_css(style.group(1), static_markup_tokens(page_text))
+        if not deferred:
+            continue
+        kind = "landing" if page.parent == output_dir else "app"
+        data = deferred + "\n"
+        sheet = css_dir / f"{kind}.{hashlib.sha256(data.encode('utf-8')).hexdigest()[:FINGERPRINT_LENGTH]}.css"
+        if not sheet.exists():
+            replace_file_text(sheet, data)
+        produced.add(sheet.name)
+        url = os.path.relpath(sheet, page.parent).replace(os.sep, "/")
+        link = (f'<link rel="preload" href="{url}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+                f'  <noscript><link rel="stylesheet" href="{url}"></noscript>\n')
+        new_text = (page_text[:style.start()] + f"<style>\n{critical}\n  </style>\n  " + link.rstrip("\n")
+                    + page_text[style.end():])
+        replace_file_text(page, new_text)
+        results[page.relative_to(output_dir).as_posix()] = (len(style.group(1)), len(critical))
+
+    for item in css_dir.iterdir():
+        if item.is_file() and item.name not in produced:
+            item.unlink()
+    for page, (before, after) in sorted(results.items()):
+        print(f"[OK] Critical CSS {page}: inline {format_bytes(before)} -> {format_bytes(after)}")
+    return results
+
+
+def _minify_css(css: str) -> str:
+    """Strip comments and whitespace from a stylesheet; strings are kept as-is."""
+    out = []
+    code = []
+
+    def flush():
+        # No space is needed around { } ; , or after a colon ("a :hover" keeps its space)
+        text = re.sub(r"\s*([{};,])\s*", r"\1", re.sub(r"\s+", " ", "".join(code)))
+        out.append(re.sub(r":\s+", ":", text).replace(";}", "}"))
+        code.clear()
+
+    for token in re.finditer(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|([^"'/]+|/)""", css, re.DOTALL):
+        string_literal, comment, text = token.groups()
+        if string_literal:
+            flush()
+            out.append(string_literal)
+        else:
+            code.append(" " if comment else text)
+    flush()
+    return "".join(out).strip()
+
+
+def _compact_json_literals(code: str) -> str:
+    """Rewrite multi-line JSON values assigned in a script (embedded data) in compact form."""
+    decoder = json.JSONDecoder()
+    out = []
+    pos = 0
+    for match in re.finditer(r"=\s*(?=[\[{]\s*\n)", code):
+        if match.start() < pos:
+            continue
+        try:
+            value, end = decoder.raw_decode(code, match.end())
+        except ValueError:
+            continue
+        out.append(code[pos:match.end()])
+        out.append(json.dumps(value, separators=(",", ":"), ensure_ascii=False))
+        pos = end
+    return "".join(out) + code[pos:]
+
+
+def _minify_js(code: str) -> str:
+    """Conservative script minifier: drops comments, indentation and blank lines.
+
+    Line breaks are kept (no automatic semicolon insertion surprises), spaces
+    next to punctuation are dropped, and strings, template literals and regex
+    literals are copied unchanged.
+    """
+    code = _compact_json_literals(code)
+    out = []
+    i, n = 0, len(code)
+    last = ""  # last significant code character, to tell a regex from a division
+    while i < n:
+        ch = code[i]
+        if ch in "\"'`":
+            j = i + 1
+            depth = 0
+            while j < n:
+                if code[j] == "\\":
+                    j += 2
+                    continue
+                if ch == "`" and code.startswith("${", j):
+                    depth += 1
+                    j += 2
+                    continue
+                if ch == "`" and code[j] == "{" and depth:
+                    depth += 1
+                elif ch == "`" and code[j] == "}" and depth:
+                    depth -= 1
+                elif code[j] == ch and not depth:
+                    break
+                j += 1
+            out.append(code[i:j + 1])
+            last = ch
+            i = j + 1
+        elif ch.isspace() or code.startswith(("//", "/*"), i):
+            # A run of whitespace and comments: one newline, one space or nothing
+            j = i
+            newline = False
+            while j < n:
+                if code[j].isspace():
+                    newline = newline or code[j] == "\n"
+                    j += 1
+                elif code.startswith("//", j):
+                    end = code.find("\n", j)
+                    j = n if end < 0 else end
+                elif code.startswith("/*", j):
+                    end = code.find("*/", j + 2)
+                    newline = newline or "\n" in code[j:n if end < 0 else end]
+                    j = n if end < 0 else end + 2
+                else:
+                    break
+            if newline:
+                out.append("\n")
+            elif not (out and out[-1][-1] in JS_PUNCTUATION) and not (j < n and code[j] in JS_PUNCTUATION):
+                out.append(" ")
+            i = j
+        elif ch == "/" and (not last or last in JS_REGEX_PRECEDING):
+            j = i + 1
+            in_class = False
+            while j < n and code[j] != "\n":
+                if code[j] == "\\":
+                    j += 2
+                    continue
+                if code[j] == "[":
+                    in_class = True
+                elif code[j] == "]":
+                    in_class = False
+                elif code[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (code[j].isalnum() or code[j] == "_"):
+                j += 1
+            out.append(code[i:j])
+            last = "/"
+            i = j
+        else:
+            j = i
+            while j < n and code[j] not in "\"'`/" and not code[j].isspace():
+                j += 1
+            j = max(j, i + 1)
+            token = code[i:j]
+            out.append(token)
+            if token in JS_REGEX_KEYWORDS:
+                last = "("
+            elif token.endswith(("++", "--")):
+                # Postfix ++/-- (after an operand) ends an expression: a following "/" divides
+                before = token[:-2][-1:] or last
+                last = ")" if before and before not in JS_REGEX_PRECEDING else token[-1]
+            else:
+                last = token[-1]
+            i = j
+    return "".join(out).strip()
+
+
+def minify_html(page: str) -> str:
+    """Minify a generated page: comments, whitespace, inline CSS/JS and JSON data.
+
+    <pre>, <textarea> and <template> content and unknown <script> types are
+    left as they are. The result depends only on the input.
+    """
+    out = []
+    tokens = []
+    for match in MINIFY_TOKEN.finditer(page):
+        comment, raw_tag, tag, text = match.group("comment"), match.group("raw"), match.group("tag"), match.group("text")
+        if comment is not None:
+            if comment.startswith("<!--[if"):
+                tokens.append(("tag", "!comment", comment))
+            continue
+        if raw_tag is not None:
+            name = match.group("raw_name").lower()
+            open_tag, body, close_tag = match.group("raw_open"), match.group("raw_body"), match.group("raw_close")
+            if name == "style":
+                body = _minify_css(body)
+            elif name == "script":
+                script_type = re.search(r"""\btype\s*=\s*["']?([^"'\s>]+)""", open_tag, re.IGNORECASE)
+                script_type = script_type.group(1).lower() if script_type else "text/javascript"
+                if script_type in JSON_SCRIPT_TYPES:
+                    try:
+                        body = json.dumps(json.loads(body), separators=(",", ":"), ensure_ascii=False)
+                    except ValueError:
+                        pass
+                elif script_type in JS_SCRIPT_TYPES:
+                    body = _minify_js(body)
+            tokens.append(("tag", name, open_tag + body + close_tag))
+        elif tag is not None:
+            tokens.append(("tag", match.group("tag_name").lower(), tag))
+        else:
+            tokens.append(("text", None, re.sub(r"\s+", " ", text)))
+
+    for index, (kind, name, value) in enumerate(tokens):
+        if kind == "tag":
+            out.append(value)
+            continue
+        # Whitespace next to block-level tags does not render
+        before = tokens[index - 1][1] if index > 0 else "!doctype"
+        after = tokens[index + 1][1] if index + 1 < len(tokens) else "!doctype"
+        if before and before.lstrip("/") in MINIFY_BLOCK_TAGS:
+            value = value.lstrip(" ")
+        if after and after.lstrip("/") in MINIFY_BLOCK_TAGS:
+            value = value.rstrip(" ")
+        out.append(value)
+    return "".join(out).strip() + "\n"
+
+
+def minify_site(output_dir: Path, apps: list) -> dict:
+    """Minify the landing page and the app wrapper pages in place; returns {page: (before, after)}."""
+    results = {}
+    for page in site_pages(output_dir, apps):
+        text = page.read_text(encoding="utf-8")
+        minified = minify_html(text)
+        if minified != text:
+            replace_file_text(page, minified)
+        results[page.relative_to(output_dir).as_posix()] = (len(text.encode("utf-8")),
+                                                             len(minified.encode("utf-8")))
+    for page, (before, after) in sorted(results.items()):
+        saved = before - after
+        print(f"[OK] Minified {page}: {format_bytes(before)} -> {format_bytes(after)} "
+              f"(-{format_bytes(saved)}, {saved * 100 / max(before, 1):.0f}%)")
+    return results
+
+
+def referenced_shared_files(output_dir: Path, app_dir: Path, files: dict) -> dict:
+    """{path relative to app_dir: path} of _shared/ files the app's text files reference, transitively."""
+    shared_dir = output_dir / SHARED_DIR_NAME
+    if not shared_dir.is_dir():
+        return {}
+    shared_files = {p.name: p for p in sorted(shared_dir.rglob("*"))
+                    if p.is_file() and not p.name.endswith(PRECACHE_EXCLUDE_SUFFIXES)}
+    found = {}
+    pending = [path for path in files.values() if path.suffix in TEXT_ASSET_SUFFIXES]
+    while pending:
+        text = pending.pop().read_text(encoding="utf-8", errors="replace")
+        for name, path in shared_files.items():
+            rel = os.path.relpath(path, app_dir).replace(os.sep, "/")
+            if name in text and rel not in found:
+                found[rel] = path
+                if path.suffix in TEXT_ASSET_SUFFIXES:
+                    pending.append(path)
+    return found
+
+
+def add_preload_hints(output_dir: Path, apps: list) -> dict:
+    """Let each app wrapper page start downloading the app's wasm, modules and models immediately.
+
+    Without hints the browser discovers them only after the app.html iframe
+    and its loader script have run. Adds <link rel="preload" as="fetch"
+    crossorigin> for .wasm/.gguf files and <link rel="modulepreload"> for
+    .mjs files of the app (and the _shared/ files it references). The
+    iframe reuses the downloads through the HTTP cache, so this works best
+    together with --fingerprint (immutable cache headers).
+    Returns {app id: number of hints}.
+    """
+    results = {}
+    for app in apps:
+        app_dir = output_dir / app["id"]
+        index_path = app_dir / "index.html"
+        if not index_path.is_file():
+            continue
+        files = list_output_files(app_dir)
+        files.update(referenced_shared_files(output_dir, app_dir, files))
+        targets = [path for path in files.values() if path.suffix in PRELOAD_FETCH_SUFFIXES + (".mjs",)]
+        # Largest first: the main wasm bundle is the long pole
+        targets.sort(key=lambda path: (-path.stat().st_size, path.name))
+
+        hints = []
+        for path in targets:
+            url = os.path.relpath(path, app_dir).replace(os.sep, "/")
+            if path.suffix == ".mjs":
+                hints.append(f'<link rel="modulepreload" href="{html.escape(url)}">')
+            else:
+                hints.append(f'<link rel="preload" href="{html.escape(url)}" as="fetch" crossorigin>')
+
+        page = index_path.read_text(encoding="utf-8")
+        hints = [hint for hint in hints if hint not in page]
+        if hints:
+            marker = re.search(r"<title>.*?</title>", page, re.DOTALL)
+            position = marker.end() if marker else page.find("<head>") + len("<head>")
+            page = page[:position] + "".join(f"\n  {hint}" for hint in hints) + page[position:]
+            replace_file_text(index_path, page)
+        results[app["id"]] = len(hints)
+        print(f"[OK] Preload hints {app['id']}: {len(hints)}")
+    return results
+
+
+def generate_service_worker(app_id: str, version: str, entries: dict) -> str:
+    """Service worker source: precache entries ({url relative to sw.js: revision}), cache-first.
+
+    Cached responses are stored under <url>?__rev=<revision>, so a new version
+    reuses unchanged files from the previous cache instead of downloading them.
+    HTML navigations are network-first with the cache as offline fallback.
+    """
+    precache_json = json.dumps(entries, indent=2, sort_keys=True)
+    return f'''// Generated by scripts/generate-samples-page.py - do not edit
+const CACHE_PREFIX = 'skainet-{app_id}-';
+const CACHE_NAME = CACHE_PREFIX + '{version}';
+const PRECACHE = {precache_json};
+
+const revisions = new Map(
+  Object.entries(PRECACHE).map(([url, revision]) => [new URL(url, self.location).href, revision])
+);
+const cacheKey = (href, revision) => `${{href}}?__rev=${{revision}}`;
+
+self.addEventListener('install', event => {{
+  event.waitUntil((async () => {{
+    const cache = await caches.open(CACHE_NAME);
+    for (const [href, revision] of revisions) {{
+      const key = cacheKey(href, revision);
+      // Unchanged file from an older version: copy it instead of downloading again
+      const cached = await caches.match(key);
+      if (cached) {{
+        await cache.put(key, cached);
+        continue;
       }}
-    }})();
-  </script>
-</body>
-</html>
+      const response = await fetch(href, {{ cache: 'no-cache' }});
+      if (!response.ok) throw new Error(`Precache failed for ${{href}}: ${{response.status}}`);
+      await cache.put(key, response);
+    }}
+    await self.skipWaiting();
+  }})());
+}});
+
+self.addEventListener('activate', event => {{
+  event.waitUntil((async () => {{
+    for (const name of await caches.keys()) {{
+      if (name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME) await caches.delete(name);
+    }}
+    await self.clients.claim();
+  }})());
+}});
+
+self.addEventListener('fetch', event => {{
+  const request = event.request;
+  if (request.method !== 'GET') return;
+  const href = request.url.split('#')[0].split('?')[0];
+  const revision = revisions.get(href);
+
+  if (request.mode === 'navigate') {{
+    // HTML: network first, cached copy when offline
+    event.respondWith(fetch(request).catch(async () => {{
+      const cache = await caches.open(CACHE_NAME);
+      const fallback = revision ? cacheKey(href, revision) : cacheKey(href + 'index.html', revisions.get(href + 'index.html'));
+      return (await cache.match(fallback)) || Response.error();
+    }}));
+    return;
+  }}
+
+  if (revision) {{
+    // wasm, scripts, model weights, ...: cache first
+    event.respondWith((async () => {{
+      const cache = await caches.open(CACHE_NAME);
+      return (await cache.match(cacheKey(href, revision))) || fetch(request);
+    }})());
+  }}
+}});
 '''
 
 
-def wrap_app_pages(apps: list, output_dir: Path):
-    """Wrap each app's index.html with a template containing header/footer."""
+def build_service_workers(output_dir: Path, apps: list, release_tag: str = "",
+                          workers: int = DEFAULT_COPY_WORKERS) -> list:
+    """Write <app>/sw.js with a precache manifest of the app's files and register it in its index.html.
+
+    The manifest lists every file of the app (sidecars and source maps
+    excluded) plus the _shared/ files it references, with content hashes
+    as revisions. The cache version combines GITHUB_REF_NAME (release_tag)
+    and a hash of the manifest. Returns the output-relative sw.js paths.
+    """
+    written = []
     for app in apps:
-        app_id = app["id"]
-        app_dir = output_dir / app_id
+        app_dir = output_dir / app["id"]
         index_path = app_dir / "index.html"
+        if not index_path.is_file():
+            continue
+        page = index_path.read_text(encoding="utf-8")
+        if SERVICE_WORKER_REGISTRATION not in page:
+            marker = page.lower().rfind("</body>")
+            page = page[:marker] + SERVICE_WORKER_REGISTRATION + "\n" + page[marker:] if marker >= 0 \
+                else page + SERVICE_WORKER_REGISTRATION + "\n"
+            replace_file_text(index_path, page)
+
+        files = {rel: path for rel, path in list_output_files(app_dir).items()
+                 if rel != SERVICE_WORKER_NAME and not rel.endswith(PRECACHE_EXCLUDE_SUFFIXES)}
+        files.update(referenced_shared_files(output_dir, app_dir, files))
+
+        digests = hash_files(list(files.values()), workers)
+        entries = {rel: digests[path][:16] for rel, path in sorted(files.items())}
+        manifest_hash = hashlib.sha256(json.dumps(entries, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        version = f"{release_tag or 'dev'}-{manifest_hash}"
+        replace_file_text(app_dir / SERVICE_WORKER_NAME, generate_service_worker(app["id"], version, entries))
+
+        total = sum(path.stat().st_size for path in files.values())
+        print(f"[OK] Service worker {app['id']}: {len(entries)} files ({format_bytes(total)}) precached, "
+              f"version {version}")
+        written.append(f"{app['id']}/{SERVICE_WORKER_NAME}")
+    return written
+
+
+def parse_size(value) -> int:
+    """Budget size: a byte count or a string like "12MB" / "800 KB"."""
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?B?)\s*", str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    unit = match.group(2) if match.group(2).endswith("B") or not match.group(2) else match.group(2) + "B"
+    return int(float(match.group(1)) * SIZE_UNITS[unit])
+
+
+def measure_file(path: str) -> tuple:
+    """(gzip size, brotli size or None) of a file: from fresh .gz/.br sidecars, else compressed in memory."""
+    source = Path(path)
+    mtime = source.stat().st_mtime
+    sizes = []
+    data = None
+    for suffix, encode in ((".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0)),
+                           (".br", (lambda d: brotli.compress(d, quality=11)) if brotli is not None else None)):
+        sidecar = source.with_name(source.name + suffix)
+        if sidecar.exists() and sidecar.stat().st_mtime >= mtime:
+            sizes.append(sidecar.stat().st_size)
+        elif encode is None:
+            sizes.append(None)
+        else:
+            if data is None:
+                data = source.read_bytes()
+            sizes.append(min(len(data), len(encode(data))))
+    return sizes[0], sizes[1]
+
+
+def measure_site(output_dir: Path, apps: list, size_cache: dict | None = None,
+                 workers: int = DEFAULT_COPY_WORKERS) -> dict:
+    """Per-app and per-file raw/gzip/brotli sizes.
+
+    An app's files include the _shared/ files it references. Files are
+    hashed in parallel threads; compressed sizes of new content are measured
+    in a process pool and remembered in size_cache by sha256.
+    """
+    size_cache = size_cache if size_cache is not None else {}
+    groups = {}
+    for app in apps:
+        app_dir = output_dir / app["id"]
+        if app_dir.is_dir():
+            files = {rel: path for rel, path in list_output_files(app_dir).items()}
+            files.update(referenced_shared_files(output_dir, app_dir, files))
+            groups[app["id"]] = files
+    groups["(landing)"] = {
+        rel: output_dir / rel for rel in ["index.html"] if (output_dir / rel).is_file()
+    }
+    assets_dir = output_dir / "assets"
+    if assets_dir.is_dir():
+        groups["(landing)"].update({p.relative_to(output_dir).as_posix(): p for p in sorted(assets_dir.rglob("*"))
+                                    if p.is_file() and not p.name.endswith(SIDECAR_SUFFIXES)})
+
+    paths = sorted({path for files in groups.values() for path in files.values()})
+    digests = hash_files(paths, workers)
+    missing = sorted({str(path) for path in paths if digests[path] not in size_cache}, key=str)
+    if missing:
+        with ProcessPoolExecutor() as pool:
+            for path, (gz_size, br_size) in zip(missing, pool.map(measure_file, missing, chunksize=4)):
+                size_cache[digests[Path(path)]] = [gz_size, br_size]
+
+    report = {}
+    for group, files in groups.items():
+        entries = {}
+        for rel, path in sorted(files.items()):
+            gz_size, br_size = size_cache[digests[path]]
+            entries[rel] = {"raw": path.stat().st_size, "gzip": gz_size, "brotli": br_size,
+                            "sha256": digests[path]}
+        report[group] = {
+            "files": len(entries),
+            "raw": sum(e["raw"] for e in entries.values()),
+            "gzip": sum(e["gzip"] for e in entries.values()),
+            "brotli": sum(e["brotli"] for e in entries.values()) if all(
+                e["brotli"] is not None for e in entries.values()) else None,
+            "entries": entries,
+        }
+    return report
 
-        if not index_path.exists():
-            print(f"[WARN] No index.html found for {app_id}, skipping wrapper")
+
+def check_budgets(report: dict, apps: list) -> list:
+    """Compare the report with the "budget" of each webapp.json; returns violation messages.
+
+    A budget looks like {"raw": "12MB", "gzip": "4MB", "brotli": ..., "files": 40,
+    "perFile": {"*.wasm": {"gzip": "3MB"}}}.
+    """
+    violations = []
+    for app in apps:
+        budget = app.get("budget") or {}
+        totals = report.get(app["id"])
+        if not budget or totals is None:
+            continue
+        for metric in BUDGET_METRICS:
+            if metric not in budget or totals[metric] is None:
+                continue
+            limit = int(budget[metric]) if metric == "files" else parse_size(budget[metric])
+            if totals[metric] > limit:
+                shown = (lambda v: str(v)) if metric == "files" else format_bytes
+                violations.append(f"{app['id']}: {metric} {shown(totals[metric])} > budget {shown(limit)}")
+        for pattern, limits in sorted((budget.get("perFile") or {}).items()):
+            for rel, entry in totals["entries"].items():
+                if not fnmatch.fnmatchcase(rel, pattern) and not fnmatch.fnmatchcase(Path(rel).name, pattern):
+                    continue
+                for metric, value in sorted(limits.items()):
+                    if entry.get(metric) is not None and entry[metric] > parse_size(value):
+                        violations.append(f"{app['id']}/{rel}: {metric} {format_bytes(entry[metric])} "
+                                          f"> budget {format_bytes(parse_size(value))} ({pattern})")
+    return violations
+
+
+def append_size_history(history_path: Path, report: dict, release_tag: str = "") -> dict | None:
+    """Append the per-app totals to a JSON lines history file; returns the previous entry."""
+    previous = None
+    if history_path.exists():
+        with open(history_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        previous = json.loads(line)
+                    except ValueError:
+                        pass
+    entry = {
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "release_tag": release_tag,
+        "apps": {group: {k: v for k, v in totals.items() if k != "entries"} for group, totals in report.items()},
+    }
+    history_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(history_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+    return previous
+
+
+def print_size_report(report: dict, previous: dict | None = None, top: int = 5):
+    """Per-app totals (with the change since the previous history entry) and the largest files."""
+    previous_apps = (previous or {}).get("apps", {})
+    for group, totals in sorted(report.items()):
+        br_info = f", brotli {format_bytes(totals['brotli'])}" if totals["brotli"] is not None else ""
+        delta = ""
+        if group in previous_apps:
+            change = totals["raw"] - previous_apps[group]["raw"]
+            delta = f" ({'+' if change >= 0 else '-'}{format_bytes(abs(change))} raw since last build)"
+        print(f"[OK] Size {group}: {totals['files']} files, raw {format_bytes(totals['raw'])}, "
+              f"gzip {format_bytes(totals['gzip'])}{br_info}{delta}")
+        largest = sorted(totals["entries"].items(), key=lambda item: -item[1]["raw"])[:top]
+        for rel, entry in largest:
+            print(f"       {format_bytes(entry['raw']):>10} raw {format_bytes(entry['gzip']):>10} gzip  {rel}")
+
+
+def compress_file(path: str, use_brotli: bool = True) -> tuple:
+    """Write <path>.gz (and <path>.br) at maximum level unless the sidecar is already newer.
+
+    Returns (path, raw size, gzip size, brotli size or None). A sidecar that
+    would not be smaller than the file is not kept.
+    """
+    source = Path(path)
+    raw_size = source.stat().st_size
+    mtime = source.stat().st_mtime
+    data = None
+    sizes = []
+    encoders = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if use_brotli and brotli is not None:
+        encoders.append((".br", lambda d: brotli.compress(d, quality=11)))
+
+    for suffix, encode in encoders:
+        sidecar = source.with_name(source.name + suffix)
+        if sidecar.exists() and sidecar.stat().st_mtime >= mtime:
+            sizes.append(sidecar.stat().st_size)
+            continue
+        if data is None:
+            data = source.read_bytes()
+        compressed = encode(data)
+        if len(compressed) >= raw_size:
+            if sidecar.exists():
+                sidecar.unlink()
+            sizes.append(raw_size)
             continue
+        tmp_path = sidecar.with_name(f".{sidecar.name}.tmp")
+        tmp_path.write_bytes(compressed)
+        os.replace(tmp_path, sidecar)
+        sizes.append(len(compressed))
+
+    return path, raw_size, sizes[0], sizes[1] if len(sizes) > 1 else None
 
-        # Rename original index.html to app.html
-        app_path = app_dir / "app.html"
-        shutil.move(index_path, app_path)
-        print(f"[OK] Renamed {app_id}/index.html -> app.html")
 
-        # Generate wrapper index.html
-        wrapper_html = generate_app_wrapper(app)
-        with open(index_path, "w", encoding="utf-8") as f:
-            f.write(wrapper_html)
-        print(f"[OK] Created wrapper for {app_id}")
+def compress_site(output_dir: Path, workers: int | None = None, use_brotli: bool = True) -> dict:
+    """Precompress eligible site files into .gz/.br sidecars in a process pool.
 
+    Prints raw and compressed sizes per top-level directory (one per app).
+    """
+    if use_brotli and brotli is None:
+        print("[WARN] brotli module not installed, writing gzip sidecars only (pip install brotli)")
 
-def generate_html(apps: list, release_tag: str = "", base_url: str = "https://examples.skainet.sk") -> str:
-    """Generate the complete HTML page with embedded CSS and JS."""
+    candidates = []
+    for item in sorted(output_dir.rglob("*")):
+        if not item.is_file() or item.name.startswith("."):
+            continue
+        if item.name.endswith(SIDECAR_SUFFIXES):
+            # Sidecar of a file that no longer exists
+            if not item.with_name(item.name[:-3]).exists():
+                item.unlink()
+            continue
+        if item.suffix.lower() in COMPRESSIBLE_SUFFIXES and item.stat().st_size >= MIN_COMPRESS_SIZE:
+            candidates.append(str(item))
+
+    totals = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, raw_size, gz_size, br_size in pool.map(compress_file, candidates,
+                                                          [use_brotli] * len(candidates), chunksize=4):
+            rel = Path(path).relative_to(output_dir)
+            group = rel.parts[0] if len(rel.parts) > 1 else "(site)"
+            entry = totals.setdefault(group, {"files": 0, "raw": 0, "gz": 0, "br": 0})
+            entry["files"] += 1
+            entry["raw"] += raw_size
+            entry["gz"] += gz_size
+            entry["br"] += br_size if br_size is not None else gz_size
+
+    for group, entry in sorted(totals.items()):
+        br_info = f", brotli {format_bytes(entry['br'])}" if use_brotli and brotli is not None else ""
+        print(f"[OK] Compressed {group}: {entry['files']} files, raw {format_bytes(entry['raw'])}, "
+              f"gzip {format_bytes(entry['gz'])}{br_info}")
+    return totals
+
+
+def normalize_mtimes(output_dir: Path, epoch: int) -> int:
+    """Set the mtime of every file and directory in output_dir to epoch."""
+    count = 0
+    for dirpath, _, filenames in os.walk(output_dir, topdown=False):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (epoch, epoch), follow_symlinks=False)
+            count += 1
+        os.utime(dirpath, (epoch, epoch))
+    return count
+
+
+def write_site_manifest(output_dir: Path, epoch: int | None = None, workers: int = DEFAULT_COPY_WORKERS) -> dict:
+    """Write _manifest.json: {path: sha256 and size} of every deployed file, sorted by path.
+
+    A deploy step can upload only the paths whose hash differs from the
+    manifest of the previous deploy. The manifest itself is not listed.
+    Returns {"files", "added", "changed", "removed"} relative to the
+    manifest found in output_dir before this build.
+    """
+    manifest_path = output_dir / SITE_MANIFEST_NAME
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            previous = json.load(f).get("files", {})
+    except (OSError, ValueError, AttributeError):
+        previous = {}
+
+    files = {}
+    for dirpath, _, filenames in os.walk(output_dir):
+        for name in filenames:
+            path = Path(dirpath) / name
+            rel = path.relative_to(output_dir).as_posix()
+            if rel != SITE_MANIFEST_NAME:
+                files[rel] = path
+    digests = hash_files(sorted(files.values()), workers)
+    entries = {rel: {"sha256": digests[path], "size": path.stat().st_size} for rel, path in sorted(files.items())}
+    manifest = {"version": SITE_MANIFEST_VERSION, "source_date_epoch": epoch, "files": entries}
+    replace_file_text(manifest_path, json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+
+    summary = {
+        "files": len(entries),
+        "added": sum(1 for rel in entries if rel not in previous),
+        "changed": sum(1 for rel, entry in entries.items()
+                       if rel in previous and previous[rel].get("sha256") != entry["sha256"]),
+        "removed": sum(1 for rel in previous if rel not in entries),
+    }
+    print(f"[OK] Manifest {manifest_path}: {summary['files']} files, {summary['added']} added, "
+          f"{summary['changed']} changed, {summary['removed']} removed since the last build")
+    return summary
+
+
+def compile_template(source: str):
+    """Compile template source into a render(context) function.
+
+    {{ name }} is replaced by the HTML-escaped context value, {{ name|raw }}
+    by the value as-is. Everything else, braces included, is literal text.
+    """
+    parts = TEMPLATE_PLACEHOLDER.split(source)
+    literals, names, raw_flags = parts[0::3], parts[1::3], parts[2::3]
+    fields = list(zip(names, [bool(flag) for flag in raw_flags], literals[1:]))
+
+    def render(context: dict) -> str:
+        out = [literals[0]]
+        for name, raw, literal in fields:
+            value = str(context[name])
+            out.append(value if raw else html.escape(value))
+            out.append(literal)
+        return "".join(out)
+
+    return render
+
+
+def load_template(name: str, templates_dir: Path = TEMPLATES_DIR):
+    """Compiled render function of templates_dir/name, recompiled only when the file changes."""
+    path = templates_dir / name
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _compiled_templates.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, compile_template(path.read_text(encoding="utf-8")))
+        _compiled_templates[path] = cached
+    return cached[1]
+
+
+def render_partial(name: str, context: dict | None = None, templates_dir: Path = TEMPLATES_DIR) -> str:
+    """Render templates_dir/partials/name (markup fragments shared by the page templates)."""
+    return load_template(f"partials/{name}", templates_dir)(context or {})
+
+
+def app_wrapper_context(app: dict, templates_dir: Path = TEMPLATES_DIR) -> dict:
+    """Values for templates/app-wrapper.html."""
+    source_button = ""
+    if app.get("sourceUrl"):
+        source_button = render_partial("wrapper-source-link.html", {
+            "source_url": app["sourceUrl"],
+            "github_icon": render_partial("icon-github.svg", templates_dir=templates_dir),
+        }, templates_dir)
+    return {"app_name": app["name"], "source_button": source_button, "year": build_date().year}
+
+
+def wrap_app_pages(apps: list, output_dir: Path, templates_dir: Path = TEMPLATES_DIR) -> int:
+    """Render the wrapper page (header, footer, app.html iframe) of every app in one batch.
+
+    An app's dist ships app.html plus a static copy of the wrapper as
+    index.html, for running the app on its own; the generated wrapper
+    replaces that copy, so every demo gets the same header with its real
+    source link and build year. A dist with only an index.html has it
+    renamed to app.html first. Returns the number of wrapped apps.
+    """
+    render = load_template("app-wrapper.html", templates_dir)
+    wrapped = 0
+    for app in apps:
+        app_dir = output_dir / app["id"]
+        index_path = app_dir / "index.html"
+        app_path = app_dir / "app.html"
+        if not app_path.exists():
+            if not index_path.exists():
+                print(f"[WARN] No index.html found for {app['id']}, skipping wrapper")
+                continue
+            os.replace(index_path, app_path)
+        replace_file_text(index_path, render(app_wrapper_context(app, templates_dir)))
+        wrapped += 1
+    print(f"[OK] Rendered {wrapped} app wrapper pages")
+    return wrapped
+
+
+def card_renderer_script(projects_json: str, templates_dir: Path = TEMPLATES_DIR) -> str:
+    """Client-side card renderer (default mode): cards are built from the embedded project data."""
+    return render_partial("card-renderer.js", {
+        "eager_screenshots": EAGER_SCREENSHOTS,
+        "screenshot_placeholder": render_partial("screenshot-placeholder.html", templates_dir=templates_dir),
+        "projects_json": projects_json,
+    }, templates_dir)
+
+
+def render_project_cards(projects: list, templates_dir: Path = TEMPLATES_DIR) -> str:
+    """Card markup built at generation time (--prerender), identical to what renderProjectCards produces."""
+    if not projects:
+        return render_partial("cards-empty.html", templates_dir=templates_dir)
+
+    icons = {
+        "github_icon": render_partial("icon-github.svg", templates_dir=templates_dir),
+        "play_icon": render_partial("icon-play.svg", templates_dir=templates_dir),
+    }
+    cards = []
+    for index, project in enumerate(projects):
+        images = project.get("screenshotImages")
+        if index < EAGER_SCREENSHOTS:
+            loading = 'loading="eager"' + (' fetchpriority="high"' if index == 0 else "")
+        else:
+            loading = 'loading="lazy"'
+        if images:
+            sources = "".join(
+                render_partial("card-picture-source.html", {**source, "sizes": images["sizes"]}, templates_dir)
+                for source in images["sources"]
+            )
+            screenshot_html = render_partial("card-picture.html", {
+                **images, "sources": sources, "screenshot": project["screenshot"], "loading": loading,
+                "name": project["name"],
+            }, templates_dir)
+        elif project.get("screenshot"):
+            screenshot_html = render_partial("card-img.html", {
+                "screenshot": project["screenshot"], "loading": loading, "name": project["name"],
+            }, templates_dir)
+        else:
+            screenshot_html = render_partial("screenshot-placeholder.html", templates_dir=templates_dir)
 
-    # Generate project cards data for JavaScript
-    projects_json = json.dumps([
+        if project.get("sourceUrl"):
+            source_btn = render_partial("card-source-link.html", {**icons, "source_url": project["sourceUrl"]},
+                                        templates_dir)
+        else:
+            source_btn = render_partial("card-source-disabled.html", icons, templates_dir)
+        demo_btn = render_partial("card-demo-link.html", {**icons, "demo_url": project["demoUrl"]}, templates_dir)
+
+        cards.append(render_partial("card.html", {
+            "id": project["id"],
+            "name": project["name"],
+            "description": project["description"] or "",
+            "screenshot_html": screenshot_html,
+            "source_button": source_btn,
+            "demo_button": demo_btn,
+        }, templates_dir))
+    return "".join(cards)
+
+
+def generate_html(apps: list, release_tag: str = "", base_url: str = "https://examples.skainet.sk",
+                  prerender: bool = False, templates_dir: Path = TEMPLATES_DIR) -> str:
+    """Generate the complete HTML page (templates/samples-page.html) with embedded CSS and JS.
+
+    With prerender=True the project cards are emitted as static markup and
+    the page ships no card rendering script or project data.
+    """
+
+    # Project cards data (embedded for JavaScript, or rendered here)
+    projects = [
         {
             "id": app["id"],
             "name": app["name"],
             "description": app["description"],
             "screenshot": app.get("screenshot_url") or app.get("screenshot"),
+            "screenshotImages": app.get("screenshot_images"),
             "sourceUrl": app.get("sourceUrl"),
             "demoUrl": f"./{app['id']}/"
         }
         for app in apps
-    ], indent=2)
+    ]
+    if prerender:
+        cards_html = render_project_cards(projects, templates_dir)
+        cards_script = ""
+    else:
+        cards_html = "<!-- Cards will be rendered here dynamically -->"
+        cards_script = card_renderer_script(json.dumps(projects, indent=2), templates_dir)
 
     release_info = f'<span class="release-tag">Release: {html.escape(release_tag)}</span>' if release_tag else ""
 
-    return f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1.0">
-  <title>Example Projects - SKaiNET</title>
-  <meta name="description" content="Explore sample applications built with SKaiNET ML framework for Kotlin Multiplatform">
-  <link rel="preconnect" href="https://fonts.googleapis.com">
-  <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
-  <link href="https://fonts.googleapis.com/css2?family=Orbitron:wght@400;500;600;700&family=Inter:wght@300;400;500&display=swap" rel="stylesheet">
-  <style>
-    /* CSS Variables - Dark theme (default) */
-    :root {{
-      --background: 220 20% 4%;
-      --foreground: 0 0% 95%;
-      --card: 220 18% 8%;
-      --card-foreground: 0 0% 95%;
-      --primary: 0 72% 51%;
-      --primary-foreground: 0 0% 100%;
-      --secondary: 220 15% 15%;
-      --secondary-foreground: 0 0% 85%;
-      --muted: 220 15% 12%;
-      --muted-foreground: 220 10% 50%;
-      --border: 220 15% 18%;
-      --radius: 0.5rem;
-    }}
-
-    /* Light theme */
-    .light {{
-      --background: 0 0% 98%;
-      --foreground: 220 20% 10%;
-      --card: 0 0% 100%;
-      --card-foreground: 220 20% 10%;
-      --primary: 0 72% 51%;
-      --primary-foreground: 0 0% 100%;
-      --secondary: 220 15% 95%;
-      --secondary-foreground: 220 20% 20%;
-      --muted: 220 15% 95%;
-      --muted-foreground: 220 10% 45%;
-      --border: 220 15% 88%;
-    }}
-
-    /* Reset & Base */
-    *, *::before, *::after {{
-      box-sizing: border-box;
-      margin: 0;
-      padding: 0;
-    }}
-
-    body {{
-      font-family: 'Inter', sans-serif;
-      background-color: hsl(var(--background));
-      color: hsl(var(--foreground));
-      min-height: 100vh;
-      -webkit-font-smoothing: antialiased;
-      -moz-osx-font-smoothing: grayscale;
-    }}
-
-    .font-orbitron {{
-      font-family: 'Orbitron', sans-serif;
-    }}
-
-    /* Layout */
-    .container {{
-      max-width: 1400px;
-      margin: 0 auto;
-      padding: 0 1rem;
-    }}
-
-    /* Header */
-    .header {{
-      border-bottom: 1px solid hsl(var(--border) / 0.5);
-      background-color: hsl(var(--background) / 0.8);
-      backdrop-filter: blur(8px);
-      position: sticky;
-      top: 0;
-      z-index: 40;
-    }}
-
-    .header-content {{
-      display: flex;
-      align-items: center;
-      justify-content: space-between;
-      padding: 1rem;
-    }}
-
-    .logo-link {{
-      display: flex;
-      align-items: center;
-      gap: 0.75rem;
-      text-decoration: none;
-      transition: opacity 0.2s;
-    }}
-
-    .logo-link:hover {{
-      opacity: 0.8;
-    }}
-
-    .logo-img {{
-      height: 2.5rem;
-      width: auto;
-    }}
-
-    .logo-text {{
-      font-size: 1.25rem;
-      font-weight: 700;
-      color: hsl(var(--foreground));
-    }}
-
-    .logo-text .highlight {{
-      color: hsl(var(--primary));
-    }}
-
-    /* Theme Toggle */
-    .theme-toggle {{
-      position: fixed;
-      bottom: 1rem;
-      right: 1rem;
-      z-index: 50;
-    }}
-
-    .theme-toggle-btn {{
-      display: flex;
-      align-items: center;
-      justify-content: center;
-      width: 2.5rem;
-      height: 2.5rem;
-      border-radius: 50%;
-      border: 1px solid hsl(var(--border));
-      background-color: hsl(var(--card));
-      color: hsl(var(--foreground));
-      cursor: pointer;
-      transition: all 0.2s;
-    }}
-
-    .theme-toggle-btn:hover {{
-      background-color: hsl(var(--muted));
-    }}
-
-    /* Buttons - Mobile-friendly touch targets */
-    .btn {{
-      display: inline-flex;
-      align-items: center;
-      justify-content: center;
-      gap: 0.5rem;
-      padding: 0.75rem 1.25rem;
-      min-height: 44px; /* iOS recommended touch target */
-      font-size: 0.9rem;
-      font-weight: 500;
-      border-radius: var(--radius);
-      cursor: pointer;
-      transition: all 0.2s;
-      text-decoration: none;
-      border: none;
-    }}
-
-    .btn-ghost {{
-      background: transparent;
-      color: hsl(var(--foreground));
-    }}
-
-    .btn-ghost:hover {{
-      background-color: hsl(var(--muted));
-    }}
-
-    .btn-outline {{
-      background: transparent;
-      border: 1px solid hsl(var(--border));
-      color: hsl(var(--foreground));
-    }}
-
-    .btn-outline:hover {{
-      background-color: hsl(var(--muted));
-    }}
-
-    .btn-primary {{
-      background-color: hsl(var(--primary));
-      color: hsl(var(--primary-foreground));
-      border: none;
-    }}
-
-    .btn-primary:hover {{
-      background-color: hsl(var(--primary) / 0.9);
-    }}
-
-    .btn:disabled {{
-      opacity: 0.5;
-      cursor: not-allowed;
-    }}
-
-    .icon {{
-      width: 1rem;
-      height: 1rem;
-    }}
-
-    /* Content Section - Mobile optimized */
-    .content {{
-      padding: 2rem 1rem;
-    }}
-
-    @media (min-width: 640px) {{
-      .content {{
-        padding: 3rem 1.5rem;
-      }}
-    }}
-
-    .content-header {{
-      text-align: center;
-      margin-bottom: 2rem;
-    }}
-
-    @media (min-width: 640px) {{
-      .content-header {{
-        margin-bottom: 3rem;
-      }}
-    }}
-
-    .content-title {{
-      font-size: 1.75rem;
-      font-weight: 700;
-      color: hsl(var(--foreground));
-    }}
-
-    @media (min-width: 640px) {{
-      .content-title {{
-        font-size: 2.25rem;
-      }}
-    }}
-
-    @media (min-width: 768px) {{
-      .content-title {{
-        font-size: 3rem;
-      }}
-    }}
-
-    .content-subtitle {{
-      margin-top: 1rem;
-      font-size: 1.125rem;
-      color: hsl(var(--muted-foreground));
-    }}
+    return load_template("samples-page.html", templates_dir)({
+        "release_info": release_info,
+        "cards_html": cards_html,
+        "year": build_date().year,
+        "github_icon": render_partial("icon-github.svg", templates_dir=templates_dir),
+        "play_icon": render_partial("icon-play.svg", templates_dir=templates_dir),
+        "cards_script": cards_script,
+    })
 
-    .release-tag {{
-      display: inline-block;
-      margin-top: 0.75rem;
-      padding: 0.25rem 0.75rem;
-      font-size: 0.75rem;
-      font-weight: 500;
-      text-transform: uppercase;
-      letter-spacing: 0.05em;
-      background-color: hsl(var(--primary) / 0.1);
-      color: hsl(var(--primary));
-      border-radius: 999px;
-      border: 1px solid hsl(var(--primary) / 0.3);
-    }}
 
-    /* Cards Grid - Mobile first, scalable layout */
-    .cards-grid {{
-      display: grid;
-      gap: 1.5rem;
-      grid-template-columns: 1fr;
-      max-width: 500px;
-      margin: 0 auto;
-    }}
-
-    /* Tablet: 2 cards side by side, centered */
-    @media (min-width: 640px) {{
-      .cards-grid {{
-        grid-template-columns: repeat(auto-fit, minmax(min(100%, 320px), 1fr));
-        max-width: 720px;
-      }}
-    }}
-
-    /* Desktop: allow up to 3 cards, centered */
-    @media (min-width: 1024px) {{
-      .cards-grid {{
-        grid-template-columns: repeat(auto-fit, minmax(320px, 1fr));
-        max-width: 1100px;
-      }}
-    }}
-
-    /* Large desktop: cap at 3 columns for readability */
-    @media (min-width: 1200px) {{
-      .cards-grid {{
-        grid-template-columns: repeat(3, 1fr);
-        max-width: 1200px;
-      }}
-    }}
-
-    /* Project Card */
-    .project-card {{
-      position: relative;
-      display: flex;
-      flex-direction: column;
-      height: 100%;
-      overflow: hidden;
-      border-radius: var(--radius);
-      border: 1px solid hsl(var(--border) / 0.5);
-      background-color: hsl(var(--card) / 0.5);
-      backdrop-filter: blur(8px);
-      transition: all 0.3s;
-    }}
-
-    .project-card:hover {{
-      border-color: hsl(var(--primary) / 0.5);
-      box-shadow: 0 10px 40px hsl(var(--primary) / 0.1);
-      transform: translateY(-4px);
-    }}
-
-    .project-card::before {{
-      content: '';
-      position: absolute;
-      inset: 0;
-      background: linear-gradient(to bottom right, hsl(var(--primary) / 0.05), transparent);
-      opacity: 0;
-      transition: opacity 0.3s;
-      pointer-events: none;
-    }}
-
-    .project-card:hover::before {{
-      opacity: 1;
-    }}
-
-    /* Card Screenshot */
-    .card-screenshot {{
-      position: relative;
-      aspect-ratio: 16 / 9;
-      width: 100%;
-      overflow: hidden;
-      background-color: hsl(var(--muted) / 0.3);
-    }}
-
-    .card-screenshot img {{
-      width: 100%;
-      height: 100%;
-      object-fit: cover;
-      transition: transform 0.3s;
-    }}
-
-    .project-card:hover .card-screenshot img {{
-      transform: scale(1.05);
-    }}
-
-    .card-screenshot-placeholder {{
-      display: flex;
-      height: 100%;
-      width: 100%;
-      align-items: center;
-      justify-content: center;
-    }}
-
-    .card-screenshot-placeholder-content {{
-      text-align: center;
-      color: hsl(var(--muted-foreground) / 0.5);
-    }}
-
-    .card-screenshot-placeholder-icon {{
-      margin: 0 auto 0.5rem;
-      height: 3rem;
-      width: 3rem;
-      border-radius: var(--radius);
-      background-color: hsl(var(--muted) / 0.5);
-      display: flex;
-      align-items: center;
-      justify-content: center;
-    }}
-
-    .card-screenshot-placeholder-text {{
-      font-size: 0.75rem;
-    }}
-
-    .card-screenshot-overlay {{
-      position: absolute;
-      inset: 0;
-      background: linear-gradient(to top, hsl(var(--card) / 0.8), transparent);
-    }}
-
-    /* Card Header */
-    .card-header {{
-      position: relative;
-      flex-grow: 1;
-      padding: 1.5rem;
-      padding-bottom: 0.5rem;
-    }}
-
-    .card-header-row {{
-      display: flex;
-      align-items: flex-start;
-      justify-content: space-between;
-      gap: 0.5rem;
-    }}
-
-    .card-title {{
-      font-size: 1.125rem;
-      font-weight: 600;
-      color: hsl(var(--foreground));
-    }}
-
-    .card-badge {{
-      display: inline-flex;
-      align-items: center;
-      padding: 0.25rem 0.5rem;
-      font-size: 0.625rem;
-      font-weight: 600;
-      text-transform: uppercase;
-      letter-spacing: 0.05em;
-      color: hsl(var(--primary));
-      background-color: hsl(var(--primary) / 0.1);
-      border-radius: 999px;
-      white-space: nowrap;
-    }}
-
-    .card-description {{
-      margin-top: 0.5rem;
-      font-size: 0.875rem;
-      color: hsl(var(--muted-foreground));
-      line-height: 1.5;
-    }}
-
-    /* Card Footer - Stack on mobile, side-by-side on larger */
-    .card-footer {{
-      position: relative;
-      display: flex;
-      flex-direction: column;
-      gap: 0.75rem;
-      padding: 1rem 1.5rem 1.5rem;
-    }}
-
-    .card-footer .btn {{
-      flex: 1;
-      width: 100%;
-    }}
-
-    @media (min-width: 400px) {{
-      .card-footer {{
-        flex-direction: row;
-      }}
-      .card-footer .btn {{
-        width: auto;
-      }}
-    }}
-
-    /* Footer */
-    .footer {{
-      border-top: 1px solid hsl(var(--border) / 0.5);
-      padding: 2rem 1rem;
-      text-align: center;
-    }}
-
-    .footer-content {{
-      font-size: 0.875rem;
-      color: hsl(var(--muted-foreground));
-    }}
-
-    /* Empty State */
-    .empty-state {{
-      text-align: center;
-      padding: 4rem 2rem;
-      color: hsl(var(--muted-foreground));
-    }}
-
-    .empty-state-icon {{
-      font-size: 3rem;
-      margin-bottom: 1rem;
-    }}
-  </style>
-</head>
-<body>
-  <!-- Theme Toggle -->
-  <div class="theme-toggle">
-    <button class="theme-toggle-btn" onclick="toggleTheme()" aria-label="Toggle theme">
-      <svg class="icon-sun" xmlns="http://www.w3.org/2000/svg" width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-        <circle cx="12" cy="12" r="4"></circle>
-        <path d="M12 2v2"></path>
-        <path d="M12 20v2"></path>
-        <path d="m4.93 4.93 1.41 1.41"></path>
-        <path d="m17.66 17.66 1.41 1.41"></path>
-        <path d="M2 12h2"></path>
-        <path d="M20 12h2"></path>
-        <path d="m6.34 17.66-1.41 1.41"></path>
-        <path d="m19.07 4.93-1.41 1.41"></path>
-      </svg>
-    </button>
-  </div>
-
-  <!-- Header -->
-  <header class="header">
-    <div class="container header-content">
-      <a href="https://skainet.sk" class="logo-link">
-        <img src="assets/logo.png" alt="SKaiNET" class="logo-img">
-        <span class="font-orbitron logo-text">SK<span class="highlight">ai</span>NET</span>
-      </a>
-
-      <a href="https://skainet.sk" class="btn btn-ghost">
-        <svg class="icon" xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-          <path d="m12 19-7-7 7-7"></path>
-          <path d="M19 12H5"></path>
-        </svg>
-        Back to Home
-      </a>
-    </div>
-  </header>
-
-  <!-- Content -->
-  <main class="content">
-    <div class="container">
-      <div class="content-header">
-        <h1 class="font-orbitron content-title">Example Projects</h1>
-        <p class="content-subtitle">Explore sample applications built with SKaiNET ML framework</p>
-        {release_info}
-      </div>
-
-      <div id="cards-container" class="cards-grid">
-        <!-- Cards will be rendered here dynamically -->
-      </div>
-    </div>
-  </main>
-
-  <!-- Footer -->
-  <footer class="footer">
-    <div class="container footer-content">
-      &copy; {datetime.now().year} SKaiNET. All rights reserved.
-    </div>
-  </footer>
-
-  <!-- SVG Icon Templates -->
-  <template id="github-icon">
-    <svg class="icon" xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-      <path d="M15 22v-4a4.8 4.8 0 0 0-1-3.5c3 0 6-2 6-5.5.08-1.25-.27-2.48-1-3.5.28-1.15.28-2.35 0-3.5 0 0-1 0-3 1.5-2.64-.5-5.36-.5-8 0C6 2 5 2 5 2c-.3 1.15-.3 2.35 0 3.5A5.403 5.403 0 0 0 4 9c0 3.5 3 5.5 6 5.5-.39.49-.68 1.05-.85 1.65-.17.6-.22 1.23-.15 1.85v4"></path>
-      <path d="M9 18c-4.51 2-5-2-7-2"></path>
-    </svg>
-  </template>
-
-  <template id="play-icon">
-    <svg class="icon" xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
-      <polygon points="6 3 20 12 6 21 6 3"></polygon>
-    </svg>
-  </template>
-
-  <script>
-    // Theme management
-    function toggleTheme() {{
-      document.documentElement.classList.toggle('light');
-      localStorage.setItem('theme', document.documentElement.classList.contains('light') ? 'light' : 'dark');
-    }}
-
-    // Initialize theme from localStorage
-    (function() {{
-      const savedTheme = localStorage.getItem('theme');
-      if (savedTheme === 'light') {{
-        document.documentElement.classList.add('light');
-      }}
-    }})();
-
-    // Escape HTML to prevent XSS
-    function escapeHtml(str) {{
-      if (!str) return '';
-      const div = document.createElement('div');
-      div.textContent = str;
-      return div.innerHTML;
-    }}
-
-    // Render project cards
-    function renderProjectCards(projects) {{
-      const container = document.getElementById('cards-container');
-      if (!container) return;
-
-      if (projects.length === 0) {{
-        container.innerHTML = `
-          <div class="empty-state" style="grid-column: 1 / -1;">
-            <div class="empty-state-icon">📦</div>
-            <p>No sample applications found.</p>
-          </div>
-        `;
-        return;
-      }}
+def write_landing_page(apps: list, output_dir: Path, release_tag: str = "", prerender: bool = False) -> Path:
+    """Generate the landing page and write it to output_dir/index.html."""
+    html_content = generate_html(apps, release_tag, prerender=prerender)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    index_path = output_dir / "index.html"
+    replace_file_text(index_path, html_content)
+    return index_path
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler for --watch: wasm MIME types, cross-origin isolation, live reload."""
+
+    extensions_map = {
+        **SimpleHTTPRequestHandler.extensions_map,
+        **ASSET_MIME_TYPES,
+        ".js": "text/javascript",
+        ".json": "application/json",
+    }
+    reload_state = None  # LiveReloadState, set by serve_site
+
+    def end_headers(self):
+        # SharedArrayBuffer (wasm threads) requires a cross-origin isolated page
+        self.send_header("Cross-Origin-Opener-Policy", "same-origin")
+        self.send_header("Cross-Origin-Embedder-Policy", "require-corp")
+        self.send_header("Cross-Origin-Resource-Policy", "same-origin")
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
 
-      const githubIcon = document.getElementById('github-icon').innerHTML;
-      const playIcon = document.getElementById('play-icon').innerHTML;
-
-      container.innerHTML = projects.map(project => {{
-        const screenshotHtml = project.screenshot
-          ? `<img src="${{escapeHtml(project.screenshot)}}" alt="${{escapeHtml(project.name)}} screenshot">`
-          : `<div class="card-screenshot-placeholder">
-              <div class="card-screenshot-placeholder-content">
-                <div class="card-screenshot-placeholder-icon">
-                  <svg xmlns="http://www.w3.org/2000/svg" width="24" height="24" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="1.5">
-                    <rect width="18" height="18" x="3" y="3" rx="2" ry="2"></rect>
-                    <circle cx="9" cy="9" r="2"></circle>
-                    <path d="m21 15-3.086-3.086a2 2 0 0 0-2.828 0L6 21"></path>
-                  </svg>
-                </div>
-                <p class="card-screenshot-placeholder-text">No preview</p>
-              </div>
-            </div>`;
-
-        const sourceBtn = project.sourceUrl
-          ? `<a href="${{escapeHtml(project.sourceUrl)}}" class="btn btn-outline" target="_blank" rel="noopener noreferrer">
-              ${{githubIcon}}
-              Source
-            </a>`
-          : `<button class="btn btn-outline" disabled>
-              ${{githubIcon}}
-              Source
-            </button>`;
-
-        const demoBtn = project.demoUrl
-          ? `<a href="${{escapeHtml(project.demoUrl)}}" class="btn btn-primary">
-              ${{playIcon}}
-              Try Demo
-            </a>`
-          : `<button class="btn btn-primary" disabled>
-              ${{playIcon}}
-              Try Demo
-            </button>`;
-
-        return `
-          <article class="project-card" data-project-id="${{escapeHtml(project.id)}}">
-            <div class="card-screenshot">
-              ${{screenshotHtml}}
-              <div class="card-screenshot-overlay"></div>
-            </div>
-            <div class="card-header">
-              <div class="card-header-row">
-                <h2 class="card-title">${{escapeHtml(project.name)}}</h2>
-                <span class="card-badge">${{escapeHtml(project.id)}}</span>
-              </div>
-              <p class="card-description">${{escapeHtml(project.description)}}</p>
-            </div>
-            <div class="card-footer">
-              ${{sourceBtn}}
-              ${{demoBtn}}
-            </div>
-          </article>
-        `;
-      }}).join('');
-    }}
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            self.stream_reload_events()
+            return
+        url_path = self.path.split("?", 1)[0].split("#", 1)[0]
+        path = Path(self.translate_path(self.path))
+        if path.is_dir() and url_path.endswith("/"):
+            path = path / "index.html"
+        # Directories without a trailing slash fall through to the base class redirect
+        if path.suffix == ".html" and path.is_file():
+            body = path.read_bytes()
+            marker = body.lower().rfind(b"</body>")
+            body = body[:marker] + LIVE_RELOAD_SCRIPT + body[marker:] if marker >= 0 else body + LIVE_RELOAD_SCRIPT
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        state = self.reload_state
+        with state.changed:
+            seen = state.version
+        try:
+            while True:
+                with state.changed:
+                    state.changed.wait_for(lambda: state.version != seen, timeout=15)
+                    version = state.version
+                if version != seen:
+                    seen = version
+                    self.wfile.write(b"data: reload\n\n")
+                else:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class LiveReloadState:
+    """Build counter shared between the watcher and the live reload event streams."""
+
+    def __init__(self):
+        self.version = 0
+        self.changed = threading.Condition()
+
+    def bump(self):
+        with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+
+def serve_site(output_dir: Path, host: str, port: int, reload_state: LiveReloadState) -> ThreadingHTTPServer:
+    """Serve output_dir in a background thread."""
+    handler = type("Handler", (DevRequestHandler,), {"reload_state": reload_state})
+    server = ThreadingHTTPServer((host, port), partial(handler, directory=str(output_dir)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[OK] Serving {output_dir} at http://{host}:{server.server_address[1]}/ (live reload enabled)")
+    return server
+
+
+def watch_state(root_dir: Path, apps: list, args) -> dict:
+    """Fingerprints of everything --watch reacts to: each app's dist, the webapp.json set, templates/."""
+    skip_dirs = generated_dirs(args)
+    configs = None if args.no_git_scan else git_webapp_configs(root_dir, args.exclude, args.max_depth, skip_dirs)
+    if configs is None:
+        configs = scan_webapp_configs(root_dir, args.exclude, args.max_depth, skip_dirs)
+    return {
+        "configs": stat_fingerprint({str(p): p for p in configs}),
+        "templates": templates_fingerprint(root_dir),
+        "page_templates": templates_fingerprint(TEMPLATES_DIR.parent),
+        "apps": {app["id"]: dist_fingerprint(app) for app in apps},
+    }
+
+
+def start_watchdog(root_dir: Path, wake: threading.Event):
+    """Wake the watch loop on file system events (inotify & co.) if watchdog is installed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
 
-    // Projects data (generated by build script)
-    const projects = {projects_json};
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            wake.set()
+
+    observer = Observer()
+    observer.schedule(Handler(), str(root_dir), recursive=True)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+def watch_site(root_dir: Path, output_dir: Path, apps: list, args, release_tag: str, fonts_dir: Path):
+    """Rebuild what changed and push live reload events until interrupted.
+
+    A dist change re-syncs only that app; a webapp.json change rescans and
+    re-syncs all apps incrementally; templates/ changes recopy the assets.
+    The landing page is regenerated in every case. With page rewriting
+    stages (--self-host-fonts, --critical-css, --preload-hints, --minify)
+    all wrapper pages are re-synced from the sources and the stages run
+    again on every page. Changes are debounced until the watched files
+    have been quiet for --debounce seconds.
+    """
+    reload_state = LiveReloadState()
+    server = serve_site(output_dir, args.host, args.port, reload_state)
+
+    wake = threading.Event()
+    observer = None if args.poll else start_watchdog(root_dir, wake)
+    mode = "file system events" if observer else f"polling every {args.poll_interval}s"
+    print(f"[INFO] Watching {root_dir} ({mode}), press Ctrl+C to stop")
+
+    rewrite_pages = args.self_host_fonts or args.critical_css or args.preload_hints or args.minify
+    state = watch_state(root_dir, apps, args)
+    try:
+        while True:
+            wake.wait(args.poll_interval)
+            wake.clear()
+            current = watch_state(root_dir, apps, args)
+            if current == state:
+                continue
 
-    // Render on load
-    document.addEventListener('DOMContentLoaded', function() {{
-      renderProjectCards(projects);
-    }});
-  </script>
-</body>
-</html>
-'''
+            # Debounce: wait until a build tool has finished writing
+            while True:
+                time.sleep(args.debounce)
+                settled = watch_state(root_dir, apps, args)
+                if settled == current:
+                    break
+                current = settled
+
+            t_start = time.perf_counter()
+            if current["configs"] != state["configs"]:
+                print("[INFO] webapp.json changed, rescanning")
+                apps[:] = find_webapp_configs(root_dir, *cached_git_info(root_dir, {}, args.branch),
+                                              exclude=args.exclude, max_depth=args.max_depth,
+                                              use_git=not args.no_git_scan, skip_dirs=generated_dirs(args))
+                changed = apps
+            else:
+                changed = [app for app in apps if current["apps"].get(app["id"]) != state["apps"].get(app["id"])]
+            if changed:
+                print(f"[INFO] Rebuilding: {', '.join(app['id'] for app in changed)}")
+            if changed or rewrite_pages:
+                # Rewritten wrapper pages differ from their sources, so syncing every app restores them
+                synced = apps if rewrite_pages else changed
+                copy_dist_files(synced, output_dir, incremental=True, workers=args.copy_workers,
+                                link_mode=args.link_mode)
+                wrap_app_pages(synced, output_dir)
+            if current["templates"] != state["templates"]:
+                copy_assets(output_dir, root_dir)
+            write_landing_page(apps, output_dir, release_tag, prerender=args.prerender)
+            if args.self_host_fonts:
+                self_host_fonts(output_dir, apps, fonts_dir)
+            if args.critical_css:
+                split_critical_css(output_dir, apps)
+            if args.preload_hints:
+                add_preload_hints(output_dir, apps)
+            if args.minify:
+                minify_site(output_dir, apps)
+
+            state = watch_state(root_dir, apps, args)
+            reload_state.bump()
+            print(f"[OK] Rebuilt in {(time.perf_counter() - t_start) * 1000:.0f} ms, reloading browsers")
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopping watch mode")
+    finally:
+        if observer is not None:
+            observer.stop()
+        server.shutdown()
 
 
 def main():
@@ -1124,35 +2899,195 @@ def main():
     parser.add_argument("--output", "-o", type=str, default="site", help="Output directory (default: site)")
     parser.add_argument("--root", "-r", type=str, default=".", help="Root directory to scan for webapp.json")
     parser.add_argument("--branch", "-b", type=str, default=None, help="Git branch for source links (auto-detected if not set)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="Skip directories/files matching this glob when scanning (repeatable)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Only scan this many directory levels below --root for webapp.json")
+    parser.add_argument("--no-git-scan", action="store_true",
+                        help="Always walk the file system instead of asking git for the webapp.json list")
+    parser.add_argument("--run-builds", action="store_true",
+                        help="Run each webapp.json build.command (skipping up-to-date apps) before an incremental build")
+    parser.add_argument("--build-jobs", type=int, default=DEFAULT_BUILD_JOBS,
+                        help=f"Builds run in parallel with --run-builds (default: {DEFAULT_BUILD_JOBS})")
+    parser.add_argument("--refs", nargs="+", default=None, metavar="REF",
+                        help="Generate <output>/<ref>/ for each git tag/ref in parallel (with --run-builds), "
+                             "sharing identical files")
+    parser.add_argument("--refs-dir", type=str, default=None,
+                        help="--refs: worktrees, content-addressed store and size histories (default: <output>-refs)")
+    parser.add_argument("--refs-jobs", type=int, default=DEFAULT_BUILD_JOBS,
+                        help=f"--refs: versions generated in parallel (default: {DEFAULT_BUILD_JOBS})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Build mode: sync dist files, copying only changed files (with --fingerprint or "
+                             f"--dedup rewrite into <output>{STAGING_SUFFIX} next to the build cache, then linked)")
+    parser.add_argument("--checksum", action="store_true", help="With --incremental: also compare file content hashes")
+    parser.add_argument("--copy-workers", type=int, default=DEFAULT_COPY_WORKERS,
+                        help=f"Build mode: number of parallel file copy threads (default: {DEFAULT_COPY_WORKERS})")
+    parser.add_argument("--link-mode", choices=LINK_MODES, default="copy",
+                        help="Build mode: how dist files are materialized in the output (default: copy)")
+    parser.add_argument("--dedup", choices=["link", "rewrite"], default=None,
+                        help="Build mode: store files shared by several apps once in _shared/ "
+                             "(link: hardlinks, rewrite: shared URLs)")
+    parser.add_argument("--responsive-images", action="store_true",
+                        help="Build mode: resized AVIF/WebP/PNG screenshots with srcset (requires Pillow)")
+    parser.add_argument("--prerender", action="store_true",
+                        help="Render the project cards into the landing page HTML instead of client-side JS")
+    parser.add_argument("--self-host-fonts", action="store_true",
+                        help="Build mode: replace Google Fonts with subsetted fonts vendored in --fonts-dir")
+    parser.add_argument("--fonts-dir", type=str, default=None,
+                        help="Vendored font files for --self-host-fonts (default: <root>/templates/fonts)")
+    parser.add_argument("--critical-css", action="store_true",
+                        help="Build mode: inline only the CSS the static markup needs, defer the rest to a shared file")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="Build mode: content-hash asset file names and write a _headers cache rules file")
+    parser.add_argument("--preload-hints", action="store_true",
+                        help="Build mode: preload each app's wasm/.mjs/model files from its wrapper page")
+    parser.add_argument("--service-worker", action="store_true",
+                        help="Build mode: per-app service worker precaching wasm, scripts and model files")
+    parser.add_argument("--compress", action="store_true",
+                        help="Build mode: write precompressed .gz (and .br, if brotli is installed) sidecars")
+    parser.add_argument("--compress-workers", type=int, default=None,
+                        help="Processes for --compress (default: CPU count)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Build, then serve the site with live reload and rebuild on changes (implies --build)")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="--watch: server address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="--watch: server port (default: 8000)")
+    parser.add_argument("--poll", action="store_true", help="--watch: poll even if watchdog is installed")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="--watch: seconds between checks (default: 1.0)")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="--watch: quiet period before rebuilding (default: 0.3)")
+    parser.add_argument("--minify", action="store_true",
+                        help="Build mode: minify the generated pages (whitespace, comments, inline CSS/JS, JSON data)")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="Build mode: pin dates and mtimes to SOURCE_DATE_EPOCH (default: HEAD commit time) "
+                             f"and write {SITE_MANIFEST_NAME} (path -> sha256)")
+    parser.add_argument("--size-report", action="store_true",
+                        help="Build mode: report raw/gzip/brotli sizes, check webapp.json budgets (exit 1 if exceeded)")
+    parser.add_argument("--size-history", type=str, default=None,
+                        help="JSON lines file the size report is appended to (default: <output>-size-history.jsonl)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Build mode: ignore the build state cache and rebuild everything")
+    parser.add_argument("--build-cache", type=str, default=None,
+                        help=f"Build state cache file (default: <output>{BUILD_CACHE_SUFFIX}, outside the output)")
     args = parser.parse_args()
+    t_start = time.perf_counter()
+    if args.watch:
+        if args.fingerprint or args.compress or args.service_worker or args.dedup == "rewrite":
+            parser.error("--watch cannot be combined with --fingerprint, --compress, --service-worker "
+                         "or --dedup rewrite")
+        args.build = True
+    if args.run_builds:
+        args.build = True
+        args.incremental = True
+    if args.reproducible:
+        if args.link_mode in ("hardlink", "symlink"):
+            parser.error("--reproducible needs --link-mode copy or reflink (mtimes of linked sources would change)")
+        if args.refs:
+            parser.error("--reproducible cannot be combined with --refs (versions share hardlinked files, "
+                         "normalizing the mtimes of one would change the others)")
+        args.build = True
 
     root_dir = Path(args.root).resolve()
     output_dir = Path(args.output).resolve()
     release_tag = os.environ.get("GITHUB_REF_NAME", "")
 
+    if args.refs:
+        if args.watch:
+            parser.error("--refs cannot be combined with --watch")
+        refs_dir = generated_dirs(args)[1]
+        failed = build_refs(root_dir, output_dir, args.refs, refs_dir, sys.argv[1:], jobs=args.refs_jobs,
+                            exclude=args.exclude)
+        if failed:
+            print(f"[ERROR] {len(failed)} versions failed: {', '.join(failed)}")
+            sys.exit(1)
+        return
+
+    source_date_epoch = None
+    if args.reproducible:
+        if not os.environ.get("SOURCE_DATE_EPOCH", "").isdigit():
+            commit_epoch = git_commit_epoch(root_dir)
+            os.environ["SOURCE_DATE_EPOCH"] = str(commit_epoch if commit_epoch is not None else 0)
+        source_date_epoch = int(os.environ["SOURCE_DATE_EPOCH"])
+        print(f"[INFO] Reproducible build: SOURCE_DATE_EPOCH={source_date_epoch}")
+
+    fonts_dir = Path(args.fonts_dir).resolve() if args.fonts_dir else root_dir / "templates" / FONTS_DIR_NAME
+
+    # Build state of the previous run: git info, parsed webapp.json files, input and output fingerprints
+    use_cache = args.build and not args.no_cache
+    cache_path = Path(args.build_cache).resolve() if args.build_cache else default_build_cache_path(output_dir)
+    cache = load_build_cache(cache_path) if use_cache else {}
+    if args.build and (output_dir / LEGACY_BUILD_CACHE_NAME).exists():
+        (output_dir / LEGACY_BUILD_CACHE_NAME).unlink()
+
     # Get git repository info for source links
-    repo_url = get_git_repo_url(root_dir)
+    repo_url, branch = cached_git_info(root_dir, cache, args.branch)
     if repo_url:
         print(f"[OK] Git repo URL: {repo_url}")
     else:
         print("[WARN] Could not detect git remote URL. Source links will be disabled.")
-
-    branch = args.branch or get_git_default_branch(root_dir)
     print(f"[OK] Using branch: {branch}")
 
     print(f"[INFO] Scanning for webapp.json in: {root_dir}")
-    apps = find_webapp_configs(root_dir, repo_url, branch)
+    meta_cache = cache.setdefault("webapp_json", {}) if use_cache else None
+    apps = find_webapp_configs(root_dir, repo_url, branch, exclude=args.exclude, max_depth=args.max_depth,
+                               use_git=not args.no_git_scan, meta_cache=meta_cache,
+                               skip_dirs=generated_dirs(args))
 
     if not apps:
         print("[WARN] No valid webapp.json files found.")
 
+    if args.run_builds:
+        failed = run_app_builds(apps, cache.setdefault("app_builds", {}), jobs=args.build_jobs,
+                                force=args.no_cache)
+        if use_cache:
+            save_build_cache(cache_path, cache)
+        if failed:
+            print(f"[ERROR] {len(failed)} builds failed: {', '.join(failed)}")
+            sys.exit(1)
+
+    if use_cache:
+        options = {
+            key: getattr(args, key)
+            for key in ("link_mode", "dedup", "responsive_images", "prerender", "self_host_fonts", "fonts_dir",
+                        "critical_css", "fingerprint", "preload_hints", "service_worker", "compress", "size_report",
+                        "minify", "reproducible", "exclude", "max_depth", "no_git_scan")
+        }
+        # The pages show the build date (copyright year)
+        options["build_year"] = build_date().year
+        options["source_date_epoch"] = os.environ.get("SOURCE_DATE_EPOCH")
+        if args.self_host_fonts:
+            # Replacing a vendored font must produce a new subset
+            options["fonts"] = tree_fingerprint(fonts_dir)
+        inputs_hash = build_inputs_hash(apps, root_dir, repo_url, branch, release_tag, options)
+        if (cache.get("inputs_hash") == inputs_hash and (output_dir / "index.html").exists()
+                and cache.get("output_fingerprint") == tree_fingerprint(output_dir)):
+            elapsed_ms = (time.perf_counter() - t_start) * 1000
+            print(f"[OK] {output_dir} is up to date ({len(apps)} apps, checked in {elapsed_ms:.0f} ms)")
+            if args.watch:
+                for app in apps:
+                    app["screenshot_url"] = cache.get("screenshot_urls", {}).get(app["id"])
+                watch_site(root_dir, output_dir, apps, args, release_tag, fonts_dir)
+            return
+
     if args.build:
         print(f"[INFO] Build mode: copying dist files to {output_dir}")
         output_dir.mkdir(parents=True, exist_ok=True)
-        copy_dist_files(apps, output_dir)
+        # Renamed or rewritten outputs never match their sources: sync an unrenamed copy instead
+        staged = args.incremental and (args.fingerprint or args.dedup == "rewrite")
+        sync_dir = cache_path.parent / f"{output_dir.name}{STAGING_SUFFIX}" if staged else output_dir
+        # Normalized mtimes never match the sources: compare contents instead
+        copy_errors = copy_dist_files(apps, sync_dir, incremental=args.incremental,
+                                      checksum=args.checksum or args.reproducible,
+                                      workers=args.copy_workers, link_mode=args.link_mode)
+        if staged:
+            count = link_staged_apps(apps, sync_dir, output_dir)
+            print(f"[OK] Linked {count} synced files from {sync_dir}")
+        wrap_app_pages(apps, output_dir)
+        if args.dedup:
+            dedup_site(apps, output_dir, mode=args.dedup, workers=args.copy_workers)
+        if args.responsive_images:
+            build_responsive_screenshots(apps, output_dir)
         copy_assets(output_dir, root_dir)
-        # Note: App wrappers are now in source (wasmJsMain/resources/index.html)
-        # No post-build wrapping needed
     else:
         # Preview mode: set screenshot URLs for local testing
         for app in apps:
@@ -1161,23 +3096,75 @@ def main():
             else:
                 app["screenshot_url"] = None
 
-    # Generate HTML
-    html_content = generate_html(apps, release_tag)
-
-    # Write to output
-    output_dir.mkdir(parents=True, exist_ok=True)
-    index_path = output_dir / "index.html"
-
-    with open(index_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    # Generate HTML and write it to the output
+    index_path = write_landing_page(apps, output_dir, release_tag, prerender=args.prerender)
 
     print(f"[OK] Generated: {index_path}")
     print(f"[OK] Total apps: {len(apps)}")
 
+    if args.build and args.self_host_fonts:
+        self_host_fonts(output_dir, apps, fonts_dir)
+
+    if args.build and args.critical_css:
+        split_critical_css(output_dir, apps)
+
+    immutable = fingerprint_site(output_dir) if args.build and args.fingerprint else []
+
+    if args.build and args.preload_hints:
+        add_preload_hints(output_dir, apps)
+
+    if args.build and args.minify:
+        minify_site(output_dir, apps)
+
+    service_workers = []
+    if args.build and args.service_worker:
+        service_workers = build_service_workers(output_dir, apps, release_tag, workers=args.copy_workers)
+
+    if args.build and (args.fingerprint or args.preload_hints):
+        write_headers_file(output_dir, immutable, revalidate=service_workers)
+
+    if args.build and args.compress:
+        compress_site(output_dir, workers=args.compress_workers)
+
+    if args.build and args.reproducible:
+        write_site_manifest(output_dir, source_date_epoch, workers=args.copy_workers)
+        count = normalize_mtimes(output_dir, source_date_epoch)
+        print(f"[OK] Normalized mtimes of {count} files to {build_date().isoformat()}")
+
     if not args.build:
         print(f"\n[TIP] Open {index_path} in a browser to preview.")
         print("[TIP] Use --build flag to copy dist files for deployment.")
 
+    if args.build and copy_errors:
+        print(f"[ERROR] {len(copy_errors)} files could not be copied")
+        sys.exit(1)
+
+    budget_violations = []
+    if args.build and args.size_report:
+        report = measure_site(output_dir, apps, cache.setdefault("sizes", {}) if use_cache else None,
+                              workers=args.copy_workers)
+        history_path = Path(args.size_history) if args.size_history else \
+            output_dir.with_name(f"{output_dir.name}-size-history.jsonl")
+        print_size_report(report, append_size_history(history_path, report, release_tag))
+        print(f"[OK] Size history: {history_path}")
+        budget_violations = check_budgets(report, apps)
+        for violation in budget_violations:
+            print(f"[ERROR] Budget exceeded: {violation}")
+
+    if use_cache:
+        # A failed budget must fail the next run too, not finish it as "up to date"
+        cache["inputs_hash"] = None if budget_violations else inputs_hash
+        cache["html_hash"] = file_digest(index_path)
+        cache["output_fingerprint"] = tree_fingerprint(output_dir)
+        cache["screenshot_urls"] = {app["id"]: app.get("screenshot_url") for app in apps}
+        save_build_cache(cache_path, cache)
+
+    if budget_violations:
+        sys.exit(1)
+
+    if args.watch:
+        watch_site(root_dir, output_dir, apps, args, release_tag, fonts_dir)
+
 
 if __name__ == "__main__":
     main()
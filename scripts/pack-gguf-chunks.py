@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+GGUF Chunk Packer
+
+Splits a GGUF model into a header/metadata chunk plus data chunks that start
+on tensor boundaries, so web demos can fetch only the tensors they need, in
+parallel, and start working as soon as the first layers have arrived.
+
+Data chunks are filled with whole tensors up to --chunk-size. A tensor larger
+than the chunk size gets chunks of its own (split at --chunk-size). Chunk
+file names contain their content hash, so they can be cached as immutable.
+
+A JSON manifest describes the chunks (byte ranges in the original file and
+sha256 of each chunk) and every tensor (type, shape, byte range and the
+chunks that hold it).
+
+Usage:
+    # Pack a model into <out-dir> (default: <model>.chunks/)
+    python scripts/pack-gguf-chunks.py pack MNISTDemo/composeApp/src/commonMain/composeResources/files/mnist_cnn.gguf
+
+    # Reassemble the chunks and compare bit-for-bit with the original
+    python scripts/pack-gguf-chunks.py verify mnist_cnn.gguf.chunks/manifest.json --original mnist_cnn.gguf
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+import sys
+from pathlib import Path
+
+GGUF_MAGIC = b"GGUF"
+GGUF_DEFAULT_ALIGNMENT = 32
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "gguf-chunks"
+MANIFEST_VERSION = 1
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# GGUF metadata value types -> struct format (fixed-size types only)
+GGUF_SCALAR_FORMATS = {
+    0: "<B", 1: "<b", 2: "<H", 3: "<h", 4: "<I", 5: "<i",
+    6: "<f", 7: "<?", 10: "<Q", 11: "<q", 12: "<d",
+}
+GGUF_TYPE_STRING = 8
+GGUF_TYPE_ARRAY = 9
+
+
+class GGUFHeaderReader:
+    """Sequential reader for the GGUF header (metadata and tensor infos)."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def read(self, fmt: str):
+        size = struct.calcsize(fmt)
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ValueError("Unexpected end of file in GGUF header")
+        return struct.unpack(fmt, data)[0]
+
+    def read_string(self) -> str:
+        length = self.read("<Q")
+        data = self.f.read(length)
+        if len(data) != length:
+            raise ValueError("Unexpected end of file in GGUF header")
+        return data.decode("utf-8")
+
+    def read_value(self, value_type: int):
+        if value_type in GGUF_SCALAR_FORMATS:
+            return self.read(GGUF_SCALAR_FORMATS[value_type])
+        if value_type == GGUF_TYPE_STRING:
+            return self.read_string()
+        if value_type == GGUF_TYPE_ARRAY:
+            item_type = self.read("<I")
+            count = self.read("<Q")
+            return [self.read_value(item_type) for _ in range(count)]
+        raise ValueError(f"Unknown GGUF value type: {value_type}")
+
+
+def read_gguf_layout(path: Path) -> dict:
+    """Parse the GGUF header and return the data offset and tensor byte ranges."""
+    file_size = path.stat().st_size
+    with open(path, "rb") as f:
+        if f.read(4) != GGUF_MAGIC:
+            raise ValueError(f"{path} is not a GGUF file")
+        reader = GGUFHeaderReader(f)
+        version = reader.read("<I")
+        if version < 2:
+            raise ValueError(f"Unsupported GGUF version {version} in {path}")
+        tensor_count = reader.read("<Q")
+        kv_count = reader.read("<Q")
+
+        metadata = {}
+        for _ in range(kv_count):
+            key = reader.read_string()
+            metadata[key] = reader.read_value(reader.read("<I"))
+
+        tensors = []
+        for _ in range(tensor_count):
+            name = reader.read_string()
+            n_dims = reader.read("<I")
+            shape = [reader.read("<Q") for _ in range(n_dims)]
+            ggml_type = reader.read("<I")
+            offset = reader.read("<Q")
+            tensors.append({"name": name, "type": ggml_type, "shape": shape, "rel_offset": offset})
+
+        alignment = metadata.get("general.alignment", GGUF_DEFAULT_ALIGNMENT)
+        header_end = f.tell()
+
+    data_offset = (header_end + alignment - 1) // alignment * alignment
+
+    # Tensor sizes follow from the next tensor's offset (includes alignment padding)
+    tensors.sort(key=lambda t: t["rel_offset"])
+    for tensor in tensors:
+        tensor["offset"] = data_offset + tensor.pop("rel_offset")
+    for i, tensor in enumerate(tensors):
+        end = tensors[i + 1]["offset"] if i + 1 < len(tensors) else file_size
+        tensor["length"] = end - tensor["offset"]
+
+    return {
+        "version": version,
+        "alignment": alignment,
+        "data_offset": data_offset if tensors else file_size,
+        "size": file_size,
+        "tensors": tensors,
+    }
+
+
+def plan_chunks(layout: dict, chunk_size: int) -> list:
+    """Group tensors into byte ranges of at most chunk_size that start on tensor boundaries."""
+    chunks = []
+    current = None
+    for tensor in layout["tensors"]:
+        start, length = tensor["offset"], tensor["length"]
+        if length > chunk_size:
+            # Oversized tensor: close the open chunk and split the tensor on its own
+            if current:
+                chunks.append(current)
+                current = None
+            for part in range(0, length, chunk_size):
+                chunks.append({"offset": start + part, "length": min(chunk_size, length - part),
+                               "tensors": [tensor["name"]]})
+            continue
+        if current and current["length"] + length > chunk_size:
+            chunks.append(current)
+            current = None
+        if current is None:
+            current = {"offset": start, "length": 0, "tensors": []}
+        current["length"] += length
+        current["tensors"].append(tensor["name"])
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _write_chunk(src, out_dir: Path, prefix: str, offset: int, length: int) -> dict:
+    src.seek(offset)
+    data = src.read(length)
+    digest = hashlib.sha256(data).hexdigest()
+    file_name = f"{prefix}.{digest[:16]}.bin"
+    (out_dir / file_name).write_bytes(data)
+    return {"file": file_name, "offset": offset, "length": length, "sha256": digest}
+
+
+def pack(model_path: Path, out_dir: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Write header and data chunks of a GGUF file plus manifest.json into out_dir."""
+    layout = read_gguf_layout(model_path)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = model_path.stem
+
+    # Remove chunks from a previous pack of the same model (not of models whose name starts with stem)
+    chunk_name = re.compile(rf"{re.escape(stem)}\.(header|\d{{5}})\.[0-9a-f]+\.bin")
+    for old in out_dir.glob(f"{stem}.*.bin"):
+        if chunk_name.fullmatch(old.name):
+            old.unlink()
+
+    whole = hashlib.sha256()
+    with open(model_path, "rb") as src:
+        for block in iter(lambda: src.read(1 << 20), b""):
+            whole.update(block)
+
+        header = _write_chunk(src, out_dir, f"{stem}.header", 0, layout["data_offset"])
+        chunks = []
+        for i, planned in enumerate(plan_chunks(layout, chunk_size)):
+            chunk = _write_chunk(src, out_dir, f"{stem}.{i:05d}", planned["offset"], planned["length"])
+            chunk["tensors"] = planned["tensors"]
+            chunks.append(chunk)
+
+    tensor_chunks = {}
+    for i, chunk in enumerate(chunks):
+        for name in chunk["tensors"]:
+            tensor_chunks.setdefault(name, []).append(i)
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "source": model_path.name,
+        "size": layout["size"],
+        "sha256": whole.hexdigest(),
+        "gguf_version": layout["version"],
+        "alignment": layout["alignment"],
+        "chunk_size": chunk_size,
+        "header": header,
+        "chunks": chunks,
+        "tensors": [
+            {
+                "name": t["name"],
+                "type": t["type"],
+                "shape": t["shape"],
+                "offset": t["offset"],
+                "length": t["length"],
+                "chunks": tensor_chunks.get(t["name"], []),
+            }
+            for t in layout["tensors"]
+        ],
+    }
+    with open(out_dir / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+    print(f"[OK] {model_path.name}: header {header['length']} bytes, "
+          f"{len(chunks)} data chunks, {len(layout['tensors'])} tensors -> {out_dir}")
+    return manifest
+
+
+def verify(manifest_path: Path, original: Path | None = None) -> bool:
+    """Reassemble the chunks of a manifest and check hashes (and the original file, if given)."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != MANIFEST_FORMAT:
+        print(f"[FAIL] {manifest_path} is not a {MANIFEST_FORMAT} manifest")
+        return False
+
+    base_dir = manifest_path.parent
+    ok = True
+    whole = hashlib.sha256()
+    expected_offset = 0
+    original_f = open(original, "rb") if original else None
+    try:
+        for entry in [manifest["header"]] + manifest["chunks"]:
+            if entry["offset"] != expected_offset:
+                print(f"[FAIL] Gap or overlap before {entry['file']}: "
+                      f"expected offset {expected_offset}, got {entry['offset']}")
+                ok = False
+            data = (base_dir / entry["file"]).read_bytes()
+            if len(data) != entry["length"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+                print(f"[FAIL] Chunk {entry['file']} does not match its manifest entry")
+                ok = False
+            if original_f is not None:
+                original_f.seek(entry["offset"])
+                if original_f.read(len(data)) != data:
+                    print(f"[FAIL] Chunk {entry['file']} differs from {original} at offset {entry['offset']}")
+                    ok = False
+            whole.update(data)
+            expected_offset = entry["offset"] + entry["length"]
+
+        if original_f is not None and original_f.seek(0, 2) != expected_offset:
+            print(f"[FAIL] Reassembled size {expected_offset} != {original} size")
+            ok = False
+    finally:
+        if original_f is not None:
+            original_f.close()
+
+    if expected_offset != manifest["size"] or whole.hexdigest() != manifest["sha256"]:
+        print(f"[FAIL] Reassembled file does not match size/sha256 recorded for {manifest['source']}")
+        ok = False
+
+    if ok:
+        target = original if original else manifest["source"]
+        print(f"[OK] {len(manifest['chunks'])} chunks + header reassemble to {target} "
+              f"({manifest['size']} bytes, sha256 {manifest['sha256'][:16]})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split GGUF models into progressively loadable chunks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = sub.add_parser("pack", help="Split a GGUF file into header + data chunks with a manifest")
+    pack_parser.add_argument("model", type=str, help="GGUF model file")
+    pack_parser.add_argument("--out-dir", "-o", type=str, default=None,
+                             help="Output directory (default: <model>.chunks)")
+    pack_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                             help=f"Maximum data chunk size in bytes (default: {DEFAULT_CHUNK_SIZE})")
+
+    verify_parser = sub.add_parser("verify", help="Reassemble chunks and check them against the manifest")
+    verify_parser.add_argument("manifest", type=str, help="manifest.json written by 'pack'")
+    verify_parser.add_argument("--original", type=str, default=None,
+                               help="Original GGUF file to compare bit-for-bit")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        model_path = Path(args.model)
+        out_dir = Path(args.out_dir) if args.out_dir else model_path.with_name(model_path.name + ".chunks")
+        manifest = pack(model_path, out_dir, args.chunk_size)
+        if not verify(out_dir / MANIFEST_NAME, model_path):
+            sys.exit(1)
+        print(f"[OK] Manifest: {out_dir / MANIFEST_NAME} ({len(manifest['chunks'])} chunks)")
+    else:
+        if not verify(Path(args.manifest), Path(args.original) if args.original else None):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+    // Escape HTML to prevent XSS
+    function escapeHtml(str) {
+      if (!str) return '';
+      const div = document.createElement('div');
+      div.textContent = str;
+      return div.innerHTML;
+    }
+
+    // Render project cards
+    function renderProjectCards(projects) {
+      const container = document.getElementById('cards-container');
+      if (!container) return;
+
+      if (projects.length === 0) {
+        container.innerHTML = `
+          <div class="empty-state" style="grid-column: 1 / -1;">
+            <div class="empty-state-icon">📦</div>
+            <p>No sample applications found.</p>
+          </div>
+        `;
+        return;
+      }
+
+      const githubIcon = document.getElementById('github-icon').innerHTML;
+      const playIcon = document.getElementById('play-icon').innerHTML;
+
+      container.innerHTML = projects.map((project, index) => {
+        const images = project.screenshotImages;
+        const loading = index < {{ eager_screenshots }}
+          ? `loading="eager"${index === 0 ? ' fetchpriority="high"' : ''}`
+          : 'loading="lazy"';
+        const screenshotHtml = images
+          ? `<picture>
+              ${images.sources.map(source => `<source type="${escapeHtml(source.type)}" srcset="${escapeHtml(source.srcset)}" sizes="${escapeHtml(images.sizes)}">`).join('')}
+              <img src="${escapeHtml(project.screenshot)}" srcset="${escapeHtml(images.srcset)}" sizes="${escapeHtml(images.sizes)}" width="${images.width}" height="${images.height}" ${loading} decoding="async" alt="${escapeHtml(project.name)} screenshot">
+            </picture>`
+          : project.screenshot
+          ? `<img src="${escapeHtml(project.screenshot)}" ${loading} decoding="async" alt="${escapeHtml(project.name)} screenshot">`
+          : `{{ screenshot_placeholder|raw }}`;
+
+        const sourceBtn = project.sourceUrl
+          ? `<a href="${escapeHtml(project.sourceUrl)}" class="btn btn-outline" target="_blank" rel="noopener noreferrer">
+              ${githubIcon}
+              Source
+            </a>`
+          : `<button class="btn btn-outline" disabled>
+              ${githubIcon}
+              Source
+            </button>`;
+
+        const demoBtn = project.demoUrl
+          ? `<a href="${escapeHtml(project.demoUrl)}" class="btn btn-primary">
+              ${playIcon}
+              Try Demo
+            </a>`
+          : `<button class="btn btn-primary" disabled>
+              ${playIcon}
+              Try Demo
+            </button>`;
+
+        return `
+          <article class="project-card" data-project-id="${escapeHtml(project.id)}">
+            <div class="card-screenshot">
+              ${screenshotHtml}
+              <div class="card-screenshot-overlay"></div>
+            </div>
+            <div class="card-header">
+              <div class="card-header-row">
+                <h2 class="card-title">${escapeHtml(project.name)}</h2>
+                <span class="card-badge">${escapeHtml(project.id)}</span>
+              </div>
+              <p class="card-description">${escapeHtml(project.description)}</p>
+            </div>
+            <div class="card-footer">
+              ${sourceBtn}
+              ${demoBtn}
+            </div>
+          </article>
+        `;
+      }).join('');
+    }
+
+    // Projects data (generated by build script)
+    const projects = {{ projects_json|raw }};
+
+    // Render on load
+    document.addEventListener('DOMContentLoaded', function() {
+      renderProjectCards(projects);
+    });
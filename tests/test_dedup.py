@@ -0,0 +1,71 @@
+import os
+
+
+def build_site(root, apps: dict):
+    for app_id, files in apps.items():
+        for rel, data in files.items():
+            path = root / app_id / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data.encode() if isinstance(data, str) else data)
+    return [{"id": app_id} for app_id in apps]
+
+
+APP = {
+    "index.html": '<html><script src="app.js"></script></html>',
+    "app.js": 'fetch("skiko.wasm");',
+    "skiko.wasm": b"\0asm skiko runtime",
+    "extra.bin": b"loaded through a computed URL",
+}
+
+
+def test_rewrite_moves_shared_files_and_rewrites_references(generator, tmp_path):
+    apps = build_site(tmp_path, {"alpha": APP, "beta": APP})
+    stats = generator.dedup_site(apps, tmp_path, mode="rewrite", workers=1)
+
+    shared = {path.name.split(".")[0]: path for path in (tmp_path / "_shared").iterdir()}
+    assert sorted(shared) == ["app", "skiko"]
+    assert stats == {"groups": 2, "files": 4, "saved_bytes": stats["saved_bytes"]}
+    # The shared JS points at its shared sibling, the pages at the shared JS
+    assert shared["app"].read_text() == f'fetch("{shared["skiko"].name}");'
+    for app_id in ("alpha", "beta"):
+        page = (tmp_path / app_id / "index.html").read_text()
+        assert f'src="../_shared/{shared["app"].name}"' in page
+        assert not (tmp_path / app_id / "app.js").exists()
+        assert not (tmp_path / app_id / "skiko.wasm").exists()
+        # Duplicates nobody references by a quoted path may be requested at runtime: keep them
+        assert (tmp_path / app_id / "extra.bin").exists()
+
+
+def test_rewrite_keeps_shared_text_that_references_app_specific_files(generator, tmp_path):
+    app = dict(APP, **{"app.js": 'fetch("config.json");', "config.json": "{}"})
+    other = dict(app, **{"config.json": '{"other": true}'})
+    apps = build_site(tmp_path, {"alpha": app, "beta": other})
+    generator.dedup_site(apps, tmp_path, mode="rewrite", workers=1)
+
+    for app_id in ("alpha", "beta"):
+        assert (tmp_path / app_id / "app.js").read_text() == 'fetch("config.json");'
+        assert 'src="app.js"' in (tmp_path / app_id / "index.html").read_text()
+
+
+def test_rewrite_repoints_card_screenshots(generator, tmp_path):
+    apps = build_site(tmp_path, {"alpha": {"shot.png": b"png"}, "beta": {"shot.png": b"png"}})
+    for app in apps:
+        app["screenshot_url"] = f"{app['id']}/shot.png"
+    generator.dedup_site(apps, tmp_path, mode="rewrite", workers=1)
+
+    assert apps[0]["screenshot_url"] == apps[1]["screenshot_url"]
+    assert apps[0]["screenshot_url"].startswith("_shared/shot.")
+    assert (tmp_path / apps[0]["screenshot_url"]).read_bytes() == b"png"
+
+
+def test_link_mode_hardlinks_copies_and_drops_stale_blobs(generator, tmp_path):
+    apps = build_site(tmp_path, {"alpha": APP, "beta": APP})
+    stale = tmp_path / "_shared" / "ab" / "ab0123"
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b"from a previous build")
+    generator.dedup_site(apps, tmp_path, mode="link", workers=1)
+
+    for rel in ("app.js", "skiko.wasm", "index.html"):
+        assert os.path.samefile(tmp_path / "alpha" / rel, tmp_path / "beta" / rel)
+    assert (tmp_path / "alpha" / "app.js").read_text() == APP["app.js"]
+    assert not stale.exists()
@@ -0,0 +1,67 @@
+import re
+
+SITE = {
+    "index.html": '<link href="css/site.css"><script src="app.js"></script>',
+    "app.js": 'fetch("skiko.wasm");',
+    "skiko.wasm": "\0asm v1",
+    "css/site.css": 'body { background: url("../img/bg.png"); }',
+    "img/bg.png": "png",
+    "runtime.bin": "loaded through a computed URL",
+}
+
+
+def build_site(root, files: dict):
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data)
+    return root
+
+
+def hashed(root, pattern: str):
+    matches = [path for path in root.rglob("*") if re.fullmatch(pattern, path.relative_to(root).as_posix())]
+    assert len(matches) == 1, matches
+    return matches[0].relative_to(root).as_posix()
+
+
+def test_renames_referenced_assets_and_rewrites_references(generator, tmp_path):
+    build_site(tmp_path, SITE)
+    result = generator.fingerprint_site(tmp_path)
+
+    wasm = hashed(tmp_path, r"skiko\.[0-9a-f]{8}\.wasm")
+    js = hashed(tmp_path, r"app\.[0-9a-f]{8}\.js")
+    css = hashed(tmp_path, r"css/site\.[0-9a-f]{8}\.css")
+    png = hashed(tmp_path, r"img/bg\.[0-9a-f]{8}\.png")
+    assert result == sorted([wasm, js, css, png])
+    assert (tmp_path / js).read_text() == f'fetch("{wasm}");'
+    assert f'url("../{png}")' in (tmp_path / css).read_text()
+    page = (tmp_path / "index.html").read_text()
+    assert f'href="{css}"' in page and f'src="{js}"' in page
+    # Unreferenced files may be fetched by computed URLs and keep their names
+    assert (tmp_path / "runtime.bin").exists()
+
+
+def test_hash_of_a_file_covers_the_hashed_names_it_references(generator, tmp_path):
+    first = build_site(tmp_path / "first", SITE)
+    second = build_site(tmp_path / "second", dict(SITE, **{"skiko.wasm": "\0asm v2"}))
+    generator.fingerprint_site(first)
+    generator.fingerprint_site(second)
+
+    # Only the wasm changed, but app.js references it by its hashed name
+    assert hashed(first, r"app\.[0-9a-f]{8}\.js") != hashed(second, r"app\.[0-9a-f]{8}\.js")
+    assert hashed(first, r"css/site\.[0-9a-f]{8}\.css") == hashed(second, r"css/site\.[0-9a-f]{8}\.css")
+
+
+def test_reference_cycles_keep_their_names(generator, tmp_path):
+    build_site(tmp_path, {
+        "index.html": '<script src="a.js"></script>',
+        "a.js": 'import "./b.js"; fetch("data.json");',
+        "b.js": 'import "./a.js";',
+        "data.json": "{}",
+    })
+    result = generator.fingerprint_site(tmp_path)
+
+    data = hashed(tmp_path, r"data\.[0-9a-f]{8}\.json")
+    assert result == [data]
+    assert (tmp_path / "a.js").read_text() == f'import "./b.js"; fetch("{data}");'
+    assert (tmp_path / "b.js").exists()
@@ -0,0 +1,71 @@
+import shutil
+import subprocess
+
+import pytest
+
+DIVISIONS_AND_REGEXES = """
+function f(a, b, arr) {
+  let i = 0, j = 4;
+  const half = i++ / 2;
+  const text = i++ / 2 + "a/b" + "keep   spaces";
+  const quarter = j-- / 4 / 1;
+  const spaced = i ++ / 2;
+  const indexed = arr[0]++ / 2;
+  const grouped = (a + b) / 2;
+  const number = 10 / 5;
+  const re = /a\\/b[/]/g;
+  if (/^x+$/.test(a)) { return /y/.source; }
+  return text + half + quarter + spaced + indexed + grouped + number + re.source;
+}
+"""
+
+
+def test_minify_js_keeps_divisions_and_regexes(generator, tmp_path):
+    node = shutil.which("node")
+    if node is None:
+        pytest.skip("node is not installed")
+    minified = generator._minify_js(DIVISIONS_AND_REGEXES)
+    assert "/a\\/b[/]/g" in minified
+    script = tmp_path / "minified.js"
+    script.write_text(minified + "\nconsole.log(f(1, 2, [3]));\n", encoding="utf-8")
+    subprocess.run([node, "--check", str(script)], check=True)
+    original = tmp_path / "original.js"
+    original.write_text(DIVISIONS_AND_REGEXES + "\nconsole.log(f(1, 2, [3]));\n", encoding="utf-8")
+    run = lambda path: subprocess.run([node, str(path)], check=True, capture_output=True, text=True).stdout
+    assert run(script) == run(original)
+
+
+def test_minify_css_strips_comments_but_not_strings(generator):
+    css = '/* c */ a :hover , b { color: red ; content: "x  /* y */"; }\n\n.c{ margin: 0 }'
+    assert generator._minify_css(css) == 'a :hover,b{color:red;content:"x  /* y */"}.c{margin:0}'
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+  <head>
+    <!-- dropped -->
+    <!--[if IE]><p>ie</p><![endif]-->
+    <style> body { margin: 0 ; } </style>
+    <script type="application/json">{ "a" : [1, 2] }</script>
+    <script type="text/x-template">  keep   me  </script>
+  </head>
+  <body>
+    <p>Hello   <b>world</b>  !</p>
+    <pre>  a
+   b</pre>
+    <script>  let x = 1 ;  </script>
+  </body>
+</html>
+"""
+
+
+def test_minify_html(generator):
+    minified = generator.minify_html(PAGE)
+    assert minified == (
+        '<!DOCTYPE html><html><head><!--[if IE]><p>ie</p><![endif]-->'
+        '<style>body{margin:0}</style>'
+        '<script type="application/json">{"a":[1,2]}</script>'
+        '<script type="text/x-template">  keep   me  </script></head>'
+        '<body><p>Hello <b>world</b> !</p><pre>  a\n   b</pre><script>let x=1;</script></body></html>\n'
+    )
+    assert generator.minify_html(minified) == minified
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+onnx = pytest.importorskip("onnx")
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "MNISTDemo"))
+import mnist_onnx  # noqa: E402
+
+
+def small_cnn(seed: int = 0) -> onnx.ModelProto:
+    """Conv+Relu, MaxPool, a Reshape to a constant shape behind an Identity, MatMul+Add and Gemm+Add."""
+    rng = np.random.default_rng(seed)
+    initializers = {
+        "conv_w": rng.standard_normal((2, 1, 3, 3)), "conv_b": rng.standard_normal(2),
+        "fc1_w": rng.standard_normal((8, 5)), "fc1_b": rng.standard_normal(5),
+        "fc2_w": rng.standard_normal((3, 5)), "fc2_b": rng.standard_normal(3),
+    }
+    shape = numpy_helper.from_array(np.array([-1, 8], dtype=np.int64))
+    nodes = [
+        helper.make_node("Conv", ["x", "conv_w", "conv_b"], ["conv"], pads=[1, 1, 1, 1]),
+        helper.make_node("Relu", ["conv"], ["relu"]),
+        helper.make_node("MaxPool", ["relu"], ["pool"], kernel_shape=[2, 2], strides=[2, 2]),
+        helper.make_node("Constant", [], ["shape"], value=shape),
+        helper.make_node("Identity", ["shape"], ["shape_id"]),
+        helper.make_node("Reshape", ["pool", "shape_id"], ["flat"]),
+        helper.make_node("MatMul", ["flat", "fc1_w"], ["fc1"]),
+        helper.make_node("Add", ["fc1", "fc1_b"], ["fc1_out"]),
+        helper.make_node("Gemm", ["fc1_out", "fc2_w"], ["fc2"], transB=1, beta=0.5),
+        helper.make_node("Add", ["fc2_b", "fc2"], ["y"]),
+    ]
+    graph = helper.make_graph(
+        nodes, "small_cnn",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["N", 1, 4, 4])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["N", 3])],
+        [numpy_helper.from_array(value.astype(np.float32), name) for name, value in initializers.items()],
+    )
+    return helper.make_model(graph, opset_imports=[helper.make_opsetid("", mnist_onnx.OPSET_VERSION)])
+
+
+@pytest.fixture
+def x():
+    return np.random.default_rng(1).standard_normal((5, 1, 4, 4)).astype(np.float32)
+
+
+def op_types(model) -> list:
+    return [node.op_type for node in model.graph.node]
+
+
+def test_passes_rewrite_the_graph_without_changing_outputs(x):
+    model = small_cnn()
+    expected = mnist_onnx.NumpyGraph(model).run(x)
+
+    assert mnist_onnx.fold_constants(model) == 2
+    assert op_types(model) == ["Conv", "Relu", "MaxPool", "Reshape", "MatMul", "Add", "Gemm", "Add"]
+    assert mnist_onnx.fuse_gemm_bias(model) == 2
+    assert op_types(model) == ["Conv", "Relu", "MaxPool", "Reshape", "Gemm", "Gemm"]
+    # beta scaled the C the original Gemm did not have; the fused bias must not be scaled
+    assert all(attr.name != "beta" for attr in model.graph.node[-1].attribute)
+    onnx.checker.check_model(model)
+    assert mnist_onnx.fuse_conv_relu(model) == 1
+    assert op_types(model) == ["FusedConv", "MaxPool", "Reshape", "Gemm", "Gemm"]
+    assert model.graph.node[0].domain == mnist_onnx.MS_DOMAIN
+
+    np.testing.assert_allclose(mnist_onnx.NumpyGraph(model).run(x), expected, rtol=1e-5, atol=1e-5)
+
+
+def test_gemm_with_bias_is_left_alone():
+    model = small_cnn()
+    mnist_onnx.fold_constants(model)
+    mnist_onnx.fuse_gemm_bias(model)
+    assert mnist_onnx.fuse_gemm_bias(model) == 0
+
+
+def test_optimize_reports_every_pass(x):
+    model = small_cnn()
+    expected = mnist_onnx.NumpyGraph(model).run(x)
+    report = mnist_onnx.optimize(model, fp16=True, fuse_conv_relu_ops=False)
+
+    assert report == [
+        "constant folding: 2 nodes folded, nodes 10 -> 8",
+        "Gemm+bias fusion: 2 fused, nodes 8 -> 6",
+        "FP16 initializers: 6 converted, nodes 6 -> 12",
+    ]
+    assert {prop.key: prop.value for prop in model.metadata_props}[mnist_onnx.PASS_REPORT_KEY] == "\n".join(report)
+    assert "FusedConv" not in op_types(model)
+    onnx.checker.check_model(model)
+    np.testing.assert_allclose(mnist_onnx.NumpyGraph(model).run(x), expected, rtol=1e-2, atol=1e-2)
@@ -0,0 +1,106 @@
+import io
+import json
+import struct
+
+import pytest
+
+from conftest import load_script
+
+packer = load_script("pack-gguf-chunks")
+
+ALIGNMENT = 32
+
+
+def gguf_string(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, tensors: dict):
+    """Minimal GGUF v3 file with f32 tensors {name: element count}, laid out back to back."""
+    metadata = [
+        gguf_string("general.alignment") + struct.pack("<II", 4, ALIGNMENT),
+        gguf_string("general.name") + struct.pack("<I", 8) + gguf_string("test model"),
+        gguf_string("test.sizes") + struct.pack("<IIQ", 9, 5, len(tensors)) +
+        b"".join(struct.pack("<i", count) for count in tensors.values()),
+    ]
+    infos, data = [], b""
+    for index, (name, count) in enumerate(tensors.items()):
+        infos.append(gguf_string(name) + struct.pack("<IQIQ", 1, count, 0, len(data)))
+        data += struct.pack(f"<{count}f", *range(count)) + bytes(-count * 4 % ALIGNMENT)
+    header = packer.GGUF_MAGIC + struct.pack("<IQQ", 3, len(tensors), len(metadata)) + b"".join(metadata + infos)
+    header += bytes(-len(header) % ALIGNMENT)
+    path.write_bytes(header + data)
+    return len(header)
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "model.gguf"
+    write_gguf(path, {"small": 4, "large": 64, "tail": 8})
+    return path
+
+
+def test_read_gguf_layout(model):
+    layout = packer.read_gguf_layout(model)
+    assert layout["version"] == 3 and layout["alignment"] == ALIGNMENT
+    assert [(t["name"], t["shape"], t["length"]) for t in layout["tensors"]] == [
+        ("small", [4], 32), ("large", [64], 256), ("tail", [8], 32),
+    ]
+    assert layout["tensors"][0]["offset"] == layout["data_offset"]
+
+
+def test_pack_splits_on_tensor_boundaries_and_verifies(model, tmp_path):
+    out_dir = tmp_path / "chunks"
+    manifest = packer.pack(model, out_dir, chunk_size=100)
+
+    # "large" exceeds the chunk size and is split on its own; the others get whole chunks
+    assert [(c["length"], c["tensors"]) for c in manifest["chunks"]] == [
+        (32, ["small"]), (100, ["large"]), (100, ["large"]), (56, ["large"]), (32, ["tail"]),
+    ]
+    assert {t["name"]: t["chunks"] for t in manifest["tensors"]} == {"small": [0], "large": [1, 2, 3], "tail": [4]}
+    assert json.loads((out_dir / packer.MANIFEST_NAME).read_text()) == manifest
+    assert packer.verify(out_dir / packer.MANIFEST_NAME, model)
+
+    corrupt = out_dir / manifest["chunks"][2]["file"]
+    corrupt.write_bytes(bytes(100))
+    assert not packer.verify(out_dir / packer.MANIFEST_NAME)
+
+
+def test_verify_compares_with_the_original(model, tmp_path):
+    out_dir = tmp_path / "chunks"
+    packer.pack(model, out_dir, chunk_size=1024)
+    other = tmp_path / "other.gguf"
+    write_gguf(other, {"small": 4, "large": 64, "tail": 9})
+    assert not packer.verify(out_dir / packer.MANIFEST_NAME, other)
+
+
+def test_repack_removes_only_this_models_chunks(model, tmp_path):
+    out_dir = tmp_path / "chunks"
+    similar = tmp_path / "model.v2.gguf"
+    write_gguf(similar, {"w": 16})
+    packer.pack(similar, out_dir, chunk_size=1024)
+    kept = sorted(path.name for path in out_dir.glob("model.v2.*.bin"))
+
+    packer.pack(model, out_dir, chunk_size=100)
+    manifest = packer.pack(model, out_dir, chunk_size=1024)
+    files = {entry["file"] for entry in [manifest["header"]] + manifest["chunks"]}
+    assert sorted(path.name for path in out_dir.glob("model.*.bin") if not path.name.startswith("model.v2.")) == \
+        sorted(files)
+    assert sorted(path.name for path in out_dir.glob("model.v2.*.bin")) == kept
+
+
+def test_truncated_header_is_rejected(model, tmp_path):
+    header_size = write_gguf(model, {"small": 4})
+    data = model.read_bytes()
+    for size in (3, 37, header_size - 40):
+        truncated = tmp_path / f"truncated{size}.gguf"
+        truncated.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            packer.read_gguf_layout(truncated)
+
+
+def test_read_string_rejects_short_reads():
+    reader = packer.GGUFHeaderReader(io.BytesIO(struct.pack("<Q", 10) + b"abc"))
+    with pytest.raises(ValueError, match="Unexpected end of file"):
+        reader.read_string()
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+
+
+def write(path, data: bytes, mtime: int | None = None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def make_app(root, app_id, files: dict):
+    """A project with one distDir holding files {rel: bytes}; returns the app dict."""
+    dist = root / app_id / "dist"
+    for rel, data in files.items():
+        write(dist / rel, data)
+    return {"id": app_id, "project_root": root / app_id, "distDirs": ["dist"], "screenshot": None}
+
+
+def test_needs_copy_compares_size_and_mtime(generator, tmp_path):
+    src = write(tmp_path / "src.bin", b"abc", mtime=1_000_000)
+    dest = tmp_path / "dest.bin"
+    assert generator.needs_copy(src, dest)
+    write(dest, b"abc", mtime=1_000_000)
+    assert not generator.needs_copy(src, dest)
+    write(dest, b"abcd", mtime=1_000_000)
+    assert generator.needs_copy(src, dest)
+    write(dest, b"abc", mtime=2_000_000)
+    assert generator.needs_copy(src, dest)
+    assert not generator.needs_copy(src, dest, checksum=True)
+    write(dest, b"xyz", mtime=2_000_000)
+    assert generator.needs_copy(src, dest, checksum=True)
+
+
+def test_needs_copy_replaces_other_link_modes(generator, tmp_path):
+    src = write(tmp_path / "src.bin", b"abc")
+    dest = tmp_path / "dest.bin"
+    os.link(src, dest)
+    assert not generator.needs_copy(src, dest, link_mode="hardlink")
+    dest.unlink()
+    generator.shutil.copy2(src, dest)
+    assert generator.needs_copy(src, dest, link_mode="hardlink")
+    assert generator.needs_copy(src, dest, link_mode="symlink")
+    dest.unlink()
+    dest.symlink_to(src.resolve())
+    assert not generator.needs_copy(src, dest, link_mode="symlink")
+    assert generator.needs_copy(src, dest, link_mode="copy")
+
+
+def test_remove_stale_files_keeps_sidecars_of_kept_files(generator, tmp_path):
+    for rel in ("keep.js", "keep.js.gz", "keep.js.br", "old.js", "old.js.gz", "sub/old.css"):
+        write(tmp_path / rel, b"x")
+    stats = generator.new_sync_stats()
+    generator.remove_stale_files(tmp_path, {"keep.js"}, stats)
+    assert sorted(p.name for p in tmp_path.rglob("*")) == ["keep.js", "keep.js.br", "keep.js.gz"]
+    assert stats["removed"] == 3
+
+
+def test_incremental_sync_copies_only_changes(generator, tmp_path):
+    app = make_app(tmp_path, "demo", {"app.js": b"js", "app.wasm": b"wasm", "res/model.bin": b"model"})
+    out = tmp_path / "site"
+    assert generator.copy_dist_files([app], out, incremental=True, workers=2) == []
+
+    write(app["project_root"] / "dist" / "app.js", b"js changed")
+    (app["project_root"] / "dist" / "res" / "model.bin").unlink()
+    stats = {}
+    original = generator.print_sync_summary
+    generator.print_sync_summary = lambda label, s: stats.setdefault(label, dict(s))
+    try:
+        generator.copy_dist_files([app], out, incremental=True, workers=2)
+    finally:
+        generator.print_sync_summary = original
+    assert stats["demo"]["copied"] == 1
+    assert stats["demo"]["skipped"] == 1
+    assert stats["demo"]["removed"] == 1
+    assert (out / "demo" / "app.js").read_bytes() == b"js changed"
+    assert not (out / "demo" / "res").exists()
+
+
+def test_later_dist_dirs_win(generator, tmp_path):
+    app = make_app(tmp_path, "demo", {"index.html": b"first"})
+    write(app["project_root"] / "resources" / "index.html", b"second")
+    app["distDirs"].append("resources")
+    assert generator.plan_app_files(app, verbose=False)["index.html"] == app["project_root"] / "resources" / "index.html"
+
+
+def test_link_staged_apps_recreates_the_output_with_hardlinks(generator, tmp_path):
+    stage, out = tmp_path / "stage", tmp_path / "site"
+    write(stage / "demo" / "a" / "app.wasm", b"wasm")
+    write(out / "demo" / "app.3f2a9c01.wasm", b"renamed by a previous build")
+    assert generator.link_staged_apps([{"id": "demo"}], stage, out) == 1
+    assert [p.relative_to(out).as_posix() for p in out.rglob("*") if p.is_file()] == ["demo/a/app.wasm"]
+    assert os.path.samefile(out / "demo" / "a" / "app.wasm", stage / "demo" / "a" / "app.wasm")
+
+
+@pytest.mark.parametrize("options", [["--fingerprint"], ["--dedup", "rewrite"]])
+def test_incremental_build_with_renamed_outputs_copies_only_changes(tmp_path, options):
+    for app_id in ("one", "two"):
+        root = tmp_path / "repo" / app_id
+        write(root / "webapp.json", f'{{"id": "{app_id}", "distDirs": ["dist"]}}'.encode())
+        write(root / "dist" / "index.html", b'<html><head><script src="app.js"></script></head></html>')
+        write(root / "dist" / "app.js", b'fetch("shared.wasm");')
+        write(root / "dist" / "shared.wasm", b"\0asm shared")
+    command = [sys.executable, str(SCRIPTS_DIR / "generate-samples-page.py"), "--root", str(tmp_path / "repo"),
+               "--output", str(tmp_path / "site"), "--build", "--incremental", "--no-git-scan", *options]
+    subprocess.run(command, check=True, capture_output=True)
+    write(tmp_path / "repo" / "one" / "dist" / "app.js", b'fetch("shared.wasm"); // changed')
+    result = subprocess.run(command, check=True, capture_output=True, text=True)
+    assert "Dist sync total: copied 1 " in result.stdout
+    assert "removed 0 " in result.stdout
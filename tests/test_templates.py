@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+
+def test_compile_template_escapes_values_unless_raw(generator):
+    render = generator.compile_template("<h1>{{ title }}</h1>{{body|raw}}")
+    assert render({"title": "<Demo & co>", "body": "<p>ok</p>"}) == "<h1>&lt;Demo &amp; co&gt;</h1><p>ok</p>"
+
+
+def test_compile_template_keeps_other_braces_literal(generator):
+    source = "a{b:c} {{ not a name }} {{1x}} {{ x }} function(){ return {{}}; }"
+    assert generator.compile_template(source)({"x": 1}) == source.replace("{{ x }}", "1")
+
+
+def test_compile_template_requires_every_value(generator):
+    with pytest.raises(KeyError):
+        generator.compile_template("{{ missing }}")({})
+
+
+def test_load_template_recompiles_changed_files(generator, tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("v1 {{ x }}")
+    assert generator.load_template("page.html", tmp_path)({"x": 1}) == "v1 1"
+    path.write_text("v2! {{ x }}")
+    os.utime(path, ns=(path.stat().st_mtime_ns + 1_000_000, path.stat().st_mtime_ns + 1_000_000))
+    assert generator.load_template("page.html", tmp_path)({"x": 1}) == "v2! 1"
+
+
+def test_wrap_app_pages(generator, tmp_path):
+    for app_id in ("with_app", "index_only"):
+        (tmp_path / app_id).mkdir()
+        (tmp_path / app_id / "index.html").write_text("static wrapper copy")
+    (tmp_path / "with_app" / "app.html").write_text("the app")
+    apps = [
+        {"id": "with_app", "name": "Demo <One>", "sourceUrl": "https://example.com/src?a=1&b=2"},
+        {"id": "index_only", "name": "Two"},
+        {"id": "missing", "name": "Three"},
+    ]
+    assert generator.wrap_app_pages(apps, tmp_path) == 2
+
+    page = (tmp_path / "with_app" / "index.html").read_text()
+    assert (tmp_path / "with_app" / "app.html").read_text() == "the app"
+    assert "<title>Demo &lt;One&gt; - SKaiNET Examples</title>" in page
+    assert 'href="https://example.com/src?a=1&amp;b=2"' in page
+    assert f"&copy; {generator.build_date().year} SKaiNET" in page
+    # A dist with only index.html: that page is the app itself
+    assert (tmp_path / "index_only" / "app.html").read_text() == "static wrapper copy"
+    other = (tmp_path / "index_only" / "index.html").read_text()
+    assert 'src="app.html"' in other and "Source" not in other